@@ -0,0 +1,74 @@
+"""
+Benchmark da normalização de nomes: implementação original (apply linha a linha)
+contra o motor de normalization.py (factorize + cache + tabela de tradução).
+
+Uso:
+    python benchmarks/bench_normalization.py [--rows 1000000] [--unique 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import unicodedata
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from normalization import normalize_name, normalize_series
+
+FIRST_NAMES = ["José", "João", "Maria", "Conceição", "Ângela", "Luís", "Inês", "Ana"]
+LAST_NAMES = ["Silva", "Araújo", "Gonçalves", "Lima", "Brandão", "Simões", "Sá"]
+
+
+def reference_normalize_name(name: str) -> str:
+    """Implementação original, aplicada linha a linha."""
+    normalized = unicodedata.normalize("NFD", name)
+    ascii_name = "".join(
+        char for char in normalized if unicodedata.category(char) != "Mn"
+    )
+    return " ".join(ascii_name.upper().split())
+
+
+def make_names(rows: int, unique: int, seed: int = 110) -> pd.Series:
+    """Gera uma coluna de nomes com repetições, variando caixa e espaços."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(unique):
+        first, middle = rng.sample(FIRST_NAMES, 2)
+        name = f"{first} {middle}  {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        pool.append(name.lower() if rng.random() < 0.2 else name)
+    return pd.Series(rng.choices(pool, k=rows))
+
+
+def timed(label: str, rows: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.3f}s  {rows / elapsed:14,.0f} linhas/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--unique", type=int, default=5_000)
+    args = parser.parse_args()
+
+    names = make_names(args.rows, args.unique)
+    print(f"{args.rows:,} linhas, {names.nunique():,} nomes distintos")
+
+    expected = timed(
+        "original (apply)", args.rows, lambda: names.apply(reference_normalize_name)
+    )
+    normalize_name.cache_clear()
+    cold = timed("normalize_series (frio)", args.rows, lambda: normalize_series(names))
+    warm = timed("normalize_series (cache)", args.rows, lambda: normalize_series(names))
+
+    assert expected.equals(cold) and expected.equals(warm), "resultados divergentes"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark do pipeline de doadores com respostas sintéticas (1k a 10M linhas).
+
+Cada tamanho roda em um processo separado, para que o pico de memória (RSS)
+de um não contamine o outro. As etapas vêm da instrumentação do próprio
+pipeline: no motor pandas, load, clean, normalize, parse_valor,
+parse_dates, groupby, ranking, weighting e serialize; no lean, as que ele
+de fato tem.
+Com `--trace-memory` cada etapa também registra o pico do tracemalloc, que
+deixa o Python bem mais lento: compare tempos só entre execuções com a mesma
+opção.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--sizes 1k,100k,1M,10M] [--engine pandas]
+        [--output resultados.json] [--compare base.json] [--trace-memory]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+DEFAULT_SIZES = "1k,100k,1M,10M"
+SUFFIXES = {"k": 1_000, "M": 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    if text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def run_single(rows: int, engine: str, seed: int, trace_memory: bool) -> dict:
+    """Executa um tamanho no processo atual e retorna o resultado."""
+    from donor_payload import build_donor_payload
+    from instrumentation import Metrics, collect
+    from output_writer import serialize_payload
+    from synthetic_responses import make_responses
+
+    start = time.perf_counter()
+    columns = make_responses(rows, seed=seed)
+    generate_seconds = time.perf_counter() - start
+
+    # As etapas são as do próprio pipeline (instrumentation.py); só a
+    # serialização, feita fora dos motores, é medida aqui
+    metrics = Metrics(trace_memory)
+    with collect(metrics):
+        payload = build_donor_payload(columns, engine)
+        with metrics.stage("serialize"):
+            serialize_payload(payload)
+
+    report = metrics.to_dict()
+    return {
+        "rows": rows,
+        "engine": engine,
+        "donors": len(payload["wordCloud"]),
+        "generate_seconds": round(generate_seconds, 3),
+        "total_seconds": report["wall_s"],
+        "cpu_seconds": report["cpu_s"],
+        "stages": {stage.pop("stage"): stage for stage in report["stages"]},
+        "dropped": report["dropped"],
+        # ru_maxrss vem em KiB no Linux e em bytes no macOS
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (2**20 if sys.platform == "darwin" else 2**10),
+            1,
+        ),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result: dict, baseline: dict | None):
+    print(
+        f"\n{result['rows']:,} linhas ({result['engine']}): "
+        f"{result['donors']:,} doadores, pico RSS {result['peak_rss_mb']:,} MB"
+    )
+    for name, stage in [*result["stages"].items(), ("total", None)]:
+        seconds = stage["wall_s"] if stage else result["total_seconds"]
+        line = f"  {name:<12} {seconds:10.4f}s"
+        if stage and "peak_mb" in stage:
+            line += f"  {stage['peak_mb']:10.2f} MB"
+        if baseline is not None:
+            before = (
+                baseline["stages"].get(name, {}).get("wall_s")
+                if stage
+                else baseline["total_seconds"]
+            )
+            if before:
+                line += f"  {(seconds - before) / before:+8.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--engine", choices=("pandas", "lean"), default="pandas")
+    parser.add_argument("--seed", type=int, default=110)
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--output", metavar="ARQUIVO", help="Salva os resultados.")
+    parser.add_argument(
+        "--compare", metavar="ARQUIVO", help="Compara com resultados salvos antes."
+    )
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        # Processo filho: um único tamanho, resultado em JSON na saída padrão
+        result = run_single(args.single, args.engine, args.seed, args.trace_memory)
+        print(json.dumps(result))
+        return
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baselines = {(r["rows"], r["engine"]): r for r in json.load(f)["results"]}
+
+    results = []
+    for rows in (parse_size(size) for size in args.sizes.split(",")):
+        command = [
+            sys.executable, __file__, "--single", str(rows),
+            "--engine", args.engine, "--seed", str(args.seed),
+        ]  # fmt: skip
+        if args.trace_memory:
+            command.append("--trace-memory")
+        output = subprocess.run(command, capture_output=True, text=True, check=False)
+        if output.returncode != 0:
+            sys.exit(f"Falha com {rows:,} linhas:\n{output.stderr}")
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print_result(result, baselines.get((rows, args.engine)))
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados salvos em '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Replay offline de um dia de respostas do formulário contra o emulador local
+das APIs do Google (sheets_emulator.py), rodando o pipeline completo
+(`main`, modo incremental) como no workflow, sem rede nem credenciais.
+
+As respostas vêm de uma exportação da planilha (CSV ou JSON, como em `--csv`)
+ou do gerador sintético. As anteriores ao dia replayado já estão na planilha;
+as do dia entram uma a uma, no ritmo dos carimbos de data/hora acelerado
+`--speed` vezes. Com `--speed 0` não há espera: cada resposta tem a sua
+execução. Com espera, as respostas que chegam durante uma execução entram
+juntas na próxima, como na fila do event_spool. `--latency` atrasa cada
+resposta do emulador, como a rede.
+
+Mede a vazão (respostas/s), a latência de cada resposta (do envio até o fim
+da primeira execução iniciada depois dele), as chamadas à API por execução e
+confere se o donors.json incremental é igual ao de uma leitura completa.
+
+Uso:
+    python benchmarks/replay_day.py [--log respostas.csv] [--rows 20k]
+        [--day dd/mm/aaaa] [--speed 600] [--latency 0.05] [--engine lean]
+        [--output resultados.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_pipeline import parse_size
+
+TIMESTAMP_COLUMN = "Carimbo de data/hora"
+TIMESTAMP_FORMAT = "%d/%m/%Y %H:%M:%S"
+DAY_FORMAT = "%d/%m/%Y"
+SPREADSHEET_KEY = "replay"
+
+
+def load_log(path: str) -> list[list[str]]:
+    """Linhas cruas (cabeçalho primeiro) de uma exportação CSV ou JSON."""
+    from sheet_source import LocalSheetSource
+
+    if path.endswith(".json"):
+        return LocalSheetSource.from_json(path).values
+    return LocalSheetSource.from_csv(path).values
+
+
+def synthetic_log(rows: int, seed: int) -> list[list[str]]:
+    """Linhas cruas (cabeçalho primeiro) do gerador de respostas sintéticas."""
+    from synthetic_responses import make_responses
+
+    columns = make_responses(rows, seed=seed)
+    return [list(columns), *(list(row) for row in zip(*columns.values()))]
+
+
+def split_day(
+    values: list[list[str]], day: str | None = None
+) -> tuple[list[list[str]], list[tuple[float, list[str]]]]:
+    """
+    Separa as linhas em (histórico, respostas do dia). Cada resposta do dia
+    vem com os segundos desde a primeira; sem `day`, usa o dia da última
+    linha. Carimbos ilegíveis herdam o horário da linha anterior e as linhas
+    depois do dia ficam de fora.
+    """
+    header, rows = values[0], values[1:]
+    column = header.index(TIMESTAMP_COLUMN)
+    times = []
+    previous = None
+    for row in rows:
+        try:
+            previous = datetime.strptime(row[column].strip(), TIMESTAMP_FORMAT)
+        except (IndexError, ValueError):
+            pass
+        times.append(previous)
+
+    dated = [moment for moment in times if moment is not None]
+    if not dated:
+        raise ValueError("Nenhum carimbo de data/hora legível nas respostas.")
+    target = datetime.strptime(day, DAY_FORMAT).date() if day else dated[-1].date()
+
+    history, events, start = [header], [], None
+    for row, moment in zip(rows, times, strict=True):
+        if moment is None or moment.date() < target:
+            if not events:
+                history.append(row)
+        elif moment.date() == target:
+            start = start or moment
+            events.append(((moment - start).total_seconds(), row))
+    return history, events
+
+
+@contextmanager
+def pipeline_workdir() -> Iterator[str]:
+    """Pasta temporária com `public/`, onde `main` grava o JSON, o banco e os caches."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="replay-") as path:
+        os.makedirs(os.path.join(path, "public"))
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
+
+
+@contextmanager
+def emulator(server) -> Iterator[None]:
+    """Aponta o `main` para o emulador, como SHEETS_EMULATOR_URL no ambiente."""
+    from update_donors import EMULATOR_URL_ENV
+
+    previous = os.environ.get(EMULATOR_URL_ENV)
+    os.environ[EMULATOR_URL_ENV] = server.url
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop(EMULATOR_URL_ENV, None)
+        else:
+            os.environ[EMULATOR_URL_ENV] = previous
+
+
+def run_pipeline(incremental: bool, engine: str) -> dict:
+    """Uma execução de `main`, em silêncio, com as métricas e chamadas à API."""
+    from api_usage import track_api_usage
+    from instrumentation import Metrics, collect
+    from update_donors import main
+
+    metrics = Metrics()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()), collect(metrics), track_api_usage() as usage:
+        main(incremental=incremental, engine=engine)
+    return {
+        "wall_s": time.perf_counter() - start,
+        "api_calls": usage.calls,
+        "stages": metrics.stages,
+    }
+
+
+def read_output() -> dict:
+    from update_donors import OUTPUT_FILE
+
+    with open(OUTPUT_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def replay_events(server, events, speed: float, engine: str) -> tuple[list, list]:
+    """
+    Envia as respostas do dia ao emulador e roda o pipeline a cada chegada.
+    Retorna as execuções e a latência de cada resposta.
+    """
+    from update_donors import WORKSHEET_NAME
+
+    runs, latencies = [], []
+    if speed <= 0:
+        for _offset, row in events:
+            server.append_rows(SPREADSHEET_KEY, WORKSHEET_NAME, [row])
+            runs.append(run_pipeline(True, engine))
+            latencies.append(runs[-1]["wall_s"])
+        return runs, latencies
+
+    submitted = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def submit():
+        for offset, row in events:
+            time.sleep(max(0.0, start + offset / speed - time.perf_counter()))
+            with lock:
+                server.append_rows(SPREADSHEET_KEY, WORKSHEET_NAME, [row])
+                submitted.append(time.perf_counter())
+
+    submitter = threading.Thread(target=submit, daemon=True)
+    submitter.start()
+    served = 0
+    while served < len(events):
+        with lock:
+            pending = submitted[served:]
+        if not pending:
+            time.sleep(0.001)
+            continue
+        # A execução atende às respostas enviadas antes de ela começar
+        runs.append(run_pipeline(True, engine))
+        finished = time.perf_counter()
+        latencies.extend(finished - moment for moment in pending)
+        served += len(pending)
+    submitter.join()
+    return runs, latencies
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def latency_summary(latencies: list[float]) -> dict | None:
+    if not latencies:
+        return None
+    return {
+        "p50": round(percentile(latencies, 50), 4),
+        "p95": round(percentile(latencies, 95), 4),
+        "max": round(max(latencies), 4),
+    }
+
+
+def stage_totals(runs: list[dict]) -> dict[str, float]:
+    """Tempo somado de cada etapa em todas as execuções."""
+    totals = {}
+    for run in runs:
+        for stage in run["stages"]:
+            totals[stage.name] = totals.get(stage.name, 0.0) + stage.wall_s
+    return {name: round(seconds, 4) for name, seconds in totals.items()}
+
+
+def replay(
+    values: list[list[str]],
+    day: str | None = None,
+    speed: float = 0.0,
+    latency: float = 0.0,
+    engine: str = "lean",
+) -> dict:
+    """Replay completo: histórico, respostas do dia e a comparação com a leitura completa."""
+    from sheets_emulator import SheetsEmulator
+    from update_donors import GOOGLE_SHEET_NAME, WORKSHEET_NAME
+
+    history, events = split_day(values, day)
+    # Cópia: as respostas do dia são acrescentadas à worksheet do emulador
+    rows = list(history)
+    spreadsheets = {SPREADSHEET_KEY: (GOOGLE_SHEET_NAME, {WORKSHEET_NAME: rows})}
+    with SheetsEmulator(spreadsheets, latency=latency) as server, emulator(server):
+        with pipeline_workdir():
+            # Primeira execução: leitura completa do histórico e o checkpoint
+            initial = run_pipeline(True, engine)
+            start = time.perf_counter()
+            runs, latencies = replay_events(server, events, speed, engine)
+            wall_s = time.perf_counter() - start
+            incremental = read_output()
+        with pipeline_workdir():
+            full = run_pipeline(False, engine)
+            matches_full = read_output() == incremental
+
+    column = values[0].index(TIMESTAMP_COLUMN)
+    return {
+        "engine": engine,
+        "day": events[0][1][column][:10] if events else day,
+        "history_rows": len(history) - 1,
+        "events": len(events),
+        "runs": len(runs),
+        "speed": speed,
+        "latency_s": latency,
+        "initial_run_s": round(initial["wall_s"], 4),
+        "full_run_s": round(full["wall_s"], 4),
+        "replay_s": round(wall_s, 4),
+        "throughput_per_s": round(len(events) / wall_s, 2) if events else None,
+        "event_latency_s": latency_summary(latencies),
+        "api_calls_per_run": (
+            round(sum(run["api_calls"] for run in runs) / len(runs), 2)
+            if runs
+            else None
+        ),
+        "stages": stage_totals(runs),
+        "matches_full": matches_full,
+    }
+
+
+def print_result(result: dict):
+    print(
+        f"\nDia {result['day']} ({result['engine']}): {result['history_rows']:,} "
+        f"linhas de histórico, {result['events']:,} respostas em "
+        f"{result['runs']:,} execuções"
+    )
+    print(f"  primeira execução  {result['initial_run_s']:10.4f}s")
+    print(f"  leitura completa   {result['full_run_s']:10.4f}s")
+    print(f"  replay             {result['replay_s']:10.4f}s")
+    if result["events"]:
+        latency = result["event_latency_s"]
+        print(f"  vazão              {result['throughput_per_s']:10.2f} respostas/s")
+        print(
+            f"  latência           p50 {latency['p50']:.4f}s  "
+            f"p95 {latency['p95']:.4f}s  máx {latency['max']:.4f}s"
+        )
+        print(f"  chamadas à API     {result['api_calls_per_run']:10.2f} por execução")
+        for name, seconds in result["stages"].items():
+            print(f"    {name:<16} {seconds:10.4f}s")
+    status = "igual" if result["matches_full"] else "DIFERENTE"
+    print(f"  incremental x completo: {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--log", metavar="ARQUIVO", help="Exportação CSV ou JSON.")
+    parser.add_argument("--rows", default="20k", help="Linhas sintéticas, sem --log.")
+    parser.add_argument("--seed", type=int, default=110)
+    parser.add_argument("--day", help="Dia replayado (padrão: o da última resposta).")
+    parser.add_argument("--speed", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--engine", choices=("pandas", "lean"), default="lean")
+    parser.add_argument("--output", metavar="ARQUIVO", help="Salva o resultado.")
+    args = parser.parse_args()
+
+    if args.log:
+        values = load_log(args.log)
+    else:
+        values = synthetic_log(parse_size(args.rows), args.seed)
+    result = replay(values, args.day, args.speed, args.latency, args.engine)
+    print_result(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResultado salvo em '{args.output}'.")
+    if not result["matches_full"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
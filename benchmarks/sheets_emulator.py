@@ -0,0 +1,199 @@
+"""
+Emulador local das APIs do Google usadas pelo gspread (Sheets v4 e Drive v3),
+servido por HTTP em 127.0.0.1 a partir de planilhas em memória. O pipeline
+fala com ele quando SHEETS_EMULATOR_URL aponta para `url`, sem credenciais;
+é a base do benchmarks/replay_day.py e dos testes de ponta a ponta.
+
+Uso:
+    with SheetsEmulator({"chave": ("Título", {"Aba": linhas})}) as server:
+        os.environ["SHEETS_EMULATOR_URL"] = server.url
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from sheets_client import RedirectSession
+
+RANGE = re.compile(r"^([A-Z]+)(\d+):([A-Z]+)(\d*)$")
+ROW_RANGE = re.compile(r"^A(\d+):\d+$")
+
+
+def column_index(letters: str) -> int:
+    """'A' -> 0, 'Z' -> 25, 'AA' -> 26."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def column_cells(values: list[list[str]], range_name: str) -> list[str]:
+    """
+    Células de uma coluna ('C2:C' ou 'C2:C40'), como o values.batchGet com
+    majorDimension=COLUMNS: as vazias no fim da coluna são omitidas.
+    """
+    letters, first, _letters, last = RANGE.match(range_name).groups()
+    column = column_index(letters)
+    rows = values[int(first) - 1 : int(last) if last else None]
+    cells = [row[column] if column < len(row) else "" for row in rows]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+
+def row_cells(values: list[list[str]], row: int) -> list[str]:
+    """Linha `row` (a partir de 1), ou vazia além do fim da aba."""
+    if len(values) < row:
+        return []
+    return list(values[row - 1])
+
+
+def split_range(absolute: str) -> tuple[str, str]:
+    """ "'Aba 1'!A2:A" -> ("Aba 1", "A2:A")."""
+    name, range_name = absolute.rsplit("!", 1)
+    return name.strip("'").replace("''", "'"), range_name
+
+
+class SheetsEmulator:
+    """
+    Servidor HTTP local com os endpoints do Sheets v4 e do Drive v3 usados
+    pelo gspread (busca por título, metadados, values.get e values.batchGet).
+    As falhas enfileiradas com `fail` são respondidas antes das respostas
+    reais, para simular limite de cota, erros do servidor e conexões caídas.
+    `latency` (segundos, ou uma função que os retorna) atrasa cada resposta,
+    como a rede, e `append_rows` acrescenta respostas do formulário com o
+    servidor rodando.
+    """
+
+    def __init__(self, spreadsheets: dict, latency=0.0):
+        # {chave: (título, {título da aba: linhas})}
+        self.spreadsheets = spreadsheets
+        self.latency = latency if callable(latency) else lambda: latency
+        self.failures = []
+        self.requests = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, args=(0.01,), daemon=True
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def fail(self, status, times=1, retry_after=None, reason=None):
+        """Enfileira `times` respostas com erro; o status "drop" fecha a conexão."""
+        self.failures += [(status, retry_after, reason)] * times
+
+    def append_rows(self, key: str, worksheet: str, rows: list[list[str]]):
+        """Acrescenta linhas a uma aba, como novas respostas do formulário."""
+        with self.lock:
+            self.spreadsheets[key][1][worksheet].extend(rows)
+
+    def session(self) -> RedirectSession:
+        """Sessão do requests que envia os hosts das APIs do Google para cá."""
+        return RedirectSession(self.url)
+
+    def paths(self) -> list[str]:
+        return [path for _method, path in self.requests]
+
+    def _handler(server):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                with server.lock:
+                    server.requests.append(("GET", unquote(url.path)))
+                    failure = server.failures.pop(0) if server.failures else None
+                delay = server.latency()
+                if delay:
+                    time.sleep(delay)
+                if failure is not None:
+                    self.send_failure(*failure)
+                    return
+                with server.lock:
+                    status, body = server.route(unquote(url.path), parse_qs(url.query))
+                self.send_json(status, body)
+
+            def send_failure(self, status, retry_after, reason):
+                if status == "drop":
+                    self.close_connection = True
+                    return
+                error = {"code": status, "message": "injected failure"}
+                if reason:
+                    error["errors"] = [{"domain": "usageLimits", "reason": reason}]
+                headers = {"Retry-After": str(retry_after)} if retry_after else {}
+                self.send_json(status, {"error": error}, headers)
+
+            def send_json(self, status, body, headers=None):
+                content = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+    def route(self, path: str, query: dict) -> tuple[int, dict]:
+        """Resposta (status, corpo JSON) de uma requisição GET."""
+        if path == "/drive/v3/files":
+            title = re.search(r'name = "(.*)"', query["q"][0]).group(1)
+            files = [
+                {"id": key, "name": name}
+                for key, (name, _sheets) in self.spreadsheets.items()
+                if name == title
+            ]
+            return 200, {"files": files}
+
+        match = re.match(r"^/v4/spreadsheets/([^/:]+)(.*)$", path)
+        if not match or match.group(1) not in self.spreadsheets:
+            return 404, {
+                "error": {"code": 404, "message": "Requested entity not found"}
+            }
+        key, rest = match.groups()
+        title, sheets = self.spreadsheets[key]
+
+        if not rest:
+            return 200, {
+                "spreadsheetId": key,
+                "properties": {"title": title},
+                "sheets": [
+                    {"properties": {"title": name, "sheetId": index, "index": index}}
+                    for index, name in enumerate(sheets)
+                ],
+            }
+        if rest == "/values:batchGet":
+            ranges = []
+            for absolute in query["ranges"]:
+                name, range_name = split_range(absolute)
+                cells = column_cells(sheets[name], range_name)
+                ranges.append({"range": absolute, "majorDimension": "COLUMNS"})
+                if cells:
+                    ranges[-1]["values"] = [cells]
+            return 200, {"spreadsheetId": key, "valueRanges": ranges}
+        if rest.startswith("/values/"):
+            name, range_name = split_range(rest[len("/values/") :])
+            row = int(ROW_RANGE.match(range_name).group(1))
+            values = row_cells(sheets[name], row)
+            body = {"range": rest, "majorDimension": "ROWS"}
+            if values:
+                body["values"] = [values]
+            return 200, body
+        return 404, {"error": {"code": 404, "message": f"Unknown path {path}"}}
@@ -0,0 +1,119 @@
+"""
+Gerador de respostas sintéticas do formulário, no formato das colunas cruas
+baixadas da planilha (`{coluna: [strings]}`), para benchmarks e testes de carga.
+
+- Nomes brasileiros com variações de acento, caixa e espaços do mesmo doador
+  ("José  da Silva", "jose da silva", "JOSÉ DA SILVA").
+- Valores como digitados no formulário: "50", "1.000", "1.234,56", "25,50".
+- Datas no formato do Google Forms (dd/mm/aaaa hh:mm:ss), em ordem crescente.
+
+A geração é vetorizada (numpy) sobre pools pequenos de strings, então 10M de
+linhas saem em poucos segundos.
+"""
+
+import unicodedata
+
+import numpy as np
+
+FIRST_NAMES = [
+    "José", "João", "Maria", "Conceição", "Ângela", "Luís", "Inês", "Ana",
+    "Antônio", "Francisco", "Márcia", "Sérgio", "Lúcia", "Fábio", "Cláudia",
+    "Mônica", "Letícia", "Otávio", "Vinícius", "Débora", "Flávia", "Júlio",
+    "Patrícia", "Raí", "Tânia", "Célia", "Rogério", "Simone", "Thiago", "Bruna",
+]  # fmt: skip
+LAST_NAMES = [
+    "Silva", "Araújo", "Gonçalves", "Lima", "Brandão", "Simões", "Sá", "Souza",
+    "Nóbrega", "Conceição", "Oliveira", "Pereira", "Guimarães", "Assunção",
+    "Magalhães", "Lemos", "Falcão", "Cavalcanti", "Medeiros", "Galvão", "Leão",
+]  # fmt: skip
+PARTICLES = ["", "", "", "da ", "de ", "dos "]
+
+# Início da campanha (epoch, segundos) e duração coberta pelas respostas
+CAMPAIGN_START = np.datetime64("2025-09-01T08:00:00")
+CAMPAIGN_DAYS = 120
+
+
+def strip_accents(text: str) -> str:
+    normalized = unicodedata.normalize("NFD", text)
+    return "".join(char for char in normalized if unicodedata.category(char) != "Mn")
+
+
+def make_donor_pool(unique: int, rng: np.random.Generator) -> list[list[str]]:
+    """Doadores distintos, cada um com as variações de escrita usadas por ele."""
+    pool = []
+    seen = set()
+    while len(pool) < unique:
+        first = FIRST_NAMES[rng.integers(len(FIRST_NAMES))]
+        middle = LAST_NAMES[rng.integers(len(LAST_NAMES))]
+        last = LAST_NAMES[rng.integers(len(LAST_NAMES))]
+        particle = PARTICLES[rng.integers(len(PARTICLES))]
+        name = f"{first} {particle}{middle} {last}"
+        if name in seen:
+            # Homônimos: desambigua com um sufixo, como um segundo sobrenome
+            name = f"{name} {LAST_NAMES[len(seen) % len(LAST_NAMES)]} {len(pool)}"
+        seen.add(name)
+        pool.append(
+            [
+                name,
+                strip_accents(name).lower(),
+                name.upper(),
+                name.replace(" ", "  ", 1),
+                f" {name} ",
+            ]
+        )
+    return pool
+
+
+def make_amounts(count: int, rng: np.random.Generator) -> np.ndarray:
+    """Pool de valores digitados, misturando inteiros, milhar e centavos."""
+    cents = rng.choice([1_000, 2_500, 5_000, 10_000, 50_000, 123_456], size=count)
+    cents = cents + rng.integers(0, 100, size=count) * (rng.random(count) < 0.3)
+    amounts = []
+    for value in cents.tolist():
+        reais, centavos = divmod(value, 100)
+        integer = f"{reais:,}".replace(",", ".")
+        amounts.append(integer if centavos == 0 else f"{integer},{centavos:02d}")
+    return np.array(amounts, dtype=object)
+
+
+def make_timestamps(rows: int, rng: np.random.Generator) -> np.ndarray:
+    """Datas crescentes no formato dd/mm/aaaa hh:mm:ss."""
+    seconds = np.sort(rng.integers(0, CAMPAIGN_DAYS * 86_400, size=rows))
+    days, second_of_day = np.divmod(seconds, 86_400)
+
+    # Formata cada dia e cada segundo do dia uma única vez e só concatena
+    dates = CAMPAIGN_START.astype("datetime64[D]") + np.arange(CAMPAIGN_DAYS)
+    day_strings = np.array(
+        [f"{d[8:10]}/{d[5:7]}/{d[0:4]}" for d in dates.astype(str)], dtype=object
+    )
+    clock = np.array(
+        [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86_400)],
+        dtype=object,
+    )
+    return day_strings[days] + " " + clock[second_of_day]
+
+
+def make_responses(
+    rows: int, unique: int | None = None, seed: int = 110
+) -> dict[str, list]:
+    """
+    Gera `rows` respostas de `unique` doadores distintos (padrão: 1 a cada 5
+    linhas, no máximo 200 mil), como colunas cruas da planilha.
+    """
+    rng = np.random.default_rng(seed)
+    unique = unique or max(1, min(rows // 5, 200_000))
+
+    pool = make_donor_pool(unique, rng)
+    variants = np.array([name for variants in pool for name in variants], dtype=object)
+    # A maioria escreve o nome do mesmo jeito; ~20% usa uma variação
+    donor = rng.integers(0, unique, size=rows)
+    variant = np.where(rng.random(rows) < 0.8, 0, rng.integers(1, 5, size=rows))
+    names = variants[donor * 5 + variant]
+
+    amounts = make_amounts(10_000, rng)[rng.integers(0, 10_000, size=rows)]
+
+    return {
+        "Carimbo de data/hora": make_timestamps(rows, rng).tolist(),
+        "Nome": names.tolist(),
+        "Valor": amounts.tolist(),
+    }
@@ -1,5 +1,60 @@
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src", "services"))
+
+
+async def serve(host: str, port: int, reconcile_interval: float, csv_path: str | None):
+    """
+    Modo serviço: mantém os agregados em memória, recebe respostas novas por
+    webhook e regenera `public/donors.json` sem reler a planilha a cada evento.
+    """
+    from donor_service import DonorService, WebhookServer
+    from update_donors import open_source, write_json
+
+    service = DonorService(open_source(csv_path), write=write_json)
+    server = WebhookServer(
+        service,
+        token=os.getenv("WEBHOOK_TOKEN"),
+        reconcile_interval=reconcile_interval,
+    )
+    port = await server.start(host, port)
+    print(f"Servindo webhooks em http://{host}:{port}/webhook")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
 def main():
-    print("Hello from livro-de-ouro-medicina-ufpb-110!")
+    parser = argparse.ArgumentParser(
+        description="Livro de Ouro da Turma de Medicina UFPB 110."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser(
+        "serve", help="Serviço de longa duração que recebe respostas por webhook."
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument(
+        "--reconcile",
+        type=float,
+        default=600.0,
+        metavar="SEGUNDOS",
+        help="Intervalo entre reconciliações completas com a planilha (0 desativa).",
+    )
+    serve_parser.add_argument(
+        "--csv",
+        metavar="ARQUIVO",
+        help="Usa uma exportação local (CSV ou JSON) no lugar do Google Sheets.",
+    )
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port, args.reconcile, args.csv))
 
 
 if __name__ == "__main__":
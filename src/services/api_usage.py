@@ -0,0 +1,69 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from instrumentation import get_metrics
+
+
+class ApiUsage:
+    """Chamadas à API do Sheets/Drive em uma execução."""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.throttled_s = 0.0
+        self.backoff_s = 0.0
+        self.statuses: dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    def record_call(self, throttled_s: float):
+        with self.lock:
+            self.calls += 1
+            self.throttled_s += throttled_s
+
+    def record_retry(self, status: int | None, delay: float):
+        with self.lock:
+            self.retries += 1
+            self.backoff_s += delay
+            key = status or 0
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+
+_active = ApiUsage()
+
+
+def get_api_usage() -> ApiUsage:
+    """Contador de chamadas ativo; sem `track_api_usage`, acumula no do módulo."""
+    return _active
+
+
+@contextmanager
+def track_api_usage() -> Iterator[ApiUsage]:
+    """
+    Conta as chamadas à API durante o bloco e, no fim, registra a etapa
+    `sheets_api` nas métricas (chamadas, novas tentativas, esperas), se houve
+    alguma chamada.
+    """
+    global _active
+    previous = _active
+    _active = ApiUsage()
+    try:
+        yield _active
+    finally:
+        usage, _active = _active, previous
+        if usage.calls:
+            report_api_usage(usage)
+
+
+def report_api_usage(usage: ApiUsage):
+    """Imprime o total de chamadas e o registra na etapa `sheets_api`."""
+    print(
+        f"Chamadas à API do Google: {usage.calls} ({usage.retries} novas tentativas)."
+    )
+    with get_metrics().stage("sheets_api", rows_in=usage.calls) as stage:
+        stage.count("api_calls", usage.calls)
+        stage.count("api_retries", usage.retries)
+        stage.count("api_throttled_ms", round(usage.throttled_s * 1000))
+        stage.count("api_backoff_ms", round(usage.backoff_s * 1000))
+        for status, count in sorted(usage.statuses.items()):
+            stage.count(f"api_retry_{status or 'connection'}", count)
@@ -0,0 +1,257 @@
+import heapq
+import json
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+from donor_payload import (
+    DEFAULT_ENGINE,
+    REQUIRED_COLUMNS,
+    clean_donation_rows,
+    column_rows,
+    empty_payload,
+    format_donor_lists,
+)
+from fuzzy_dedup import get_alias_table, merged_names
+from instrumentation import get_metrics
+from output_writer import write_if_changed
+from ranking import DonorRanking
+
+# Arquivo com as campanhas (formulários) processadas em uma única execução
+CAMPAIGNS_PATH = "campaigns.json"
+# Saídas padrão: uma por campanha e o ranking combinado entre todas
+CAMPAIGN_OUTPUT_DIR = "public/campaigns"
+COMBINED_OUTPUT = "public/donors.combined.json"
+# Downloads simultâneos; todos compartilham o mesmo cliente gspread autorizado
+FETCH_WORKERS = 4
+
+
+class Campaign(NamedTuple):
+    """Uma campanha: planilha e aba no Google Sheets, ou uma exportação local."""
+
+    id: str
+    output: str
+    spreadsheet: str | None = None
+    worksheet: str | None = None
+    csv: str | None = None
+
+
+class CampaignConfig(NamedTuple):
+    campaigns: list[Campaign]
+    combined_output: str
+
+
+def load_campaigns(path: str = CAMPAIGNS_PATH) -> CampaignConfig:
+    """
+    Lê o arquivo de campanhas:
+
+        {"combined_output": "public/donors.combined.json",
+         "campaigns": [{"id": "livro-de-ouro", "spreadsheet": "...",
+                        "worksheet": "...", "output": "public/donors.json"},
+                       {"id": "formatura", "csv": "formatura.csv"}]}
+
+    Sem `output`, a campanha é gravada em `public/campaigns/<id>.json`.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    campaigns = []
+    for entry in data.get("campaigns", []):
+        campaign_id = entry.get("id")
+        if not campaign_id:
+            raise ValueError(f"Campanha sem 'id' em '{path}'.")
+        if not entry.get("csv") and not (
+            entry.get("spreadsheet") and entry.get("worksheet")
+        ):
+            raise ValueError(
+                f"Campanha '{campaign_id}': informe 'spreadsheet' e 'worksheet' ou 'csv'."
+            )
+        campaigns.append(
+            Campaign(
+                id=campaign_id,
+                output=entry.get("output")
+                or f"{CAMPAIGN_OUTPUT_DIR}/{campaign_id}.json",
+                spreadsheet=entry.get("spreadsheet"),
+                worksheet=entry.get("worksheet"),
+                csv=entry.get("csv"),
+            )
+        )
+
+    if not campaigns:
+        raise ValueError(f"Nenhuma campanha em '{path}'.")
+    ids = [campaign.id for campaign in campaigns]
+    duplicated = sorted({i for i in ids if ids.count(i) > 1})
+    if duplicated:
+        raise ValueError(f"Campanhas repetidas em '{path}': {duplicated}")
+    return CampaignConfig(campaigns, data.get("combined_output", COMBINED_OUTPUT))
+
+
+def _warm_worker(engine: str):
+    # Carrega o motor de limpeza no worker enquanto os downloads correm
+    clean_donation_rows({name: [] for name in REQUIRED_COLUMNS}, engine)
+
+
+def process_context():
+    """
+    Contexto multiprocessing sem fork: os workers partem de um processo
+    limpo (forkserver, ou spawn onde não existe), e não de uma cópia do
+    processo principal no meio dos downloads, com locks de threads (balde de
+    fichas, requests) possivelmente presos e a tabela de apelidos ativa.
+    """
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def fetch_and_clean(
+    campaigns: list[Campaign],
+    open_source: Callable[[Campaign], object],
+    engine: str = DEFAULT_ENGINE,
+    fetch_workers: int = FETCH_WORKERS,
+    process_workers: int | None = None,
+) -> dict[str, list | Exception]:
+    """
+    Baixa as campanhas em um pool de threads limitado (a espera é de rede) e
+    limpa cada uma em um pool de processos assim que o download termina, então
+    o tempo total fica perto do da campanha mais lenta. Retorna, por campanha,
+    as doações limpas em ordem cronológica ou a exceção que a interrompeu.
+    """
+    # O pool de processos (multiprocessing) só é carregado quando há campanhas
+    from concurrent.futures import ProcessPoolExecutor
+
+    results: dict[str, list | Exception] = {}
+    workers = process_workers or max(1, min(len(campaigns), os.cpu_count() or 1))
+    processes = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+    # Os workers são criados (e aquecidos) antes de existir qualquer thread
+    for _ in range(workers):
+        processes.submit(_warm_worker, engine)
+    threads = ThreadPoolExecutor(max_workers=max(1, min(fetch_workers, len(campaigns))))
+    with processes, threads:
+        downloads = {
+            threads.submit(lambda c=campaign: open_source(c).fetch_columns()): campaign
+            for campaign in campaigns
+        }
+        cleaning = {}
+        for future in as_completed(downloads):
+            campaign = downloads[future]
+            try:
+                columns = future.result()
+            except Exception as e:  # noqa: BLE001
+                results[campaign.id] = e
+                continue
+            print(f"[{campaign.id}] {column_rows(columns)} linhas na planilha.")
+            cleaning[processes.submit(clean_donation_rows, columns, engine)] = campaign
+
+        for future in as_completed(cleaning):
+            campaign = cleaning[future]
+            try:
+                results[campaign.id] = future.result()
+            except Exception as e:  # noqa: BLE001
+                results[campaign.id] = e
+    return results
+
+
+def merge_aliases(donations: dict[str, list]) -> dict[str, list]:
+    """
+    Aplica a tabela de apelidos ativa (se houver) às doações de todas as
+    campanhas no processo principal: os workers não gravam a tabela, e os
+    mesmos nomes precisam do mesmo nome canônico em todas as campanhas.
+    """
+    aliases = get_alias_table()
+    if aliases is None:
+        return donations
+
+    with get_metrics().stage(
+        "dedup", rows_in=sum(map(len, donations.values()))
+    ) as stage:
+        names = dict.fromkeys(row[0] for rows in donations.values() for row in rows)
+        canonical = aliases.resolve(list(names))
+        stage.count("merged_names", merged_names(canonical))
+        return {
+            campaign_id: [(canonical[row[0]], *row[1:]) for row in rows]
+            for campaign_id, rows in donations.items()
+        }
+
+
+def rank_donations(donations: Iterable[tuple[str, str, int, str]]) -> dict:
+    """JSON final de doações limpas em ordem cronológica (regras do `DonorRanking`)."""
+    with get_metrics().stage("ranking") as stage:
+        ranking = DonorRanking()
+        ranking.extend(donations)
+        stage.rows_out = len(ranking)
+    if not ranking:
+        return empty_payload()
+    return format_donor_lists(
+        ranking.ranked_names(),
+        ranking.top(),
+        ranking.latest(),
+        ranking.ranked_totals(),
+    )
+
+
+def run_campaigns(
+    config: CampaignConfig,
+    open_source: Callable[[Campaign], object],
+    engine: str = DEFAULT_ENGINE,
+    fetch_workers: int = FETCH_WORKERS,
+    process_workers: int | None = None,
+    write: Callable[[dict, str], bool] | None = None,
+) -> bool:
+    """
+    Processa todas as campanhas e grava o JSON de cada uma e o ranking
+    combinado (doadores somados entre as campanhas, pelo nome normalizado).
+    Uma campanha com erro não impede as demais de serem gravadas; nesse caso o
+    ranking combinado, que ficaria incompleto, não é regravado e o erro é
+    levantado no fim. `write(payload, path)` grava o JSON de cada campanha
+    (padrão: `write_output`). Retorna True se algum arquivo mudou.
+    """
+    write = write or write_output
+    with get_metrics().stage("campaigns", rows_in=len(config.campaigns)) as stage:
+        results = fetch_and_clean(
+            config.campaigns, open_source, engine, fetch_workers, process_workers
+        )
+        donations = {
+            campaign_id: rows
+            for campaign_id, rows in results.items()
+            if not isinstance(rows, Exception)
+        }
+        for campaign_id, rows in donations.items():
+            stage.count(f"donations_{campaign_id}", len(rows))
+        stage.rows_out = len(donations)
+    donations = merge_aliases(donations)
+
+    changed = False
+    failed = []
+    for campaign in config.campaigns:
+        if campaign.id not in donations:
+            print(f"[{campaign.id}] Ocorreu um erro: {results[campaign.id]}")
+            failed.append(campaign.id)
+            continue
+        rows = donations[campaign.id]
+        print(f"[{campaign.id}] {len(rows)} doações válidas.")
+        os.makedirs(os.path.dirname(campaign.output) or ".", exist_ok=True)
+        changed |= write(rank_donations(rows), campaign.output)
+
+    if failed:
+        raise RuntimeError(f"Falha ao processar as campanhas: {', '.join(failed)}")
+
+    # Cada lista já está em ordem cronológica; em empates vale a ordem do arquivo
+    everything = heapq.merge(
+        *(donations[campaign.id] for campaign in config.campaigns),
+        key=lambda row: row[3],
+    )
+    combined = rank_donations(everything)
+    print(f"Ranking combinado: {len(combined['wordCloud'])} doadores únicos.")
+    return write_output(combined, config.combined_output) or changed
+
+
+def write_output(payload: dict, path: str) -> bool:
+    with get_metrics().stage("write"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        changed = write_if_changed(payload, path)
+    print(f"Arquivo '{path}' {'gerado' if changed else 'sem alterações'}.")
+    return changed
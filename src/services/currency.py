@@ -0,0 +1,200 @@
+import math
+import re
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Motivos de rejeição de um 'Valor' (o índice é o código usado no array)
+REJECTION_REASONS = ("", "missing", "empty", "invalid_format", "too_large")
+OK, MISSING, EMPTY, INVALID_FORMAT, TOO_LARGE = range(len(REJECTION_REASONS))
+
+# Dígitos da parte inteira que cabem em centavos int64 (9.2e18)
+MAX_INTEGER_DIGITS = 16
+
+# Linhas por bloco na versão vetorizada: limita as matrizes de code points
+# (uma linha por valor) a alguns MB, seja qual for o tamanho da planilha
+CHUNK_ROWS = 16_384
+
+# Removidos antes da análise: prefixo da moeda e espaços (inclusive NBSPs)
+IGNORED = ("R$", " ", "\t", "\u00a0", "\u202f")
+
+# Formatos aceitos (após remover os ignorados):
+# - "50", "1234"                 inteiros
+# - "1.234", "1.234.567"         ponto como separador de milhar
+# - "1.234,56", "1234,5"         vírgula decimal (1 ou 2 casas)
+# - "1234.56", "12.5"            ponto decimal (1 ou 2 casas, sem milhar)
+# - "1,234.56"                   formato americano, com milhar e decimais
+AMOUNT_PATTERN = re.compile(
+    r"(?P<int>\d{1,3}(?:\.\d{3})+|\d+)(?:,(?P<dec>\d{1,2}))?"
+    r"|(?P<int_us>\d{1,3}(?:,\d{3})+)\.(?P<dec_us>\d{1,2})"
+    r"|(?P<int_dot>\d+)\.(?P<dec_dot>\d{1,2})"
+)
+
+
+def _reject(reason: int) -> tuple[None, int]:
+    return None, reason
+
+
+def parse_amount(value) -> tuple[int | None, int]:
+    """
+    Converte um 'Valor' digitado no formulário para centavos.
+    Retorna (centavos, OK) ou (None, código do motivo da rejeição).
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return _reject(MISSING)
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = str(value)
+    elif isinstance(value, float):
+        # Números já convertidos (ex.: fixtures JSON): até centavos
+        value = repr(value)
+
+    text = str(value)
+    for token in IGNORED:
+        text = text.replace(token, "")
+    if not text:
+        return _reject(EMPTY)
+
+    match = AMOUNT_PATTERN.fullmatch(text)
+    if match is None or not text.isascii():
+        return _reject(INVALID_FORMAT)
+
+    integer = match["int"] or match["int_us"] or match["int_dot"]
+    decimals = match["dec"] or match["dec_us"] or match["dec_dot"] or ""
+    digits = integer.replace(".", "").replace(",", "")
+    if len(digits) > MAX_INTEGER_DIGITS:
+        return _reject(TOO_LARGE)
+    return int(digits) * 100 + int(decimals.ljust(2, "0")), OK
+
+
+class ParsedAmounts(NamedTuple):
+    """Resultado vetorizado: centavos (0 onde rejeitado) e código do motivo."""
+
+    cents: "np.ndarray"
+    reasons: "np.ndarray"
+
+    @property
+    def rejected(self) -> "np.ndarray":
+        return self.reasons != OK
+
+    def rejection_counts(self) -> dict[str, int]:
+        """Quantidade de valores rejeitados por motivo."""
+        import numpy as np
+
+        counts = np.bincount(self.reasons, minlength=len(REJECTION_REASONS))
+        return {
+            REJECTION_REASONS[code]: int(count)
+            for code, count in enumerate(counts)
+            if code != OK and count
+        }
+
+
+def parse_amounts(values) -> ParsedAmounts:
+    """
+    Versão vetorizada de `parse_amount` para uma coluna inteira, com operações
+    numpy sobre a matriz de code points (sem laço Python por linha), em blocos
+    de `CHUNK_ROWS` linhas. Aceita lista, array ou Series; o resultado é posicional.
+    """
+    import numpy as np
+
+    column = np.asarray(values, dtype=object)
+    n = len(column)
+    cents = np.zeros(n, dtype=np.int64)
+    reasons = np.zeros(n, dtype=np.int8)
+    for start in range(0, n, CHUNK_ROWS):
+        chunk = slice(start, start + CHUNK_ROWS)
+        cents[chunk], reasons[chunk] = _parse_chunk(column[chunk])
+    return ParsedAmounts(cents, reasons)
+
+
+def _parse_chunk(column: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    import numpy as np
+
+    n = len(column)
+    # Ausentes: None e NaN (NaN é o único valor diferente de si mesmo)
+    missing = np.equal(column, None) | (column != column)  # noqa: PLR0124
+
+    # Normaliza tudo para texto e remove moeda e espaços com ufuncs de string
+    text = column.astype(str)
+    # np.strings.replace erra quando o padrão é mais largo que o array ("R" vira "")
+    if text.dtype.itemsize // 4 < 2:
+        text = text.astype("<U2")
+    for token in IGNORED:
+        text = np.strings.replace(text, token, "")
+    length = np.strings.str_len(text)
+    width = max(text.dtype.itemsize // 4, 1)
+    codes = np.ascontiguousarray(text, dtype=f"<U{width}").view(np.uint32)
+    codes = codes.reshape(n, width)
+
+    position = np.arange(width)
+    is_digit = (codes >= 48) & (codes <= 57)
+    is_dot = codes == 46
+    is_comma = codes == 44
+    in_text = position < length[:, None]
+    valid_chars = ~np.any(in_text & ~(is_digit | is_dot | is_comma), axis=1)
+
+    dots = is_dot.sum(axis=1)
+    commas = is_comma.sum(axis=1)
+    last_dot = np.where(is_dot, position, -1).max(axis=1)
+    last_comma = np.where(is_comma, position, -1).max(axis=1)
+    last_sep = np.maximum(last_dot, last_comma)
+    tail = length - 1 - last_sep
+
+    # Separador decimal: o último separador, se for único do seu tipo e
+    # seguido por 1 ou 2 dígitos; vírgula decimal pede milhar com ponto e
+    # ponto decimal pede milhar com vírgula (formato americano)
+    short_tail = (last_sep >= 0) & (tail >= 1) & (tail <= 2)
+    comma_decimal = short_tail & (last_comma > last_dot) & (commas == 1)
+    dot_decimal = short_tail & (last_dot > last_comma) & (dots == 1)
+    decimal_at = np.where(comma_decimal | dot_decimal, last_sep, -1)
+    integer_end = np.where(decimal_at >= 0, decimal_at, length)
+
+    # Separadores de milhar: só o caractere oposto ao decimal (ponto por
+    # padrão), a cada 3 dígitos contados do fim da parte inteira, com um
+    # primeiro grupo de 1 a 3 dígitos. Sem decimal o milhar é sempre o ponto:
+    # "1.234" vale mil e duzentos e "1,234" (ambíguo) é rejeitado
+    thousands = np.where(dot_decimal, 44, 46)[:, None]
+    in_integer = position < integer_end[:, None]
+    separator = (is_dot | is_comma) & in_integer
+    on_grid = (integer_end[:, None] - 1 - position) % 4 == 3
+    bad_separator = np.any(separator & ((codes != thousands) | ~on_grid), axis=1)
+    first_separator = np.where(separator, position, width).min(axis=1)
+    has_separator = first_separator < width
+    separators = separator.sum(axis=1)
+    integer_digits = is_digit & in_integer
+    digit_count = integer_digits.sum(axis=1)
+    bad_grouping = has_separator & (
+        (first_separator < 1)
+        | (first_separator > 3)
+        | (separators != (digit_count - 1) // 3)
+    )
+    # Separador solto depois do decimal (ex.: "1,5.") também é inválido
+    stray = (dots + commas) - separators - (decimal_at >= 0)
+
+    valid = (
+        valid_chars & ~bad_separator & ~bad_grouping & (stray == 0) & (digit_count >= 1)
+    )
+
+    # Valor da parte inteira: cada dígito vezes 10^(dígitos à sua direita)
+    rank = np.cumsum(integer_digits[:, ::-1], axis=1)[:, ::-1] - 1
+    rank = np.where(integer_digits, np.minimum(rank, MAX_INTEGER_DIGITS), 0)
+    digit_values = np.where(integer_digits, codes.astype(np.int64) - 48, 0)
+    powers = 10 ** np.arange(MAX_INTEGER_DIGITS + 1, dtype=np.int64)
+    integer = (digit_values * powers[rank]).sum(axis=1)
+
+    # Centavos: até 2 dígitos depois do separador decimal
+    rows = np.arange(n)
+    first_decimal = np.minimum(decimal_at + 1, width - 1)
+    second_decimal = np.minimum(decimal_at + 2, width - 1)
+    tens = codes[rows, first_decimal].astype(np.int64) - 48
+    units = np.where(tail == 2, codes[rows, second_decimal].astype(np.int64) - 48, 0)
+    fraction = np.where(decimal_at >= 0, tens * 10 + units, 0)
+
+    reasons = np.full(n, OK, dtype=np.int8)
+    reasons[~valid] = INVALID_FORMAT
+    reasons[valid & (digit_count > MAX_INTEGER_DIGITS)] = TOO_LARGE
+    reasons[length == 0] = EMPTY
+    reasons[missing] = MISSING
+
+    cents = np.where(reasons == OK, integer * 100 + fraction, 0)
+    return cents, reasons
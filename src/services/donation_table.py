@@ -0,0 +1,133 @@
+from typing import TYPE_CHECKING, NamedTuple
+
+from donor_payload import (
+    LATEST_N_DONORS,
+    TOP_N_DONORS,
+    empty_payload,
+    format_donor_lists,
+)
+from instrumentation import get_metrics
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Uma doação por registro (24 bytes): códigos do nome normalizado e do nome de
+# exibição no dicionário de nomes, valor em centavos e data (precisão de
+# microssegundos, a mesma do datetime do Python)
+DONATION_DTYPE = [
+    ("normalized", "<i4"),
+    ("name", "<i4"),
+    ("cents", "<i8"),
+    ("timestamp", "<M8[us]"),
+]
+
+# Orçamento de memória do motor pandas: pico de alocações por doação durante
+# o pipeline, sem contar as colunas da planilha já baixadas. Verificado com
+# 1M de linhas em tests/test_donation_table.py
+BYTES_PER_DONATION = 160
+
+
+class DonationTable(NamedTuple):
+    """
+    Doações limpas em formato colunar compacto: `records` (DONATION_DTYPE)
+    guarda só códigos, centavos e datas; cada nome distinto aparece uma vez
+    no dicionário `names` (array de objetos str).
+    """
+
+    records: "np.ndarray"
+    names: "np.ndarray"
+
+    @property
+    def size(self) -> int:
+        return len(self.records)
+
+    def chronological(self) -> "DonationTable":
+        """As doações em ordem cronológica (estável: em empates vale a ordem atual)."""
+        import numpy as np
+
+        order = np.argsort(self.records["timestamp"], kind="stable")
+        if np.all(order[1:] > order[:-1]):
+            return self
+        return DonationTable(self.records[order], self.names)
+
+    def rows(self) -> list[tuple[str, str, int, str]]:
+        """Doações em ordem cronológica, no formato aceito pelo DonorStore."""
+        records = self.chronological().records
+        return list(
+            zip(
+                self.names[records["normalized"]].tolist(),
+                self.names[records["name"]].tolist(),
+                records["cents"].tolist(),
+                [moment.isoformat() for moment in records["timestamp"].tolist()],
+                strict=True,
+            )
+        )
+
+
+class DonorTotals(NamedTuple):
+    """Um registro por doador: nome normalizado, nome de exibição, total e última data."""
+
+    normalized: "np.ndarray"
+    names: "np.ndarray"
+    totals: "np.ndarray"
+    last_donation: "np.ndarray"
+    # Posição de cada nome normalizado na ordem alfabética (desempate das listas)
+    order: "np.ndarray"
+
+
+def aggregate(table: DonationTable) -> DonorTotals:
+    """
+    Soma as doações de cada doador (em centavos, sem float) e guarda o nome e a
+    data da doação mais recente, com operações numpy sobre os códigos de nome.
+    """
+    import numpy as np
+
+    records = table.chronological().records
+    codes = records["normalized"]
+    donors, inverse = np.unique(codes, return_inverse=True)
+    totals = np.zeros(len(donors), dtype=np.int64)
+    np.add.at(totals, inverse, records["cents"])
+    # Última doação de cada doador: primeira ocorrência na ordem invertida
+    _codes, reversed_index = np.unique(codes[::-1], return_index=True)
+    last = len(records) - 1 - reversed_index
+
+    normalized = table.names[donors]
+    order = np.empty(len(donors), dtype=np.int64)
+    order[np.argsort(normalized, kind="stable")] = np.arange(len(donors))
+    return DonorTotals(
+        normalized=normalized,
+        names=table.names[records["name"][last]],
+        totals=totals,
+        last_donation=records["timestamp"][last],
+        order=order,
+    )
+
+
+def build_donor_lists(table: DonationTable) -> dict:
+    """
+    Gera o JSON final com as regras de `DonorRanking`: ranking por total
+    (desempate pelo nome normalizado), últimos doadores da doação mais recente
+    para a mais antiga (desempate pelo nome normalizado, decrescente) e o nome
+    de exibição da doação mais recente de cada doador.
+    """
+    import numpy as np
+
+    if not table.size:
+        return empty_payload()
+
+    metrics = get_metrics()
+    with metrics.stage("groupby", rows_in=table.size) as stage:
+        donors = aggregate(table)
+        stage.rows_out = len(donors.totals)
+
+    with metrics.stage("ranking", rows_in=len(donors.totals)) as stage:
+        ranked = np.lexsort((donors.order, -donors.totals))
+        latest = np.lexsort((donors.order, donors.last_donation))[::-1]
+        ranked_names = donors.names[ranked].tolist()
+        amounts = donors.totals[ranked].tolist()
+        latest_names = donors.names[latest[:LATEST_N_DONORS]].tolist()
+        stage.rows_out = len(ranked_names)
+
+    return format_donor_lists(
+        ranked_names, ranked_names[:TOP_N_DONORS], latest_names, amounts
+    )
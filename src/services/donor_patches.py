@@ -0,0 +1,179 @@
+import json
+import os
+import time
+from collections.abc import Callable
+from difflib import SequenceMatcher
+
+from output_writer import (
+    atomic_write,
+    content_hash,
+    manifest_path,
+    serialize_payload,
+    write_manifest,
+)
+
+# Patches mantidos ao lado do JSON; um cliente mais atrasado baixa o arquivo inteiro
+MAX_PATCHES = 50
+# Listas do JSON final comparadas item a item
+PATCHED_LISTS = ("wordCloud", "topDonors", "latestDonations")
+
+
+def patch_path(path: str, version: int) -> str:
+    """Patch que leva à versão `version`: 'donors.json' -> 'donors.v7.patch.json'."""
+    root, _ext = os.path.splitext(path)
+    return f"{root}.v{version}.patch.json"
+
+
+def diff_list(old: list, new: list) -> list[list]:
+    """
+    Operações `[início, remover, [itens]]` que transformam `old` em `new`,
+    aplicadas em ordem como `Array.prototype.splice`. Vêm do fim para o
+    começo da lista, então os índices de cada operação valem na lista atual.
+    """
+    keys_old = [json.dumps(item, sort_keys=True) for item in old]
+    keys_new = [json.dumps(item, sort_keys=True) for item in new]
+    matcher = SequenceMatcher(None, keys_old, keys_new, autojunk=False)
+    return [
+        [i1, i2 - i1, new[j1:j2]]
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes())
+        if tag != "equal"
+    ]
+
+
+def apply_ops(items: list, ops: list[list]) -> list:
+    """Aplica as operações de `diff_list` (referência para o cliente)."""
+    items = list(items)
+    for start, remove, insert in ops:
+        items[start : start + remove] = insert
+    return items
+
+
+def make_patch(old: dict, new: dict, version: int, base_sha256: str) -> dict:
+    """
+    Patch da versão `version - 1` (hash `base_sha256`) para `new`. As listas
+    vão como operações; as demais chaves que mudaram vão inteiras em `set`
+    (e as que sumiram em `unset`). Se a ordem das chaves de `new` não é a
+    que `apply_patch` obteria acrescentando as novas no fim, `keys` traz a
+    ordem certa (o `sha256` depende dela).
+    """
+    patch = {
+        "version": version,
+        "baseVersion": version - 1,
+        "baseSha256": base_sha256,
+        "sha256": content_hash(serialize_payload(new)),
+        "ops": {
+            key: ops
+            for key in PATCHED_LISTS
+            if (ops := diff_list(old.get(key, []), new.get(key, [])))
+        },
+    }
+    replaced = {
+        key: value
+        for key, value in new.items()
+        if key not in PATCHED_LISTS and (key not in old or old[key] != value)
+    }
+    removed = [key for key in old if key not in new]
+    if replaced:
+        patch["set"] = replaced
+    if removed:
+        patch["unset"] = removed
+    kept = [key for key in old if key in new]
+    if list(new) != kept + [key for key in new if key not in old]:
+        patch["keys"] = list(new)
+    return patch
+
+
+def apply_patch(payload: dict, patch: dict) -> dict:
+    """Aplica um patch ao JSON da versão anterior (sem validar os hashes)."""
+    ops = patch["ops"]
+    replaced = patch.get("set", {})
+    removed = set(patch.get("unset", ()))
+    result = {
+        key: apply_ops(items, ops[key]) if key in ops else replaced.get(key, items)
+        for key, items in payload.items()
+        if key not in removed
+    }
+    # Chaves novas entram no fim, salvo quando o patch traz a ordem
+    for key, value in replaced.items():
+        result.setdefault(key, value)
+    if "keys" in patch:
+        result = {key: result[key] for key in patch["keys"]}
+    return result
+
+
+def read_manifest(path: str) -> dict:
+    """Manifesto atual de `path`; vazio se ausente ou inválido."""
+    try:
+        with open(manifest_path(path), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def read_content(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_with_patches(
+    data: dict,
+    path: str,
+    clock: Callable[[], float] = time.time,
+    keep: int = MAX_PATCHES,
+) -> bool:
+    """
+    Como `write_if_changed`, mas versiona o JSON: cada mudança incrementa a
+    `version` do manifesto e grava `donors.v{N}.patch.json` com o que mudou
+    em relação à versão anterior. O manifesto lista os patches disponíveis
+    (os `keep` mais recentes, em sequência); um cliente na versão V aplica os
+    patches V+1..N, ou baixa o JSON inteiro se V for mais antiga que o primeiro.
+    Retorna True se o JSON foi regravado.
+    """
+    content = serialize_payload(data)
+    previous = read_content(path)
+    manifest = read_manifest(path)
+    version = manifest.get("version")
+    patches = manifest.get("patches", [])
+    # O manifesto só serve de base se descreve o arquivo que está no disco
+    valid = (
+        previous is not None
+        and isinstance(version, int)
+        and manifest.get("sha256") == content_hash(previous)
+    )
+
+    if previous == content and valid:
+        return False
+
+    if valid:
+        version += 1
+        patch = make_patch(json.loads(previous), data, version, manifest["sha256"])
+        patch_file = patch_path(path, version)
+        atomic_write(
+            patch_file,
+            json.dumps(patch, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            ),
+        )
+        patches = [*patches, os.path.basename(patch_file)]
+        stale, patches = patches[:-keep], patches[-keep:]
+    else:
+        # Sem base conhecida a sequência recomeça: os clientes baixam o JSON inteiro
+        version = version + 1 if isinstance(version, int) else 1
+        stale, patches = patches, []
+
+    changed = previous != content
+    if changed:
+        atomic_write(path, content)
+    write_manifest(path, content, clock, version=version, patches=patches)
+    # Só depois do manifesto novo: quem leu o antigo ainda acha os patches
+    directory = os.path.dirname(path) or "."
+    for name in stale:
+        try:
+            os.remove(os.path.join(directory, os.path.basename(name)))
+        except FileNotFoundError:
+            pass
+    return changed
@@ -0,0 +1,138 @@
+from instrumentation import get_metrics
+from weighting import get_weighting, others_summary, tier_weights
+
+# Número de doadores para as listas de "maiores" e "últimos"
+TOP_N_DONORS = 10
+LATEST_N_DONORS = 10
+
+# Colunas essenciais da planilha
+REQUIRED_COLUMNS = [
+    "Carimbo de data/hora",
+    "Nome",
+    "Valor",
+]
+
+# Motores de processamento disponíveis: "pandas" (arrays numpy compactos) e "lean"
+# (dicts + heapq, sem importar pandas; bem mais rápido para planilhas pequenas)
+ENGINES = ("pandas", "lean")
+DEFAULT_ENGINE = "pandas"
+
+
+def empty_payload() -> dict:
+    """JSON vazio com a estrutura esperada pelo frontend."""
+    return {"wordCloud": [], "topDonors": [], "latestDonations": []}
+
+
+def format_donor_lists(
+    ranked_names: list[str],
+    top_names: list[str],
+    latest_names: list[str],
+    amounts: list[int] | None = None,
+) -> dict:
+    """
+    Monta o JSON final a partir das listas de nomes já ordenadas. `amounts`
+    traz o total (centavos) de cada doador de `ranked_names`, na mesma ordem.
+    """
+    with get_metrics().stage("weighting", rows_in=len(ranked_names)) as stage:
+        payload = _format_donor_lists(ranked_names, top_names, latest_names, amounts)
+        stage.rows_out = len(payload["wordCloud"])
+    return payload
+
+
+def _format_donor_lists(
+    ranked_names: list[str],
+    top_names: list[str],
+    latest_names: list[str],
+    amounts: list[int] | None,
+) -> dict:
+    top_donors_list = [
+        {
+            "name": name,
+        }  # "amount": row["Valor"]}
+        for name in top_names
+    ]
+    latest_donors_list = [
+        {
+            "name": name,
+        }  # "amount": row["Valor"]}
+        for name in latest_names
+    ]
+
+    # --- PESOS DA NUVEM DE PALAVRAS (faixas configuráveis em `weighting`) ---
+    weighting = get_weighting()
+    weights = tier_weights(len(ranked_names), weighting, amounts)
+    shown = len(ranked_names)
+    if weighting.max_words is not None:
+        shown = min(shown, weighting.max_words)
+
+    # Prepara os dados para a nuvem de palavras no formato {text, value}
+    word_cloud_data = [
+        {"text": name, "value": weight}
+        for name, weight in zip(ranked_names[:shown], weights[:shown])
+    ]
+
+    payload = {
+        "wordCloud": word_cloud_data,
+        "topDonors": top_donors_list,
+        "latestDonations": latest_donors_list,
+    }
+    if shown < len(ranked_names):
+        payload["wordCloudOthers"] = others_summary(len(ranked_names) - shown)
+    return payload
+
+
+def column_rows(columns: dict[str, list]) -> int:
+    """Quantidade de linhas em um conjunto de colunas."""
+    return len(next(iter(columns.values()), []))
+
+
+def _load_engine(engine: str):
+    # Importação tardia: o motor "lean" não deve pagar o import do pandas
+    if engine == "pandas":
+        import pandas_engine
+
+        return pandas_engine
+    if engine == "lean":
+        import lean_engine
+
+        return lean_engine
+    raise ValueError(f"Motor desconhecido: '{engine}'. Opções: {ENGINES}")
+
+
+def as_columns(records: list[dict] | dict[str, list]) -> dict[str, list]:
+    """
+    Converte registros (como os do get_all_records) para o formato colunar
+    {coluna: valores} usado pelos motores. Colunas já em formato colunar
+    são devolvidas como estão; células ausentes viram None.
+    """
+    if isinstance(records, dict):
+        return records
+
+    present = set().union(*records) if records else set()
+    return {
+        col: [record.get(col) for record in records]
+        for col in REQUIRED_COLUMNS
+        if col in present
+    }
+
+
+def build_donor_payload(
+    records: list[dict] | dict[str, list], engine: str = DEFAULT_ENGINE
+) -> dict:
+    """
+    Processa as respostas do formulário e gera o JSON com `wordCloud`,
+    `topDonors` e `latestDonations`. Aceita registros (como os do
+    get_all_records) ou colunas {nome: valores}.
+    Função pura: não faz I/O nem acessa a rede.
+    """
+    return _load_engine(engine).build_payload(as_columns(records))
+
+
+def clean_donation_rows(
+    records: list[dict] | dict[str, list], engine: str = DEFAULT_ENGINE
+) -> list[tuple[str, str, int, str]]:
+    """
+    Limpa as respostas e retorna as doações válidas em ordem cronológica, como
+    (nome normalizado, nome de exibição, valor em centavos, data ISO 8601).
+    """
+    return _load_engine(engine).donation_rows(as_columns(records))
@@ -0,0 +1,240 @@
+import asyncio
+import hmac
+import json
+import time
+from collections.abc import Callable
+
+from donor_payload import (
+    REQUIRED_COLUMNS,
+    clean_donation_rows,
+    column_rows,
+    empty_payload,
+    format_donor_lists,
+)
+from ranking import DonorRanking
+
+# Intervalo padrão, em segundos, entre reconciliações completas com a planilha
+RECONCILE_INTERVAL = 600.0
+
+# Tamanho máximo aceito para o corpo de um webhook
+MAX_BODY_BYTES = 1_000_000
+
+HTTP_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class DonorService:
+    """
+    Mantém os agregados de doadores em memória (`DonorRanking`) e regenera o
+    JSON a cada resposta nova recebida por webhook, sem reler a planilha.
+
+    A reconciliação relê a planilha inteira e substitui o ranking; webhooks
+    que informam a linha da resposta (`row`) e já estão cobertos pela última
+    leitura são ignorados, então reenvios não somam a doação duas vezes.
+    """
+
+    def __init__(self, source, write: Callable[[dict], None], engine: str = "lean"):
+        self.source = source
+        self.write = write
+        self.engine = engine
+        self.ranking = DonorRanking()
+        # Última linha da planilha incluída no ranking (1 = só o cabeçalho)
+        self.last_row = 1
+        self._rows_applied: set[int] = set()
+
+    def payload(self) -> dict:
+        if not self.ranking:
+            return empty_payload()
+        return format_donor_lists(
+            ranked_names=self.ranking.ranked_names(),
+            top_names=self.ranking.top(),
+            latest_names=self.ranking.latest(),
+            amounts=self.ranking.ranked_totals(),
+        )
+
+    def reconcile(self) -> int:
+        """Relê a planilha, reconstrói o ranking e regrava o JSON."""
+        columns = self.source.fetch_columns()
+        ranking = DonorRanking()
+        if any(columns.values()):
+            ranking.extend(clean_donation_rows(columns, self.engine))
+
+        self.ranking = ranking
+        self.last_row = 1 + column_rows(columns)
+        self._rows_applied.clear()
+        self.write(self.payload())
+        return len(ranking)
+
+    def apply(self, records: list[dict]) -> int:
+        """
+        Soma respostas recebidas por webhook e regrava o JSON.
+        Retorna quantas doações válidas foram aplicadas.
+        """
+        fresh = []
+        for record in records:
+            row = record.get("row")
+            if row is not None:
+                row = int(row)
+                if row <= self.last_row or row in self._rows_applied:
+                    continue
+                self._rows_applied.add(row)
+            fresh.append(record)
+        if not fresh:
+            return 0
+
+        # Células chegam como texto, igual à leitura da planilha
+        columns = {
+            name: [record.get(name, "") for record in fresh]
+            for name in REQUIRED_COLUMNS
+        }
+        donations = clean_donation_rows(columns, self.engine)
+        if donations:
+            self.ranking.extend(donations)
+            self.write(self.payload())
+        return len(donations)
+
+
+def parse_webhook(body: bytes) -> list[dict]:
+    """
+    Aceita uma resposta ({"Nome": ..., "Valor": ..., ...}), uma lista delas
+    ou {"rows": [...]}. Levanta ValueError para qualquer outro formato.
+    """
+    data = json.loads(body.decode("utf-8"))
+    if isinstance(data, dict):
+        data = data.get("rows", [data])
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError("Webhook deve conter uma resposta ou uma lista de respostas.")
+    return data
+
+
+class WebhookServer:
+    """
+    Servidor HTTP mínimo (asyncio puro) para o `DonorService`:
+
+    - `POST /webhook`: aplica as respostas do corpo JSON.
+    - `POST /reconcile`: força uma reconciliação com a planilha.
+    - `GET /health`: quantidade de doadores e horário da última reconciliação.
+
+    Se `token` for definido, as requisições POST precisam do cabeçalho
+    `X-Webhook-Token` com o mesmo valor.
+    """
+
+    def __init__(
+        self,
+        service: DonorService,
+        token: str | None = None,
+        reconcile_interval: float | None = RECONCILE_INTERVAL,
+    ):
+        self.service = service
+        self.token = token
+        self.reconcile_interval = reconcile_interval
+        self.last_reconcile: float | None = None
+        # Serializa webhooks e reconciliações: ambos trocam o ranking
+        self._lock = asyncio.Lock()
+        self._server: asyncio.Server | None = None
+        self._reconciler: asyncio.Task | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> int:
+        """Reconcilia uma vez, começa a escutar e retorna a porta em uso."""
+        await self.reconcile()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        if self.reconcile_interval:
+            self._reconciler = asyncio.create_task(self._reconcile_periodically())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def stop(self):
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def reconcile(self) -> int:
+        async with self._lock:
+            # A leitura da planilha bloqueia: roda fora do event loop
+            donors = await asyncio.to_thread(self.service.reconcile)
+        self.last_reconcile = time.time()
+        print(f"Reconciliação concluída: {donors} doadores únicos.")
+        return donors
+
+    async def _reconcile_periodically(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:  # noqa: BLE001
+                # Qualquer falha (rede, credenciais, planilha) é transitória:
+                # mantém o estado atual; a próxima reconciliação tenta de novo
+                print(f"Falha na reconciliação: {e}")
+
+    async def _handle(self, reader, writer):
+        try:
+            status, body = await self._dispatch(reader)
+        except (ValueError, KeyError, UnicodeDecodeError) as e:
+            status, body = 400, {"error": str(e)}
+        except asyncio.IncompleteReadError:
+            status, body = 400, {"error": "Corpo menor que o Content-Length."}
+        except Exception as e:  # noqa: BLE001
+            # Falha ao ler a planilha ou gravar o JSON: o cliente recebe um
+            # 500 e a próxima gravação (webhook ou reconciliação) tenta de novo
+            print(f"Falha ao processar a requisição: {e}")
+            status, body = 500, {"error": str(e)}
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode("ascii")
+            + payload
+        )
+        await writer.drain()
+        writer.close()
+
+    async def _dispatch(self, reader) -> tuple[int, dict]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise ValueError("Requisição HTTP inválida.")
+        method, path = request_line[0], request_line[1]
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        if path == "/health" and method == "GET":
+            return 200, {
+                "donors": len(self.service.ranking),
+                "lastReconcile": self.last_reconcile,
+            }
+        if path not in ("/webhook", "/reconcile"):
+            return 404, {"error": "Rota desconhecida."}
+        if method != "POST":
+            return 405, {"error": "Use POST."}
+        if self.token and not hmac.compare_digest(
+            headers.get("x-webhook-token", ""), self.token
+        ):
+            return 401, {"error": "Token inválido."}
+
+        if path == "/reconcile":
+            return 200, {"donors": await self.reconcile()}
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": "Corpo muito grande."}
+        records = parse_webhook(await reader.readexactly(length))
+        async with self._lock:
+            # Regravar o JSON (layout, compressão, fsync) bloqueia: roda fora
+            # do event loop, que continua atendendo /health e outras conexões
+            applied = await asyncio.to_thread(self.service.apply, records)
+        return 202, {"applied": applied, "donors": len(self.service.ranking)}
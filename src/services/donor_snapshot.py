@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import warnings
+from importlib.util import find_spec
+from typing import TYPE_CHECKING
+
+from donation_table import DONATION_DTYPE, DonationTable, build_donor_lists
+from output_writer import atomic_write
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Diretório do snapshot colunar das doações já limpas
+SNAPSHOT_DIR = ".cache/snapshot"
+# Versão do layout dos arquivos; ao mudar, o snapshot é descartado e refeito
+SNAPSHOT_VERSION = 2
+# Módulos cujo código decide o resultado da limpeza: qualquer mudança neles
+# (normalização, parser de valores ou datas, motores, fusão de nomes) invalida o snapshot
+CLEANING_MODULES = (
+    "donor_payload",
+    "donation_table",
+    "normalization",
+    "currency",
+    "timestamps",
+    "lean_engine",
+    "pandas_engine",
+    "fuzzy_dedup",
+)
+# Acima deste número de segmentos, eles são compactados em um só
+MAX_SEGMENTS = 16
+
+
+def cleaning_fingerprint(engine: str, fuzzy: bool = False) -> str:
+    """
+    Identifica a limpeza que gerou o snapshot: versão do layout, motor, fusão
+    de nomes e o código-fonte dos módulos de limpeza (lido sem importá-los).
+    """
+    digest = hashlib.sha256(f"{SNAPSHOT_VERSION}|{engine}|{fuzzy}".encode())
+    for module in CLEANING_MODULES:
+        spec = find_spec(module)
+        if spec is None or spec.origin is None:
+            raise ImportError(f"Módulo de limpeza não encontrado: '{module}'")
+        with open(spec.origin, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class DonationSnapshot:
+    """
+    Doações limpas (nome normalizado, nome de exibição, centavos e data),
+    guardadas em segmentos `.npy` chaveados pela faixa de linhas da planilha
+    que os gerou. Os segmentos são abertos com mmap, sem cópia; os nomes ficam
+    em um dicionário só (`names.json`) e as doações guardam o código de cada um.
+
+    O manifesto (`snapshot.json`) guarda a impressão digital da limpeza, o
+    checkpoint da última linha lida, o arquivo de nomes e a lista de
+    segmentos. Nenhum arquivo existente é regravado: os novos ganham um nome
+    livre (`rows-2-40.1.npy`, `names.1.json`), o manifesto é trocado por
+    último e só então os arquivos antigos são removidos. Uma execução
+    interrompida deixa o snapshot anterior intacto.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_DIR, fingerprint: str = ""):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.checkpoint: dict | None = None
+        self.segments: list[dict] = []
+        self.names: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    @classmethod
+    def open(cls, path: str, fingerprint: str) -> "DonationSnapshot":
+        """
+        Abre o snapshot de `path`. Se ele não existir, for de outra versão ou de
+        outra limpeza (`fingerprint`), começa vazio.
+        """
+        snapshot = cls(path, fingerprint)
+        try:
+            with open(os.path.join(path, "snapshot.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if (
+                manifest["version"] != SNAPSHOT_VERSION
+                or manifest["fingerprint"] != fingerprint
+            ):
+                if manifest.get("checkpoint"):
+                    print("Snapshot de outra versão da limpeza; será refeito.")
+                return snapshot
+            names_file = manifest["names"]
+            with open(os.path.join(path, names_file), encoding="utf-8") as f:
+                names = json.load(f)
+            segments = manifest["segments"]
+            checkpoint = manifest["checkpoint"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return snapshot
+
+        snapshot.checkpoint = checkpoint
+        snapshot.segments = segments
+        snapshot.names = names
+        snapshot._codes = {name: code for code, name in enumerate(names)}
+        return snapshot
+
+    def __len__(self) -> int:
+        return sum(segment["donations"] for segment in self.segments)
+
+    def clear(self):
+        """Descarta as doações e o checkpoint (os arquivos saem no próximo `append`)."""
+        self.checkpoint = None
+        self.segments = []
+        self.names = []
+        self._codes = {}
+
+    def load(self) -> list["np.ndarray"]:
+        """Segmentos em ordem de linha da planilha, mapeados em memória (somente leitura)."""
+        import numpy as np
+
+        return [
+            np.load(os.path.join(self.path, segment["file"]), mmap_mode="r")
+            for segment in self.segments
+        ]
+
+    def table(self) -> DonationTable:
+        """Todas as doações em ordem cronológica (estável na ordem das linhas)."""
+        import numpy as np
+
+        segments = self.load()
+        if not segments:
+            records = np.zeros(0, dtype=DONATION_DTYPE)
+        elif len(segments) == 1:
+            # Um segmento só (o caso após a compactação) é usado sem cópia
+            records = segments[0]
+        else:
+            records = np.concatenate(segments)
+        return DonationTable(
+            records, np.array(self.names, dtype=object)
+        ).chronological()
+
+    def encode(self, donations: list[tuple[str, str, int, str]]) -> "np.ndarray":
+        """Converte doações limpas (como as de `clean_donation_rows`) em registros."""
+        import numpy as np
+
+        records = np.zeros(len(donations), dtype=DONATION_DTYPE)
+        if not donations:
+            return records
+        normalized, names, cents, timestamps = zip(*donations, strict=True)
+        records["normalized"] = [self._code(name) for name in normalized]
+        records["name"] = [self._code(name) for name in names]
+        records["cents"] = cents
+        with warnings.catch_warnings():
+            # Datas com fuso não têm representação em datetime64
+            warnings.simplefilter("error", UserWarning)
+            try:
+                records["timestamp"] = np.array(timestamps, dtype="datetime64[us]")
+            except (UserWarning, ValueError) as e:
+                raise ValueError(f"Data fora do formato do snapshot: {e}") from e
+        return records
+
+    def _code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def append(
+        self,
+        donations: list[tuple[str, str, int, str]],
+        first_row: int,
+        last_row: int,
+        checkpoint: dict,
+    ):
+        """
+        Grava as doações limpas das linhas `first_row` a `last_row` da planilha
+        como um novo segmento e avança o checkpoint.
+        """
+        import numpy as np
+
+        os.makedirs(self.path, exist_ok=True)
+        records = self.encode(donations)
+        if len(records):
+            file = self._write_array(f"rows-{first_row}-{last_row}", records)
+            self.segments.append(
+                {
+                    "file": file,
+                    "first_row": first_row,
+                    "last_row": last_row,
+                    "donations": len(records),
+                }
+            )
+        if len(self.segments) > MAX_SEGMENTS:
+            # Compacta: um segmento só, que também dispensa a reordenação na leitura
+            merged = np.array(self.table().records)
+            first, last = self.segments[0]["first_row"], self.segments[-1]["last_row"]
+            file = self._write_array(f"rows-{first}-{last}", merged)
+            self.segments = [
+                {
+                    "file": file,
+                    "first_row": first,
+                    "last_row": last,
+                    "donations": len(merged),
+                }
+            ]
+        self.checkpoint = checkpoint
+        self.save()
+
+    def _free_name(self, stem: str, ext: str) -> str:
+        """`stem.ext` ou, se já existir, `stem.1.ext`, `stem.2.ext`..."""
+        file, attempt = f"{stem}{ext}", 0
+        while os.path.exists(os.path.join(self.path, file)):
+            attempt += 1
+            file = f"{stem}.{attempt}{ext}"
+        return file
+
+    def _write_array(self, stem: str, records: "np.ndarray") -> str:
+        """Grava `records` em um arquivo novo e retorna o nome dele."""
+        import io
+
+        import numpy as np
+
+        buffer = io.BytesIO()
+        np.save(buffer, records, allow_pickle=False)
+        file = self._free_name(stem, ".npy")
+        atomic_write(os.path.join(self.path, file), buffer.getvalue())
+        return file
+
+    def save(self):
+        """
+        Grava o dicionário de nomes em um arquivo novo, troca o manifesto e
+        remove os segmentos e dicionários que ele não referencia mais.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        names = json.dumps(self.names, ensure_ascii=False)
+        names_file = self._free_name("names", ".json")
+        atomic_write(os.path.join(self.path, names_file), names.encode("utf-8"))
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "fingerprint": self.fingerprint,
+            "checkpoint": self.checkpoint,
+            "names": names_file,
+            "segments": self.segments,
+        }
+        content = json.dumps(manifest, ensure_ascii=False, indent=2)
+        atomic_write(os.path.join(self.path, "snapshot.json"), content.encode("utf-8"))
+
+        current = {segment["file"] for segment in self.segments} | {names_file}
+        for file in os.listdir(self.path):
+            stale = file.endswith(".npy") or (
+                file.startswith("names") and file.endswith(".json")
+            )
+            if stale and file not in current:
+                os.remove(os.path.join(self.path, file))
+
+
+def build_payload_from_snapshot(snapshot: DonationSnapshot) -> dict | None:
+    """
+    Gera o JSON final a partir do snapshot, com a agregação vetorizada de
+    `donation_table`. Retorna None se não houver doações.
+    """
+    if not len(snapshot):
+        return None
+    return build_donor_lists(snapshot.table())
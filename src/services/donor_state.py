@@ -0,0 +1,17 @@
+import hashlib
+import json
+
+
+def row_hash(row: list) -> str:
+    """Calcula o hash do conteúdo de uma linha crua da planilha."""
+    # Ignora células vazias no fim da linha (o preenchimento varia com o range lido)
+    cells = [str(cell) for cell in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    payload = json.dumps(cells, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_checkpoint(row: int, values: list) -> dict:
+    """Cria o checkpoint apontando para a última linha processada da planilha."""
+    return {"row": row, "hash": row_hash(values)}
@@ -0,0 +1,196 @@
+import json
+import os
+import sqlite3
+from collections.abc import Iterable
+
+from rollups import DayBucket, day_of
+
+# Versão do esquema; ao mudar, o banco é recriado e o próximo ciclo faz rebuild
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS donors (
+    normalized TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    total_cents INTEGER NOT NULL,
+    donations INTEGER NOT NULL,
+    last_donation TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_donors_total ON donors (total_cents DESC, normalized);
+CREATE INDEX IF NOT EXISTS idx_donors_last
+    ON donors (last_donation DESC, normalized DESC);
+
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    total_cents INTEGER NOT NULL,
+    donations INTEGER NOT NULL,
+    donors INTEGER NOT NULL
+);
+
+-- Quem doou em cada dia, para contar doadores distintos sem reler o dia
+CREATE TABLE IF NOT EXISTS daily_donors (
+    day TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    PRIMARY KEY (day, normalized)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT_DONOR = """
+INSERT INTO donors (normalized, name, total_cents, donations, last_donation)
+VALUES (?, ?, ?, 1, ?)
+ON CONFLICT (normalized) DO UPDATE SET
+    total_cents = total_cents + excluded.total_cents,
+    donations = donations + 1,
+    name = CASE
+        WHEN excluded.last_donation >= last_donation THEN excluded.name
+        ELSE name
+    END,
+    last_donation = MAX(last_donation, excluded.last_donation)
+"""
+
+UPSERT_DAY = """
+INSERT INTO daily (day, total_cents, donations, donors)
+VALUES (?, ?, 1, ?)
+ON CONFLICT (day) DO UPDATE SET
+    total_cents = total_cents + excluded.total_cents,
+    donations = donations + 1,
+    donors = donors + excluded.donors
+"""
+
+
+class DonorStore:
+    """
+    Agregados de doadores persistidos em SQLite, chaveados pelo nome normalizado.
+    Mantém soma, quantidade, nome de exibição e data da doação mais recente,
+    os agregados por dia (série temporal) e o checkpoint da planilha usado
+    pelo modo incremental.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        directory = os.path.dirname(path)
+        if path != ":memory:" and directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # Esquema antigo ou banco novo: recria tudo do zero
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS donors;DROP TABLE IF EXISTS daily;"
+                "DROP TABLE IF EXISTS daily_donors;DROP TABLE IF EXISTS meta;"
+            )
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def clear(self):
+        """Remove todos os agregados e o checkpoint (usado antes de um rebuild)."""
+        self.conn.execute("DELETE FROM donors")
+        self.conn.execute("DELETE FROM daily")
+        self.conn.execute("DELETE FROM daily_donors")
+        self.conn.execute("DELETE FROM meta")
+
+    def upsert_donations(self, donations: Iterable[tuple[str, str, int, str]]):
+        """
+        Soma doações aos agregados.
+        Cada doação é (nome normalizado, nome de exibição, valor em centavos,
+        data ISO 8601)
+        e deve chegar em ordem cronológica para preservar o nome mais recente.
+        """
+        for normalized, name, cents, timestamp in donations:
+            self.conn.execute(UPSERT_DONOR, (normalized, name, cents, timestamp))
+
+    def upsert_daily(self, donations: Iterable[tuple[str, str, int, str]]):
+        """
+        Soma doações aos agregados do dia de cada uma: só os dias das doações
+        novas são tocados, e o doador conta uma vez por dia.
+        """
+        for normalized, _name, cents, timestamp in donations:
+            day = day_of(timestamp)
+            first_of_day = self.conn.execute(
+                "INSERT OR IGNORE INTO daily_donors (day, normalized) VALUES (?, ?)",
+                (day, normalized),
+            ).rowcount
+            self.conn.execute(UPSERT_DAY, (day, cents, first_of_day))
+
+    def daily(self) -> list[DayBucket]:
+        """Agregados por dia, em ordem cronológica."""
+        rows = self.conn.execute(
+            "SELECT day, total_cents, donations, donors FROM daily ORDER BY day"
+        )
+        return [DayBucket(*row) for row in rows]
+
+    def donor_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM donors").fetchone()[0]
+
+    def ranked_donors(self, limit: int = -1) -> list[str]:
+        """Nomes de exibição ordenados pelo total doado (maior primeiro)."""
+        rows = self.conn.execute(
+            "SELECT name FROM donors ORDER BY total_cents DESC, normalized LIMIT ?",
+            (limit,),
+        )
+        return [name for (name,) in rows]
+
+    def ranked_totals(self, limit: int = -1) -> list[int]:
+        """Totais (centavos) na ordem de `ranked_donors`."""
+        rows = self.conn.execute(
+            "SELECT total_cents FROM donors "
+            "ORDER BY total_cents DESC, normalized LIMIT ?",
+            (limit,),
+        )
+        return [total for (total,) in rows]
+
+    def top_donors(self, n: int) -> list[str]:
+        return self.ranked_donors(n)
+
+    def latest_donors(self, n: int) -> list[str]:
+        """Doadores únicos (por nome normalizado) das doações mais recentes."""
+        rows = self.conn.execute(
+            "SELECT name FROM donors "
+            "ORDER BY last_donation DESC, normalized DESC LIMIT ?",
+            (n,),
+        )
+        return [name for (name,) in rows]
+
+    def donors(self) -> list[tuple[str, str, int, int, str]]:
+        """
+        Todos os agregados como (normalizado, nome, total em centavos, doações,
+        última data).
+        """
+        return self.conn.execute(
+            "SELECT normalized, name, total_cents, donations, last_donation "
+            "FROM donors ORDER BY normalized"
+        ).fetchall()
+
+    def get_meta(self, key: str):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        found = row.fetchone()
+        return json.loads(found[0]) if found else None
+
+    def set_meta(self, key: str, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
@@ -0,0 +1,209 @@
+import fcntl
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from output_writer import atomic_write
+
+# Local padrão da fila de eventos e do lock do worker (ao lado do banco)
+SPOOL_PATH = ".cache/events.jsonl"
+
+# Janela padrão, em segundos, para agrupar eventos em uma única execução
+COALESCE_WINDOW = 30.0
+
+
+class EventSpool:
+    """
+    Fila de eventos em arquivo (JSON Lines), segura entre processos.
+
+    Cada `append` grava uma linha com O_APPEND sob um lock de arquivo
+    (`<fila>.spool.lock`); `batch` renomeia a fila para `<fila>.draining` sob
+    o mesmo lock, então um evento vai inteiro para o lote ou para a fila nova.
+    O lote só é apagado quando o bloco termina sem erro; se o pipeline
+    falhar, os eventos voltam para a fila, à frente dos que chegaram depois.
+    """
+
+    def __init__(self, path: str = SPOOL_PATH, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.draining = path + ".draining"
+        self.clock = clock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        fd = os.open(self.path + ".spool.lock", os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def append(self, event: dict | None = None) -> dict:
+        """Enfileira um evento, carimbado com o horário de recebimento."""
+        record = {"received_at": self.clock(), **(event or {})}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._locked():
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        return record
+
+    def peek(self) -> list[dict]:
+        """Eventos pendentes (incluindo um lote não concluído), sem removê-los."""
+        return self._read(self.draining) + self._read(self.path)
+
+    def oldest(self) -> float | None:
+        """Horário de recebimento do evento pendente mais antigo."""
+        events = self.peek()
+        return min(event["received_at"] for event in events) if events else None
+
+    @contextmanager
+    def batch(self) -> Iterator[list[dict]]:
+        """
+        Retira da fila todos os eventos pendentes para processá-los no bloco;
+        se o bloco levantar uma exceção, eles voltam para a fila.
+        """
+        with self._locked():
+            if os.path.exists(self.draining):
+                # Lote de um worker que morreu no meio: junta a fila a ele
+                self._move(self.path, self.draining)
+            elif os.path.exists(self.path):
+                os.replace(self.path, self.draining)
+        events = self._read(self.draining)
+        try:
+            yield events
+        except BaseException:
+            with self._locked():
+                if os.path.exists(self.draining):
+                    self._move(self.path, self.draining)
+                    os.replace(self.draining, self.path)
+            raise
+        with self._locked():
+            if os.path.exists(self.draining):
+                os.remove(self.draining)
+
+    def drain(self) -> list[dict]:
+        """Remove e retorna todos os eventos pendentes."""
+        with self.batch() as events:
+            return events
+
+    @staticmethod
+    def _move(source: str, target: str):
+        """Acrescenta o conteúdo de `source` ao fim de `target` e apaga `source`."""
+        try:
+            with open(source, "rb") as f:
+                extra = f.read()
+        except FileNotFoundError:
+            return
+        with open(target, "rb") as f:
+            content = f.read()
+        if content and not content.endswith(b"\n"):
+            # Termina a linha incompleta para não corromper a primeira nova
+            content += b"\n"
+        atomic_write(target, content + extra)
+        os.remove(source)
+
+    @staticmethod
+    def _read(path: str) -> list[dict]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        # Uma linha incompleta (escrita interrompida) é descartada
+        events = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return events
+
+
+class WorkerLock:
+    """Lock exclusivo e não bloqueante garantindo um único worker por fila."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def acquire(self) -> bool:
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class CoalescingRunner:
+    """
+    Worker que esvazia a fila agrupando eventos: espera `window` segundos a
+    partir do evento mais antigo, drena tudo o que chegou e roda o pipeline
+    uma única vez por lote.
+    """
+
+    def __init__(
+        self,
+        spool: EventSpool,
+        run: Callable[[list[dict]], None],
+        window: float = COALESCE_WINDOW,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.spool = spool
+        self.run = run
+        self.window = window
+        self.sleep = sleep
+        self.lock = WorkerLock(spool.path + ".lock")
+
+    def run_batch(self) -> int:
+        """Processa um lote; retorna quantos eventos foram agrupados (0 se vazio)."""
+        oldest = self.spool.oldest()
+        if oldest is None:
+            return 0
+
+        remaining = oldest + self.window - self.spool.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+
+        # Se o pipeline falhar, o lote volta para a fila e a exceção sobe
+        with self.spool.batch() as events:
+            if events:
+                self.run(events)
+                print(f"{len(events)} evento(s) agrupado(s) em uma única execução.")
+        return len(events)
+
+    def drain_all(self) -> list[int] | None:
+        """
+        Roda lotes até a fila ficar vazia, se nenhum outro worker estiver ativo.
+        Retorna o tamanho de cada lote processado (lista vazia se a fila já
+        estava vazia), ou None se outro worker já detém o lock: os eventos
+        ficam na fila e serão processados por ele.
+        """
+        batches = None
+        while self.lock.acquire():
+            batches = batches if batches is not None else []
+            try:
+                while count := self.run_batch():
+                    batches.append(count)
+            finally:
+                self.lock.release()
+            # Um evento pode ter chegado entre a última checagem e a liberação
+            # do lock; quem o enfileirou já desistiu, então o worker continua
+            if not self.spool.peek():
+                break
+        return batches
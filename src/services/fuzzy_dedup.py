@@ -0,0 +1,342 @@
+import json
+import os
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+from output_writer import atomic_write
+
+# Tabela de apelidos (nome normalizado -> nome canônico) mantida entre execuções
+ALIAS_TABLE_PATH = ".cache/donor_aliases.json"
+# Similaridade mínima (cosseno dos vetores TF-IDF) para um vizinho virar candidato;
+# quem decide a união é `same_person`
+CANDIDATE_SIMILARITY = 0.3
+# Vizinhos mais próximos consultados por nome novo, dentro de cada bloco
+NEIGHBORS = 16
+# Blocos até este tamanho calculam as similaridades numa matriz só; nos
+# maiores, o NearestNeighbors do scikit-learn calcula em partes
+DENSE_BLOCK = 256
+# N-gramas de caracteres (dentro das palavras) usados nos vetores TF-IDF
+NGRAM_RANGE = (2, 3)
+# Ignorados na comparação: "JOSE DA SILVA JR" e "JOSE SILVA" são o mesmo nome
+PARTICLES = frozenset({"DA", "DAS", "DE", "DO", "DOS", "E"})
+SUFFIXES = frozenset({"FILHO", "JR", "JUNIOR", "NETO", "SOBRINHO"})
+
+
+def core_name(normalized: str) -> str:
+    """Nome normalizado sem partículas e sem sufixos de parentesco no fim."""
+    tokens = [t for t in normalized.replace(".", " ").split() if t not in PARTICLES]
+    while len(tokens) > 1 and tokens[-1] in SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens) or normalized
+
+
+def block_keys(core: str) -> tuple[str, ...]:
+    """
+    Chaves de bloqueio: só nomes que compartilham uma chave são comparados.
+    Número de palavras (`same_person` exige o mesmo) com primeiro nome + início
+    ou fim do último sobrenome, ou inicial + último sobrenome, para que um erro
+    de digitação não tire o nome do bloco. Nomes de uma palavra só casam com
+    eles mesmos.
+    """
+    tokens = core.split()
+    if len(tokens) < 2:
+        return (core,)
+    first, last, size = tokens[0], tokens[-1], len(tokens)
+    return (
+        f"{size}|{first}|{last[:2]}",
+        f"{size}|{first}|..{last[-2:]}",
+        f"{size}|{first[0]}|{last}",
+    )
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Distância de edição com transposição de letras vizinhas ("SLIVA" -> 1)."""
+    previous2, previous = [], list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, previous2[j - 2] + 1)
+            current.append(cost)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def same_person(core_a: str, core_b: str) -> bool:
+    """
+    Regra conservadora para unir dois nomes candidatos: mesmas palavras, com
+    no máximo uma delas diferindo por uma letra (digitação, "SOUSA"/"SOUZA").
+    Sobrenome a mais ("ANA LIMA SOUZA") e flexão de gênero ("MARIA"/"MARIO")
+    não unem.
+    """
+    return core_a == core_b or _same_tokens(core_a.split(), core_b.split())
+
+
+def _same_tokens(tokens_a: list[str], tokens_b: list[str]) -> bool:
+    if len(tokens_a) != len(tokens_b):
+        return False
+    differences = [(a, b) for a, b in zip(tokens_a, tokens_b) if a != b]
+    if len(differences) != 1:
+        return False
+    a, b = differences[0]
+    if min(len(a), len(b)) < 4 or abs(len(a) - len(b)) > 1:
+        return False
+    if a[:-1] == b[:-1] and {a[-1], b[-1]} == {"A", "O"}:
+        return False
+    return edit_distance(a, b) == 1
+
+
+def similar_pairs(
+    cores: list[str], queried: list[bool]
+) -> dict[tuple[int, int], float]:
+    """
+    Pares de núcleos (índices em `cores`) que `same_person` une, com a
+    similaridade TF-IDF de cada par. Só os núcleos marcados em `queried`
+    buscam vizinhos, e só dentro dos seus blocos.
+    """
+    # Importação tardia: sem --fuzzy-merge o scikit-learn não é carregado
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.neighbors import NearestNeighbors
+
+    vectors = TfidfVectorizer(
+        analyzer="char_wb", ngram_range=NGRAM_RANGE, dtype=np.float32
+    ).fit_transform(cores)
+
+    blocks: dict[str, list[int]] = {}
+    for index, core in enumerate(cores):
+        for key in block_keys(core):
+            blocks.setdefault(key, []).append(index)
+
+    is_queried = np.asarray(queried, dtype=bool)
+    found: list[tuple] = []
+    for block in blocks.values():
+        members = np.asarray(block)
+        queries = members[is_queried[members]]
+        if not len(queries) or len(members) < 2:
+            continue
+        if len(members) <= DENSE_BLOCK:
+            # Os vetores TF-IDF têm norma 1: o produto já é o cosseno
+            similarities = (vectors[queries] @ vectors[members].T).toarray()
+            neighbors = np.broadcast_to(np.arange(len(members)), similarities.shape)
+            if len(members) > NEIGHBORS + 1:
+                neighbors = np.argpartition(-similarities, NEIGHBORS, axis=1)
+                neighbors = neighbors[:, : NEIGHBORS + 1]
+                similarities = np.take_along_axis(similarities, neighbors, axis=1)
+        else:
+            model = NearestNeighbors(n_neighbors=NEIGHBORS + 1, metric="cosine")
+            distances, neighbors = model.fit(vectors[members]).kneighbors(
+                vectors[queries]
+            )
+            similarities = 1.0 - distances
+        others = members[neighbors]
+        queries = np.broadcast_to(queries[:, None], others.shape)
+        keep = (similarities >= CANDIDATE_SIMILARITY) & (others != queries)
+        found.append(
+            (
+                np.minimum(queries, others)[keep],
+                np.maximum(queries, others)[keep],
+                similarities[keep],
+            )
+        )
+    if not found:
+        return {}
+
+    # Um par pode aparecer em mais de um bloco: fica a maior similaridade
+    first, second, similarity = (np.concatenate(parts) for parts in zip(*found))
+    similarity = np.round(similarity.astype(np.float64), 6)
+    order = np.lexsort((-similarity, second, first))
+    first, second, similarity = first[order], second[order], similarity[order]
+    unique = np.ones(len(first), dtype=bool)
+    unique[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1])
+    tokens = [core.split() for core in cores]
+    return {
+        (a, b): value
+        for a, b, value in zip(
+            first[unique].tolist(), second[unique].tolist(), similarity[unique].tolist()
+        )
+        if _same_tokens(tokens[a], tokens[b])
+    }
+
+
+class _Components:
+    """Union-find dos nomes, com o nome canônico já conhecido de cada grupo."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.anchor: dict[int, str] = {}
+
+    def find(self, index: int) -> int:
+        while self.parent[index] != index:
+            self.parent[index] = self.parent[self.parent[index]]
+            index = self.parent[index]
+        return index
+
+    def union(self, a: int, b: int) -> bool:
+        """Une os grupos, a menos que isso junte dois doadores já conhecidos."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        anchor_a, anchor_b = self.anchor.get(root_a), self.anchor.get(root_b)
+        if anchor_a and anchor_b and anchor_a != anchor_b:
+            return False
+        self.parent[root_b] = root_a
+        if anchor_b:
+            self.anchor[root_a] = anchor_b
+        return True
+
+
+class AliasTable:
+    """
+    Apelidos confirmados de doadores. Cada nome normalizado visto é pontuado
+    uma única vez: as execuções seguintes só comparam os nomes novos, e um
+    nome novo pode entrar em um grupo existente, mas nunca unir dois grupos
+    já conhecidos (o canônico de um doador não muda).
+
+    O arquivo pode ser editado à mão: `aliases` fixa uniões e `distinct`
+    lista pares que nunca devem ser unidos (ex.: pai e filho).
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        aliases: dict[str, str] | None = None,
+        known: Iterable[str] = (),
+        distinct: Iterable[Iterable[str]] = (),
+    ):
+        self.path = path
+        self.aliases = dict(aliases or {})
+        self.known = set(known) | set(self.aliases) | set(self.aliases.values())
+        self.distinct = {frozenset(pair) for pair in distinct}
+        self.separate = set().union(*self.distinct)
+        self.changed = False
+
+    @classmethod
+    def load(cls, path: str) -> "AliasTable":
+        """Lê a tabela; um arquivo ausente ou inválido vira uma tabela vazia."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                path,
+                aliases=data.get("aliases", {}),
+                known=data.get("known", []),
+                distinct=data.get("distinct", []),
+            )
+        except (OSError, ValueError, TypeError, AttributeError):
+            return cls(path)
+
+    def canonical(self, name: str) -> str:
+        return self.aliases.get(name, name)
+
+    def resolve(self, names: Iterable[str]) -> dict[str, str]:
+        """Nome canônico de cada nome normalizado, pontuando só os nomes novos."""
+        names = set(names)
+        new = sorted(names - self.known)
+        if new:
+            self._merge_new(new)
+        return {name: self.canonical(name) for name in names}
+
+    def _merge_new(self, new: list[str]):
+        pool = sorted(self.known) + new
+        first_new = len(self.known)
+
+        # Nomes com o mesmo núcleo são a mesma pessoa: só núcleos distintos
+        # passam pelo TF-IDF, e um núcleo só é consultado se tiver nome novo
+        core_ids: dict[str, int] = {}
+        representatives: list[int] = []
+        has_new: list[bool] = []
+        edges: dict[tuple[int, int], float] = {}
+        for index, name in enumerate(pool):
+            core_id = core_ids.setdefault(core_name(name), len(representatives))
+            if core_id == len(representatives):
+                representatives.append(index)
+                has_new.append(False)
+            elif index >= first_new:
+                edges[(representatives[core_id], index)] = 1.0
+            has_new[core_id] |= index >= first_new
+
+        for (a, b), similarity in similar_pairs(list(core_ids), has_new).items():
+            edges[(representatives[a], representatives[b])] = similarity
+
+        components = _Components(len(pool))
+        by_canonical: dict[str, int] = {}
+        for index in range(first_new):
+            canonical = self.canonical(pool[index])
+            root = by_canonical.setdefault(canonical, index)
+            components.anchor[root] = canonical
+            components.union(root, index)
+
+        # Pares mais parecidos primeiro; empates na ordem dos nomes
+        positions = {name: i for i, name in enumerate(pool) if name in self.separate}
+        for (a, b), _similarity in sorted(edges.items(), key=lambda e: (-e[1], e[0])):
+            if not self._separated(components, a, b, positions):
+                components.union(a, b)
+
+        groups: dict[int, list[int]] = {}
+        for index in range(first_new, len(pool)):
+            groups.setdefault(components.find(index), []).append(index)
+        for root, members in groups.items():
+            canonical = components.anchor.get(root) or min(pool[i] for i in members)
+            for index in members:
+                if pool[index] != canonical:
+                    self.aliases[pool[index]] = canonical
+        self.known.update(new)
+        self.changed = True
+
+    def _separated(self, components: _Components, a: int, b: int, positions) -> bool:
+        """Se a união juntaria um par marcado como `distinct`."""
+        roots = {components.find(a), components.find(b)}
+        for pair in self.distinct:
+            indices = [positions.get(name) for name in pair]
+            if (
+                len(indices) == 2
+                and None not in indices
+                and {components.find(index) for index in indices} == roots
+            ):
+                return True
+        return False
+
+    def save(self):
+        if not (self.path and self.changed):
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "aliases": dict(sorted(self.aliases.items())),
+            "distinct": sorted(sorted(pair) for pair in self.distinct),
+            "known": sorted(self.known),
+        }
+        content = json.dumps(data, ensure_ascii=False, indent=2)
+        atomic_write(self.path, content.encode("utf-8"))
+        self.changed = False
+
+
+_active: AliasTable | None = None
+
+
+def get_alias_table() -> AliasTable | None:
+    """Tabela de apelidos ativa; None mantém a deduplicação aproximada desligada."""
+    return _active
+
+
+@contextmanager
+def use_alias_table(path: str = ALIAS_TABLE_PATH) -> Iterator[AliasTable]:
+    """Ativa a deduplicação com a tabela de `path` e grava as novas uniões."""
+    global _active
+    previous = _active
+    _active = AliasTable.load(path)
+    try:
+        yield _active
+    finally:
+        _active.save()
+        _active = previous
+
+
+def merged_names(canonical: dict[str, str]) -> int:
+    """Quantos nomes foram redirecionados para outro nome canônico."""
+    return sum(1 for name, target in canonical.items() if name != target)
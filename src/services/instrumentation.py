@@ -0,0 +1,198 @@
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class Stage:
+    """Medições de uma etapa do pipeline."""
+
+    __slots__ = (
+        "counts",
+        "cpu_s",
+        "dropped",
+        "name",
+        "peak_mb",
+        "rows_in",
+        "rows_out",
+        "wall_s",
+    )
+
+    def __init__(self, name: str, rows_in: int | None = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_mb: float | None = None
+        self.dropped: dict[str, int] = {}
+        self.counts: dict[str, int] = {}
+
+    def drop(self, rule: str, count: int):
+        """Registra linhas descartadas por uma regra de limpeza."""
+        if count:
+            self.dropped[rule] = self.dropped.get(rule, 0) + int(count)
+
+    def count(self, key: str, count: int):
+        """Registra um contador da etapa (ex.: linhas resolvidas por camada)."""
+        self.counts[key] = self.counts.get(key, 0) + int(count)
+
+    def to_dict(self) -> dict:
+        data = {
+            "stage": self.name,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+        }
+        if self.peak_mb is not None:
+            data["peak_mb"] = self.peak_mb
+        if self.counts:
+            data["counts"] = dict(self.counts)
+        if self.dropped:
+            data["dropped"] = dict(self.dropped)
+        return data
+
+
+class _NullStage:
+    """Etapa que não mede nada: o que as etapas usam com a instrumentação desligada."""
+
+    __slots__ = ()
+
+    name = None
+    rows_in = None
+    rows_out = None
+
+    def __setattr__(self, name, value):
+        pass
+
+    def drop(self, rule: str, count: int):
+        pass
+
+    def count(self, key: str, count: int):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return _NULL_STAGE
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class NullMetrics:
+    """Instrumentação desligada (padrão): cada etapa custa só uma chamada vazia."""
+
+    enabled = False
+
+    def stage(self, name: str, rows_in: int | None = None) -> _NullContext:
+        return _NULL_CONTEXT
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Metrics:
+    """
+    Coleta tempo de parede, tempo de CPU, linhas de entrada/saída e linhas
+    descartadas por regra de cada etapa e, com `trace_memory`, o pico de
+    memória alocada (tracemalloc) durante a etapa.
+
+    As etapas são planas: não abra uma etapa dentro de outra.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: list[Stage] = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None) -> Iterator[Stage]:
+        stage = Stage(name, rows_in)
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_s = time.perf_counter() - wall
+            stage.cpu_s = time.process_time() - cpu
+            if self.trace_memory:
+                stage.peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+            if tracing:
+                tracemalloc.stop()
+            self.stages.append(stage)
+
+    def to_dict(self) -> dict:
+        return {
+            "stages": [stage.to_dict() for stage in self.stages],
+            "wall_s": round(sum(stage.wall_s for stage in self.stages), 6),
+            "cpu_s": round(sum(stage.cpu_s for stage in self.stages), 6),
+            "dropped": self.dropped(),
+        }
+
+    def dropped(self) -> dict[str, int]:
+        """Linhas descartadas por regra, somadas entre as etapas."""
+        totals: dict[str, int] = {}
+        for stage in self.stages:
+            for rule, count in stage.dropped.items():
+                totals[rule] = totals.get(rule, 0) + count
+        return totals
+
+    def logfmt(self) -> list[str]:
+        """Uma linha logfmt por etapa (ex.: `stage=fetch wall_s=0.42 ...`)."""
+        lines = []
+        for stage in self.stages:
+            data = stage.to_dict()
+            dropped = data.pop("dropped", {})
+            counts = data.pop("counts", {})
+            fields = [
+                f"{key}={value}" for key, value in data.items() if value is not None
+            ]
+            fields += [f"{key}={count}" for key, count in counts.items()]
+            fields += [f"dropped_{rule}={count}" for rule, count in dropped.items()]
+            lines.append(" ".join(fields))
+        return lines
+
+    def write_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def print_logfmt(self, stream=None):
+        for line in self.logfmt():
+            print(line, file=stream or sys.stderr)
+
+
+_active: Metrics | NullMetrics = NULL_METRICS
+
+
+def get_metrics() -> Metrics | NullMetrics:
+    """Instrumentação ativa; `NULL_METRICS` se nada estiver coletando."""
+    return _active
+
+
+@contextmanager
+def collect(metrics: Metrics | None) -> Iterator[Metrics | NullMetrics]:
+    """Ativa `metrics` durante o bloco (None mantém a instrumentação desligada)."""
+    global _active
+    previous = _active
+    _active = metrics if metrics is not None else NULL_METRICS
+    try:
+        yield _active
+    finally:
+        _active = previous
@@ -0,0 +1,146 @@
+import math
+from datetime import datetime
+
+from currency import REJECTION_REASONS, parse_amount
+from donor_payload import (
+    REQUIRED_COLUMNS,
+    column_rows,
+    empty_payload,
+    format_donor_lists,
+)
+from fuzzy_dedup import get_alias_table, merged_names
+from instrumentation import get_metrics
+from normalization import normalize_name
+from ranking import DonorRanking
+from timestamps import NOT_INFERRED
+
+# Formatos aceitos para o 'Carimbo de data/hora', em ordem de preferência.
+# Como o pandas, o formato é deduzido do primeiro valor preenchido e aplicado à
+# coluna toda.
+TIMESTAMP_FORMATS = (
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d",
+)
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _parse_with(text: str, fmt: str) -> datetime | None:
+    try:
+        return datetime.strptime(text.strip(), fmt)
+    except ValueError:
+        return None
+
+
+def parse_timestamps(values: list) -> list[datetime | None]:
+    """Converte a coluna de datas usando o formato do primeiro valor reconhecido."""
+    texts = [str(value) for value in values]
+    # Como o pandas, deduz o formato do primeiro valor que não é vazio nem "NaT"
+    first = next((text for text in texts if text not in NOT_INFERRED), None)
+    for fmt in TIMESTAMP_FORMATS:
+        if first is not None and _parse_with(first, fmt) is not None:
+            return [_parse_with(text, fmt) for text in texts]
+
+    # Primeiro valor em formato desconhecido: tenta cada formato por valor
+    parsed = []
+    for text in texts:
+        candidates = (_parse_with(text, fmt) for fmt in TIMESTAMP_FORMATS)
+        parsed.append(next((ts for ts in candidates if ts is not None), None))
+    return parsed
+
+
+def clean_columns(columns: dict[str, list]) -> list[tuple[str, str, int, datetime]]:
+    """
+    Valida e limpa as colunas da planilha, sem pandas.
+    Retorna (nome normalizado, nome, valor em centavos, data) na ordem da planilha.
+    """
+    # Garante que as colunas essenciais existem
+    if not all(col in columns for col in REQUIRED_COLUMNS):
+        if not any(columns.values()):
+            return []
+        raise ValueError(
+            "A planilha não contém as colunas necessárias: " + str(REQUIRED_COLUMNS)
+        )
+
+    metrics = get_metrics()
+    rows = []
+    missing = blank = 0
+    rejected = [0] * len(REJECTION_REASONS)
+    with metrics.stage("clean", rows_in=column_rows(columns)) as stage:
+        # Uma passada só: filtros, normalização do nome e conversão do valor
+        for timestamp, name, valor in zip(*(columns[col] for col in REQUIRED_COLUMNS)):
+            # Remove linhas com campos essenciais ausentes ou nome em branco
+            if _is_missing(timestamp) or _is_missing(name) or _is_missing(valor):
+                missing += 1
+                continue
+            name = str(name).strip()
+            if not name:
+                blank += 1
+                continue
+            amount, reason = parse_amount(valor)
+            if amount is None:
+                rejected[reason] += 1
+                continue
+            rows.append((normalize_name(name), name, amount, timestamp))
+        stage.drop("missing_fields", missing)
+        stage.drop("blank_name", blank)
+        for reason, count in zip(REJECTION_REASONS, rejected):
+            stage.drop(f"valor_{reason}", count)
+        stage.rows_out = len(rows)
+
+    aliases = get_alias_table()
+    if aliases is not None:
+        with metrics.stage("dedup", rows_in=len(rows)) as stage:
+            # Une variações do mesmo doador ("Jose Silva", "José da Silva Jr")
+            canonical = aliases.resolve({row[0] for row in rows})
+            rows = [(canonical[row[0]], *row[1:]) for row in rows]
+            stage.count("merged_names", merged_names(canonical))
+            stage.rows_out = len(rows)
+
+    with metrics.stage("parse_dates", rows_in=len(rows)) as stage:
+        timestamps = parse_timestamps([row[3] for row in rows])
+        cleaned = [
+            (normalized, name, amount, ts)
+            for (normalized, name, amount, _raw), ts in zip(rows, timestamps)
+            if ts is not None
+        ]
+        stage.drop("invalid_timestamp", len(rows) - len(cleaned))
+        stage.rows_out = len(cleaned)
+    return cleaned
+
+
+def build_payload(columns: dict[str, list]) -> dict:
+    """Gera o JSON final a partir das colunas da planilha, com o ranking em streaming."""
+    donations = donation_rows(columns)
+    with get_metrics().stage("ranking", rows_in=len(donations)) as stage:
+        ranking = DonorRanking()
+        ranking.extend(donations)
+        stage.rows_out = len(ranking)
+    if not ranking:
+        return empty_payload()
+
+    return format_donor_lists(
+        ranked_names=ranking.ranked_names(),
+        top_names=ranking.top(),
+        latest_names=ranking.latest(),
+        amounts=ranking.ranked_totals(),
+    )
+
+
+def donation_rows(columns: dict[str, list]) -> list[tuple[str, str, int, str]]:
+    """Doações válidas em ordem cronológica, no formato aceito pelo DonorStore."""
+    donations = clean_columns(columns)
+    with get_metrics().stage("sort", rows_in=len(donations)) as stage:
+        donations.sort(key=lambda row: row[3])
+        rows = [
+            (normalized, name, amount, ts.isoformat())
+            for normalized, name, amount, ts in donations
+        ]
+        stage.rows_out = len(rows)
+    return rows
@@ -0,0 +1,60 @@
+import unicodedata
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Quantidade máxima de nomes distintos mantidos no cache de normalização
+NORMALIZE_CACHE_SIZE = 65_536
+
+# Último caractere coberto pela tabela de tradução (Latin-1 + Latin Extended-A/B).
+# Nesse intervalo nenhum caractere é uma marca combinante e toda decomposição
+# NFD é "letra base + marcas", então remover acentos caractere a caractere
+# dá exatamente o mesmo resultado que decompor a string inteira.
+_TABLE_LAST_CHAR = "ɏ"
+
+
+def _strip_marks(text: str) -> str:
+    """Remove acentos via decomposição NFD (caminho lento, usado como fallback)."""
+    # Normaliza unicode (NFD = decompõe caracteres acentuados)
+    normalized = unicodedata.normalize("NFD", text)
+    # Remove marcas diacríticas (acentos)
+    return "".join(char for char in normalized if unicodedata.category(char) != "Mn")
+
+
+# Tabela pré-calculada com o resultado de `_strip_marks` para cada caractere
+# acentuado do intervalo coberto (ex.: "ã" -> "a", "Ç" -> "C")
+ACCENT_TABLE = {
+    code: _strip_marks(chr(code))
+    for code in range(0x80, ord(_TABLE_LAST_CHAR) + 1)
+    if _strip_marks(chr(code)) != chr(code)
+}
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(name: str) -> str:
+    """Normaliza um nome removendo acentos e padronizando formato."""
+    if name.isascii():
+        ascii_name = name
+    elif max(name) <= _TABLE_LAST_CHAR:
+        ascii_name = name.translate(ACCENT_TABLE)
+    else:
+        ascii_name = _strip_marks(name)
+    # Remove espaços extras, converte para maiúsculas
+    return " ".join(ascii_name.upper().split())
+
+
+def normalize_series(names: "pd.Series") -> "pd.Series":
+    """
+    Normaliza uma coluna de nomes processando cada nome distinto uma única vez.
+    Valores ausentes são preservados.
+    """
+    # Importação tardia: o motor sem pandas usa apenas normalize_name
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(names)
+    # O código -1 (valor ausente) aponta para o None acrescentado no fim
+    lookup = np.array([normalize_name(name) for name in uniques] + [None], dtype=object)
+    return pd.Series(lookup[codes], index=names.index, dtype=object)
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+
+def serialize_payload(data: dict) -> bytes:
+    """
+    Serializa o JSON de saída de forma determinística: mesmos dados, mesmos
+    bytes (o mesmo formato que `json.dump(..., indent=4)` sempre gerou).
+    """
+    return json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def manifest_path(path: str) -> str:
+    """Manifesto ao lado do arquivo: 'donors.json' -> 'donors.manifest.json'."""
+    root, _ext = os.path.splitext(path)
+    return root + ".manifest.json"
+
+
+def atomic_write(path: str, content: bytes):
+    """
+    Grava em um arquivo temporário no mesmo diretório e o renomeia por cima do
+    destino: leitores veem o arquivo antigo ou o novo, nunca um pela metade.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=".", suffix=os.path.basename(path) + ".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_hash(path: str) -> str | None:
+    """Hash do conteúdo atual do arquivo, ou None se ele não existir."""
+    try:
+        with open(path, "rb") as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def write_if_changed(
+    data: dict, path: str, clock: Callable[[], float] = time.time
+) -> bool:
+    """
+    Grava `data` em `path` apenas se o conteúdo mudou, junto com um manifesto
+    (hash, tamanho e horário de geração) para validação de cache.
+    Retorna True se o arquivo foi regravado.
+    """
+    content = serialize_payload(data)
+    manifest_file = manifest_path(path)
+
+    changed = read_hash(path) != content_hash(content)
+    if changed:
+        atomic_write(path, content)
+
+    if changed or not os.path.exists(manifest_file):
+        write_manifest(path, content, clock)
+    return changed
+
+
+def write_manifest(
+    path: str, content: bytes, clock: Callable[[], float] = time.time, **extra
+):
+    """Grava o manifesto de `path` (hash, tamanho, horário e campos extras)."""
+    manifest = {
+        "file": os.path.basename(path),
+        "sha256": content_hash(content),
+        "bytes": len(content),
+        "generatedAt": datetime.fromtimestamp(clock(), UTC).isoformat(
+            timespec="seconds"
+        ),
+        **extra,
+    }
+    atomic_write(
+        manifest_path(path),
+        json.dumps(manifest, ensure_ascii=False, indent=4).encode("utf-8"),
+    )
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from currency import parse_amounts
+from donation_table import DONATION_DTYPE, DonationTable, build_donor_lists
+from donor_payload import REQUIRED_COLUMNS, column_rows, empty_payload
+from fuzzy_dedup import get_alias_table, merged_names
+from instrumentation import get_metrics
+from normalization import normalize_name
+from timestamps import parse_timestamp_column
+
+
+def load_columns(columns: dict[str, list]) -> dict[str, np.ndarray]:
+    """
+    Colunas da planilha como arrays de objetos, sem copiar as strings (um
+    DataFrame consolidaria as colunas num bloco 2D, com o triplo do pico de memória).
+    """
+    with get_metrics().stage("load", rows_in=column_rows(columns)) as stage:
+        arrays = {
+            col: np.asarray(values, dtype=object) for col, values in columns.items()
+        }
+        stage.rows_out = column_rows(arrays)
+    return arrays
+
+
+def clean_donations(columns: dict[str, np.ndarray]) -> DonationTable:
+    """
+    Valida e limpa as respostas do formulário (colunas de `load_columns`).
+    Retorna as doações válidas em formato compacto (`DonationTable`): os filtros
+    só reduzem um array de índices de linha, sem copiar as colunas, e cada
+    nome distinto é limpo e normalizado uma única vez.
+    """
+    metrics = get_metrics()
+
+    # Garante que as colunas essenciais existem
+    if not all(col in columns for col in REQUIRED_COLUMNS):
+        raise ValueError(
+            "A planilha não contém as colunas necessárias: " + str(REQUIRED_COLUMNS)
+        )
+
+    rows = column_rows(columns)
+    with metrics.stage("clean", rows_in=rows) as stage:
+        # Remove linhas onde o nome do doador ou o valor da doação estão vazios
+        keep = np.ones(rows, dtype=bool)
+        for col in REQUIRED_COLUMNS:
+            keep &= pd.notna(columns[col])
+        stage.drop("missing_fields", rows - keep.sum())
+
+        # Remove linhas onde o nome está vazio (apenas espaços em branco);
+        # o código -1 (nome ausente) aponta para o False acrescentado no fim
+        name_codes, raw_names = pd.factorize(columns["Nome"])
+        stripped = [str(name).strip() for name in raw_names]
+        blank = np.array([not name for name in stripped] + [False])
+        rows = np.flatnonzero(keep & ~blank[name_codes])
+        stage.drop("blank_name", keep.sum() - len(rows))
+        stage.rows_out = len(rows)
+
+    with metrics.stage("normalize", rows_in=len(rows)) as stage:
+        # Normaliza os nomes para garantir que variações sejam tratadas como a mesma pessoa
+        # O nome normalizado é usado apenas internamente para agregação
+        # O nome original mais recente (sem espaços nas pontas) é usado para exibição
+        # Cada nome normalizado vira um código; variações do mesmo nome
+        # compartilham uma única string
+        interned: dict[str, int] = {}
+        normalized_codes = np.fromiter(
+            (interned.setdefault(normalize_name(n), len(interned)) for n in stripped),
+            dtype=np.int64,
+            count=len(stripped),
+        )
+        normalized = list(interned)
+        stage.rows_out = len(rows)
+
+    aliases = get_alias_table()
+    if aliases is not None:
+        with metrics.stage("dedup", rows_in=len(rows)) as stage:
+            # Une variações do mesmo doador ("Jose Silva", "José da Silva Jr"),
+            # na ordem em que os nomes aparecem na planilha
+            present = pd.unique(normalized_codes[name_codes[rows]])
+            canonical = aliases.resolve([normalized[code] for code in present])
+            remap, merged = pd.factorize(
+                np.array([canonical.get(name, name) for name in normalized], object)
+            )
+            normalized_codes, normalized = remap[normalized_codes], list(merged)
+            stage.count("merged_names", merged_names(canonical))
+            stage.rows_out = len(rows)
+
+    with metrics.stage("parse_valor", rows_in=len(rows)) as stage:
+        # Converte 'Valor' para centavos (int64): somas exatas, sem float
+        parsed = parse_amounts(columns["Valor"][rows])
+        for reason, count in parsed.rejection_counts().items():
+            stage.drop(f"valor_{reason}", count)
+        valid = ~parsed.rejected
+        rows, cents = rows[valid], parsed.cents[valid]
+        stage.rows_out = len(rows)
+
+    with metrics.stage("parse_dates", rows_in=len(rows)) as stage:
+        # Garante que 'Carimbo de data/hora' seja do tipo datetime para ordenação,
+        # com o mesmo resultado de pd.to_datetime(dayfirst=True, errors="coerce")
+        parsed = parse_timestamp_column(columns["Carimbo de data/hora"][rows])
+        for tier, count in parsed.tiers.items():
+            stage.count(f"tier_{tier}", count)
+        valid = ~pd.isna(parsed.values)
+        stage.drop("invalid_timestamp", len(rows) - valid.sum())
+        rows, cents, timestamps = rows[valid], cents[valid], parsed.values[valid]
+        if timestamps.dtype != "datetime64[ns]":
+            # Conversão original do pandas (fusos ou tipos mistos, array de
+            # objetos): os instantes em UTC, sem fuso, como datetime64[ns]
+            timestamps = (
+                pd.to_datetime(pd.Series(timestamps), utc=True)
+                .dt.tz_localize(None)
+                .to_numpy()
+            )
+        stage.rows_out = len(rows)
+
+    # Dicionário de nomes: os de exibição seguidos pelos normalizados
+    codes = name_codes[rows]
+    records = np.empty(len(rows), dtype=DONATION_DTYPE)
+    records["name"] = codes
+    records["normalized"] = len(stripped) + normalized_codes[codes]
+    records["cents"] = cents
+    records["timestamp"] = timestamps
+    names = np.array(stripped + normalized, dtype=object)
+    return DonationTable(records, names)
+
+
+def build_payload(columns: dict[str, list]) -> dict:
+    """Gera o JSON final a partir das colunas da planilha, com pandas e numpy."""
+    arrays = load_columns(columns)
+    if not column_rows(arrays):
+        return empty_payload()
+
+    return build_donor_lists(clean_donations(arrays))
+
+
+def donation_rows(columns: dict[str, list]) -> list[tuple[str, str, int, str]]:
+    """Doações válidas em ordem cronológica, no formato aceito pelo DonorStore."""
+    arrays = load_columns(columns)
+    if not column_rows(arrays):
+        return []
+    return clean_donations(arrays).rows()
@@ -0,0 +1,230 @@
+import gzip
+import json
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from instrumentation import get_metrics
+from output_writer import atomic_write
+
+# Chaves do arquivo crítico (hero e tabelas); o resto vai para o da nuvem
+CRITICAL_KEYS = ("topDonors", "latestDonations")
+# Nível máximo: a compressão roda uma vez por atualização, o download a cada visita
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+class PublishOptions(NamedTuple):
+    """Artefatos extras: com `split`, um JSON crítico e um da nuvem de palavras."""
+
+    split: bool = False
+
+
+class Artifact(NamedTuple):
+    """Tamanhos (bytes) de um arquivo publicado e das versões comprimidas."""
+
+    file: str
+    raw: int
+    gzip: int
+    brotli: int | None
+
+
+def variant_path(path: str, name: str) -> str:
+    """'public/donors.json' + 'min' -> 'public/donors.min.json'."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{name}{ext}"
+
+
+def minify(data: dict) -> bytes:
+    """JSON sem espaços, com a mesma ordem de chaves do arquivo formatado."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def gzip_bytes(content: bytes) -> bytes:
+    # mtime=0: mesmo conteúdo, mesmos bytes (o arquivo só muda quando os dados mudam)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def has_brotli() -> bool:
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def brotli_bytes(content: bytes) -> bytes | None:
+    """Versão brotli, ou None se o pacote `brotli` não estiver instalado."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(content, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+
+
+def split_payload(data: dict) -> tuple[dict, dict]:
+    """Separa o JSON final em (crítico, nuvem de palavras)."""
+    critical = {key: data[key] for key in CRITICAL_KEYS if key in data}
+    deferred = {key: value for key, value in data.items() if key not in CRITICAL_KEYS}
+    return critical, deferred
+
+
+def read_bytes(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_bytes_if_changed(path: str, content: bytes) -> bool:
+    if read_bytes(path) == content:
+        return False
+    atomic_write(path, content)
+    return True
+
+
+def is_published(path: str) -> bool:
+    """True se `path`, o `.gz` e (só com `brotli` instalado) o `.br` existem."""
+    return (
+        os.path.exists(path)
+        and os.path.exists(path + ".gz")
+        and os.path.exists(path + ".br") == has_brotli()
+    )
+
+
+def sizes(
+    path: str, content: bytes, compressed_gzip: bytes, compressed_brotli: bytes | None
+) -> Artifact:
+    return Artifact(
+        file=os.path.basename(path),
+        raw=len(content),
+        gzip=len(compressed_gzip),
+        brotli=None if compressed_brotli is None else len(compressed_brotli),
+    )
+
+
+def publish_file(path: str, content: bytes) -> tuple[Artifact, bool]:
+    """
+    Grava `path`, `path.gz` e `path.br` (os dois últimos prontos para servir
+    com Content-Encoding), cada um só se mudou. Sem `brotli`, remove um `.br`
+    antigo em vez de deixá-lo desatualizado. Se `path` já tem `content` e as
+    versões comprimidas existem, nada é comprimido de novo.
+    """
+    if read_bytes(path) == content and is_published(path):
+        brotli_size = os.path.getsize(path + ".br") if has_brotli() else None
+        artifact = Artifact(
+            os.path.basename(path),
+            len(content),
+            os.path.getsize(path + ".gz"),
+            brotli_size,
+        )
+        return artifact, False
+
+    compressed_gzip = gzip_bytes(content)
+    compressed_brotli = brotli_bytes(content)
+    changed = write_bytes_if_changed(path, content)
+    changed |= write_bytes_if_changed(path + ".gz", compressed_gzip)
+    if compressed_brotli is not None:
+        changed |= write_bytes_if_changed(path + ".br", compressed_brotli)
+    elif os.path.exists(path + ".br"):
+        os.remove(path + ".br")
+        changed = True
+    return sizes(path, content, compressed_gzip, compressed_brotli), changed
+
+
+def remove_variants(paths: list[str]) -> bool:
+    """Remove arquivos (e versões comprimidas) de uma publicação anterior."""
+    removed = False
+    for path in paths:
+        for name in (path, path + ".gz", path + ".br"):
+            if os.path.exists(name):
+                os.remove(name)
+                removed = True
+    return removed
+
+
+def publish_artifacts(
+    data: dict, path: str, written: bool = True
+) -> tuple[list[Artifact], bool]:
+    """
+    Gera os artefatos de publicação do JSON final `path` (já gravado):
+    `donors.min.json` e, com `split` ativo, `donors.critical.json` e
+    `donors.wordcloud.json`, todos minificados e pré-comprimidos. Retorna os
+    tamanhos e se algum arquivo mudou; o primeiro item é o próprio `path`,
+    base da comparação de tamanhos (só com gzip: o brotli do arquivo
+    formatado não é publicado). Com `written` falso (`path` não mudou) e os
+    artefatos já no disco, não faz nada e retorna `([], False)`.
+    """
+    files = [(variant_path(path, "min"), data)]
+    split_files = [variant_path(path, "critical"), variant_path(path, "wordcloud")]
+    split = get_publish_options().split
+    if split:
+        files.extend(zip(split_files, split_payload(data), strict=True))
+    if (
+        not written
+        and all(is_published(file_path) for file_path, _payload in files)
+        and (split or not any(os.path.exists(name) for name in split_files))
+    ):
+        return [], False
+    changed = False if split else remove_variants(split_files)
+
+    with get_metrics().stage("publish", rows_in=len(files)) as stage:
+        with open(path, "rb") as f:
+            content = f.read()
+        artifacts = [sizes(path, content, gzip_bytes(content), None)]
+        for file_path, payload in files:
+            artifact, file_changed = publish_file(file_path, minify(payload))
+            artifacts.append(artifact)
+            changed |= file_changed
+        for artifact in artifacts:
+            name = artifact.file.removesuffix(".json").replace(".", "_")
+            stage.count(f"{name}_bytes", artifact.raw)
+            stage.count(f"{name}_gzip_bytes", artifact.gzip)
+            if artifact.brotli is not None:
+                stage.count(f"{name}_brotli_bytes", artifact.brotli)
+        stage.rows_out = len(artifacts)
+    if changed:
+        print(format_size_report(artifacts))
+    return artifacts, changed
+
+
+def format_size(size: int | None) -> str:
+    if size is None:
+        return "-"
+    return f"{size} B" if size < 1024 else f"{size / 1024:.1f} KiB"
+
+
+def format_size_report(artifacts: list[Artifact]) -> str:
+    """Tabela de tamanhos; a porcentagem é em relação ao primeiro arquivo (sem gzip)."""
+    base = artifacts[0].raw or 1
+    width = max(len(artifact.file) for artifact in artifacts)
+    lines = [f"{'Arquivo':<{width}}  {'bytes':>10}  {'gzip':>10}  {'brotli':>10}"]
+    for artifact in artifacts:
+        best = min(size for size in (artifact.gzip, artifact.brotli) if size)
+        lines.append(
+            f"{artifact.file:<{width}}  {format_size(artifact.raw):>10}  "
+            f"{format_size(artifact.gzip):>10}  {format_size(artifact.brotli):>10}"
+            f"  ({100 * best / base:.0f}% do original)"
+        )
+    return "\n".join(lines)
+
+
+_active = PublishOptions()
+
+
+def get_publish_options() -> PublishOptions:
+    return _active
+
+
+@contextmanager
+def use_publish_options(options: PublishOptions) -> Iterator[PublishOptions]:
+    """Ativa `options` para os JSONs publicados dentro do bloco."""
+    global _active
+    previous = _active
+    _active = options
+    try:
+        yield options
+    finally:
+        _active = previous
@@ -0,0 +1,126 @@
+from bisect import bisect_left, insort
+
+from donor_payload import LATEST_N_DONORS, TOP_N_DONORS
+
+# Versão do formato serializado por `DonorRanking.to_dict`
+RANKING_VERSION = 2
+
+
+class DonorRanking:
+    """
+    Ranking de doadores mantido em streaming, doação a doação.
+
+    - `_donors`: agregados por nome normalizado [nome, total em centavos,
+      última data].
+    - `_ranking`: chaves (-total, nome normalizado) sempre ordenadas; a nuvem
+      de palavras é a lista completa e o top-K é o seu começo.
+    - `_latest`: buffer ordenado com no máximo `latest_k` chaves
+      (última data, nome normalizado) dos doadores mais recentes.
+
+    Cada doação custa uma busca binária em cada índice, em vez de reordenar
+    todos os doadores. As datas são strings ISO 8601 (ordenáveis como texto)
+    e as doações de um mesmo doador devem chegar em ordem cronológica para
+    que o nome de exibição seja o mais recente.
+    """
+
+    def __init__(self, top_k: int = TOP_N_DONORS, latest_k: int = LATEST_N_DONORS):
+        self.top_k = top_k
+        self.latest_k = latest_k
+        self._donors: dict[str, list] = {}
+        self._ranking: list[tuple[int, str]] = []
+        self._latest: list[tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._donors)
+
+    def add(self, normalized: str, name: str, cents: int, timestamp: str):
+        """Soma uma doação (em centavos) ao ranking."""
+        donor = self._donors.get(normalized)
+        if donor is None:
+            donor = self._donors[normalized] = [name, 0, None]
+        else:
+            # Retira as chaves antigas antes de atualizar o doador
+            del self._ranking[bisect_left(self._ranking, (-donor[1], normalized))]
+        previous_last = donor[2]
+
+        donor[1] += cents
+        if previous_last is None or timestamp >= previous_last:
+            donor[0] = name
+            donor[2] = timestamp
+        insort(self._ranking, (-donor[1], normalized))
+
+        if donor[2] != previous_last:
+            self._push_latest(normalized, previous_last, donor[2])
+
+    def extend(self, donations):
+        """Soma várias doações (nome normalizado, nome, centavos, data ISO)."""
+        for normalized, name, cents, timestamp in donations:
+            self.add(normalized, name, cents, timestamp)
+
+    def _push_latest(self, normalized: str, previous: str | None, current: str):
+        if previous is not None:
+            position = bisect_left(self._latest, (previous, normalized))
+            if position < len(self._latest) and self._latest[position] == (
+                previous,
+                normalized,
+            ):
+                del self._latest[position]
+
+        key = (current, normalized)
+        if len(self._latest) < self.latest_k or key > self._latest[0]:
+            insort(self._latest, key)
+            if len(self._latest) > self.latest_k:
+                # Descarta o mais antigo: quem sai só volta com uma doação mais nova
+                del self._latest[0]
+
+    def ranked_names(self, limit: int | None = None) -> list[str]:
+        """Nomes de exibição pelo total doado (maior primeiro)."""
+        keys = self._ranking if limit is None else self._ranking[:limit]
+        return [self._donors[normalized][0] for _total, normalized in keys]
+
+    def ranked_totals(self, limit: int | None = None) -> list[int]:
+        """Totais (centavos) na ordem de `ranked_names`."""
+        keys = self._ranking if limit is None else self._ranking[:limit]
+        return [-total for total, _normalized in keys]
+
+    def top(self) -> list[str]:
+        return self.ranked_names(self.top_k)
+
+    def latest(self) -> list[str]:
+        """Doadores únicos (por nome normalizado) das doações mais recentes."""
+        return [
+            self._donors[normalized][0] for _ts, normalized in reversed(self._latest)
+        ]
+
+    def to_dict(self) -> dict:
+        """Serializa o ranking em um dict compatível com JSON."""
+        return {
+            "version": RANKING_VERSION,
+            "top_k": self.top_k,
+            "latest_k": self.latest_k,
+            # Na ordem do ranking, para que a carga não precise reordenar
+            "donors": [
+                [normalized, *self._donors[normalized]]
+                for _total, normalized in self._ranking
+            ],
+            "latest": [normalized for _ts, normalized in self._latest],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DonorRanking":
+        """Reconstrói um ranking serializado por `to_dict`."""
+        if data.get("version") != RANKING_VERSION:
+            raise ValueError(f"Versão de ranking incompatível: {data.get('version')!r}")
+
+        ranking = cls(top_k=data["top_k"], latest_k=data["latest_k"])
+        for normalized, name, total, timestamp in data["donors"]:
+            ranking._donors[normalized] = [name, total, timestamp]
+        # Já vem ordenado; o sort (Timsort) só confirma em tempo linear
+        ranking._ranking = sorted(
+            (-donor[1], normalized) for normalized, donor in ranking._donors.items()
+        )
+        ranking._latest = sorted(
+            (ranking._donors[normalized][2], normalized)
+            for normalized in data["latest"]
+        )
+        return ranking
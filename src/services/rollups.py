@@ -0,0 +1,59 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+
+# Série diária consumida pelos gráficos de progresso do frontend
+TIMESERIES_PATH = "public/timeseries.json"
+# Versão do formato de `format_timeseries`
+TIMESERIES_VERSION = 1
+
+
+class DayBucket(NamedTuple):
+    """Agregados de um dia: total em centavos, doações e doadores distintos."""
+
+    day: str
+    total_cents: int
+    donations: int
+    donors: int
+
+
+def day_of(timestamp: str) -> str:
+    """Dia (AAAA-MM-DD) de uma data ISO 8601, no horário da planilha."""
+    return timestamp[:10]
+
+
+def daily_rollups(donations: Iterable[tuple[str, str, int, str]]) -> list[DayBucket]:
+    """
+    Agrega doações (normalizado, nome, centavos, data ISO) por dia, do zero.
+    É a referência do que o `DonorStore` mantém de forma incremental.
+    """
+    days: dict[str, list] = {}
+    for normalized, _name, cents, timestamp in donations:
+        bucket = days.setdefault(day_of(timestamp), [0, 0, set()])
+        bucket[0] += cents
+        bucket[1] += 1
+        bucket[2].add(normalized)
+    return [
+        DayBucket(day, total, count, len(donors))
+        for day, (total, count, donors) in sorted(days.items())
+    ]
+
+
+def format_timeseries(buckets: Iterable[DayBucket]) -> dict:
+    """
+    JSON colunar com um item por dia com doações (tamanho proporcional ao
+    número de dias, não de doações). Valores em centavos, sem float.
+    """
+    buckets = sorted(buckets)
+    cumulative = 0
+    cumulative_cents = []
+    for bucket in buckets:
+        cumulative += bucket.total_cents
+        cumulative_cents.append(cumulative)
+    return {
+        "version": TIMESERIES_VERSION,
+        "days": [bucket.day for bucket in buckets],
+        "totalCents": [bucket.total_cents for bucket in buckets],
+        "cumulativeCents": cumulative_cents,
+        "donations": [bucket.donations for bucket in buckets],
+        "donors": [bucket.donors for bucket in buckets],
+    }
@@ -0,0 +1,156 @@
+import csv
+import json
+
+from donor_payload import REQUIRED_COLUMNS
+
+
+def column_letter(position: int) -> str:
+    """Letra da coluna na notação A1 (posição começando em 1)."""
+    from gspread.utils import rowcol_to_a1
+
+    return rowcol_to_a1(1, position)[:-1]
+
+
+def resolve_columns(header: list[str], names: list[str]) -> list[int]:
+    """Posições (a partir de 1) das colunas pedidas no cabeçalho."""
+    if not all(name in header for name in names):
+        raise ValueError(
+            "A planilha não contém as colunas necessárias: " + str(REQUIRED_COLUMNS)
+        )
+    return [header.index(name) + 1 for name in names]
+
+
+def pad_columns(columns: list[list]) -> list[list]:
+    """Completa as colunas com "" até o mesmo tamanho (a API omite vazios finais)."""
+    length = max((len(column) for column in columns), default=0)
+    return [list(column) + [""] * (length - len(column)) for column in columns]
+
+
+class WorksheetSource:
+    """
+    Leitura projetada de uma worksheet do gspread: o cabeçalho é resolvido
+    uma vez e só as colunas usadas são baixadas, em uma única requisição
+    batchGet (ou uma por bloco de linhas, se `block_rows` for informado).
+    """
+
+    def __init__(self, worksheet, header: list[str] | None = None):
+        self.worksheet = worksheet
+        self._header = header
+
+    def header(self) -> list[str]:
+        if self._header is None:
+            self._header = self.worksheet.row_values(1)
+        return self._header
+
+    def resolve(self, names: list[str] = REQUIRED_COLUMNS) -> list[int] | None:
+        """Posições das colunas pedidas, ou None se a planilha estiver vazia."""
+        header = self.header()
+        return resolve_columns(header, names) if header else None
+
+    def fetch_columns(
+        self,
+        names: list[str] = REQUIRED_COLUMNS,
+        start_row: int = 2,
+        block_rows: int | None = None,
+        positions: list[int] | None = None,
+    ) -> dict[str, list]:
+        """
+        Baixa as colunas `names` a partir de `start_row` como listas de strings
+        cruas, todas com o mesmo tamanho. Se `positions` já for conhecido (ex.:
+        salvo no checkpoint), o cabeçalho nem é consultado.
+        """
+        if positions is None:
+            positions = self.resolve(names)
+            if positions is None:
+                return {name: [] for name in names}
+        letters = [column_letter(position) for position in positions]
+
+        if block_rows is None:
+            blocks = [self._batch_get(letters, start_row, None)]
+        else:
+            blocks = []
+            first = start_row
+            while True:
+                block = self._batch_get(letters, first, first + block_rows - 1)
+                blocks.append(block)
+                if len(block[0]) < block_rows:
+                    break
+                first += block_rows
+
+        return {
+            name: [value for block in blocks for value in block[index]]
+            for index, name in enumerate(names)
+        }
+
+    def _batch_get(
+        self, letters: list[str], first: int, last: int | None
+    ) -> list[list]:
+        from gspread.utils import Dimension
+
+        end = "" if last is None else str(last)
+        ranges = [f"{letter}{first}:{letter}{end}" for letter in letters]
+        value_ranges = self.worksheet.batch_get(ranges, major_dimension=Dimension.cols)
+        return pad_columns(
+            [value_range[0] if value_range else [] for value_range in value_ranges]
+        )
+
+
+class LocalSheetSource:
+    """
+    Fonte local com a mesma interface da `WorksheetSource`, carregada de uma
+    exportação CSV da planilha ou de um fixture JSON. Permite rodar e testar
+    o pipeline sem acesso à rede.
+    """
+
+    def __init__(self, values: list[list]):
+        # Remove linhas vazias no fim, como faz a API do Sheets
+        values = [list(row) for row in values]
+        while values and not any(values[-1]):
+            values.pop()
+        self.values = values
+
+    @classmethod
+    def from_csv(cls, path: str) -> "LocalSheetSource":
+        with open(path, encoding="utf-8", newline="") as f:
+            return cls(list(csv.reader(f)))
+
+    @classmethod
+    def from_json(cls, path: str) -> "LocalSheetSource":
+        """
+        Aceita uma lista de linhas (cabeçalho primeiro) ou uma lista de
+        registros como a retornada pelo get_all_records.
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data and isinstance(data[0], dict):
+            header = list(dict.fromkeys(key for record in data for key in record))
+            rows = [[str(record.get(key, "")) for key in header] for record in data]
+            return cls([header] + rows)
+        return cls([[str(cell) for cell in row] for row in data])
+
+    def header(self) -> list[str]:
+        return self.values[0] if self.values else []
+
+    def resolve(self, names: list[str] = REQUIRED_COLUMNS) -> list[int] | None:
+        """Posições das colunas pedidas, ou None se a planilha estiver vazia."""
+        header = self.header()
+        return resolve_columns(header, names) if header else None
+
+    def fetch_columns(
+        self,
+        names: list[str] = REQUIRED_COLUMNS,
+        start_row: int = 2,
+        block_rows: int | None = None,
+        positions: list[int] | None = None,
+    ) -> dict[str, list]:
+        if positions is None:
+            positions = self.resolve(names)
+            if positions is None:
+                return {name: [] for name in names}
+
+        rows = self.values[start_row - 1 :]
+        columns = [
+            [row[position - 1] if position <= len(row) else "" for row in rows]
+            for position in positions
+        ]
+        return dict(zip(names, pad_columns(columns)))
@@ -0,0 +1,247 @@
+import json
+import os
+import random
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from http import HTTPStatus
+
+import requests
+from api_usage import get_api_usage
+from gspread.exceptions import APIError, SpreadsheetNotFound
+from gspread.http_client import HTTPClient
+from output_writer import atomic_write
+
+# Cota de leitura da API do Sheets: 60 requisições por minuto por usuário
+# (a conta de serviço conta como um usuário)
+REQUESTS_PER_MINUTE = 60
+# Requisições que podem sair de uma vez antes de o balde limitar o ritmo
+BURST = 10
+# Novas tentativas após 408/429/5xx ou falha de conexão, com espera
+# exponencial (1s, 2s, 4s... até BACKOFF_MAX) sorteada entre 0 e o teto
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 64.0
+# Título da planilha -> chave (ID): abrir pela chave dispensa a busca no Drive
+SPREADSHEET_KEYS_PATH = ".cache/spreadsheet_keys.json"
+
+RETRY_STATUSES = {HTTPStatus.REQUEST_TIMEOUT, HTTPStatus.TOO_MANY_REQUESTS}
+# Motivos do 403 que o Drive usa para limite de uso (não para falta de acesso)
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+class TokenBucket:
+    """
+    Balde de fichas compartilhado pelas threads: cada requisição consome uma
+    ficha, repostas a `rate` por segundo até `capacity`. Sem ficha, espera.
+    """
+
+    def __init__(
+        self,
+        rate: float = REQUESTS_PER_MINUTE / 60,
+        capacity: int = BURST,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Consome uma ficha, esperando se preciso. Retorna os segundos esperados."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            # Saldo negativo: a ficha desta requisição ainda vai ser reposta
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+def is_retryable(error: APIError) -> bool:
+    """408, 429, 5xx ou 403 por limite de uso do Drive."""
+    status = error.response.status_code
+    if status in RETRY_STATUSES or status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        return True
+    if status == HTTPStatus.FORBIDDEN:
+        reasons = {item.get("reason") for item in error.error.get("errors", [])}
+        domains = {item.get("domain") for item in error.error.get("errors", [])}
+        return bool(reasons & RATE_LIMIT_REASONS) or "usageLimits" in domains
+    return False
+
+
+def retry_after(response: requests.Response | None) -> float:
+    """Segundos pedidos no cabeçalho Retry-After (0 se ausente ou em formato de data)."""
+    if response is None:
+        return 0.0
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", 0)))
+    except ValueError:
+        return 0.0
+
+
+class RateLimitedHTTPClient(HTTPClient):
+    """
+    Cliente HTTP do gspread que passa cada requisição pelo balde de fichas e
+    repete as que falham por limite de cota ou erro transitório, com espera
+    exponencial sorteada ("full jitter", para as threads não voltarem juntas)
+    e respeitando o Retry-After do servidor.
+    """
+
+    def __init__(
+        self,
+        auth,
+        session: requests.Session | None = None,
+        bucket: TokenBucket | None = None,
+        max_retries: int = MAX_RETRIES,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ):
+        super().__init__(auth, session)
+        self.bucket = bucket or TokenBucket()
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.jitter = jitter
+
+    def backoff(self, attempt: int, response: requests.Response | None) -> float:
+        ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)
+        return max(self.jitter() * ceiling, retry_after(response))
+
+    def request(self, *args, **kwargs) -> requests.Response:
+        usage = get_api_usage()
+        attempt = 0
+        while True:
+            usage.record_call(self.bucket.acquire())
+            try:
+                return super().request(*args, **kwargs)
+            except APIError as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                status, response = e.response.status_code, e.response
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                status, response = None, None
+
+            delay = self.backoff(attempt, response)
+            usage.record_retry(status, delay)
+            print(
+                f"API do Google indisponível ({status or 'conexão'}); "
+                f"nova tentativa em {delay:.1f}s."
+            )
+            self.sleep(delay)
+            attempt += 1
+
+
+def rate_limited_client(**options) -> Callable[..., RateLimitedHTTPClient]:
+    """
+    Fábrica para o `http_client` do gspread (`gspread.authorize(...,
+    http_client=rate_limited_client())`). As opções (`bucket`, `max_retries`,
+    `sleep`, `jitter`) vão para o RateLimitedHTTPClient; um único balde é
+    compartilhado por todas as threads que usam o cliente.
+    """
+    options.setdefault("bucket", TokenBucket())
+    return partial(RateLimitedHTTPClient, **options)
+
+
+class RedirectSession(requests.Session):
+    """Sessão que troca os hosts das APIs do Google por uma URL base local."""
+
+    HOSTS = ("https://sheets.googleapis.com", "https://www.googleapis.com")
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):
+        for host in self.HOSTS:
+            if url.startswith(host):
+                url = self.base_url + url[len(host) :]
+        return super().request(method, url, *args, **kwargs)
+
+
+def emulator_client(base_url: str, **options):
+    """
+    Cliente gspread sem autenticação apontado para um emulador local em
+    `base_url`, com o mesmo balde de fichas e as mesmas novas tentativas do
+    cliente real (`options` vão para `rate_limited_client`).
+    """
+    import gspread
+
+    return gspread.Client(
+        None,
+        session=RedirectSession(base_url),
+        http_client=rate_limited_client(**options),
+    )
+
+
+class SpreadsheetKeys:
+    """Chaves (IDs) das planilhas já abertas pelo título, salvas entre execuções."""
+
+    def __init__(self, path: str | None = None, keys: dict[str, str] | None = None):
+        self.path = path
+        self.keys = dict(keys or {})
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = SPREADSHEET_KEYS_PATH) -> "SpreadsheetKeys":
+        """Lê o cache; um arquivo ausente ou inválido vira um cache vazio."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                keys = json.load(f)["keys"]
+            keys = {str(title): str(key) for title, key in keys.items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            keys = {}
+        return cls(path, keys)
+
+    def get(self, title: str) -> str | None:
+        with self.lock:
+            return self.keys.get(title)
+
+    def set(self, title: str, key: str | None):
+        with self.lock:
+            if self.keys.get(title) == key:
+                return
+            if key is None:
+                self.keys.pop(title, None)
+            else:
+                self.keys[title] = key
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        content = json.dumps({"keys": self.keys}, ensure_ascii=False, indent=2)
+        atomic_write(self.path, content.encode("utf-8"))
+
+
+def open_spreadsheet(gc, title: str, keys: SpreadsheetKeys | None = None):
+    """
+    Abre a planilha pela chave salva (uma requisição ao Sheets) e só busca pelo
+    título no Drive na primeira vez ou se a chave deixar de existir.
+    """
+    keys = keys if keys is not None else SpreadsheetKeys.load()
+    key = keys.get(title)
+    if key is not None:
+        try:
+            return gc.open_by_key(key)
+        except SpreadsheetNotFound:
+            print(
+                f"Chave salva da planilha '{title}' não encontrada; buscando pelo título."
+            )
+            keys.set(title, None)
+
+    spreadsheet = gc.open(title)
+    keys.set(title, spreadsheet.id)
+    return spreadsheet
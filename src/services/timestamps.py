@@ -0,0 +1,312 @@
+import json
+import os
+import warnings
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, NamedTuple
+
+from output_writer import atomic_write
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Formato que o Google Forms grava no 'Carimbo de data/hora'
+PINNED_FORMAT = "%d/%m/%Y %H:%M:%S"
+# Formatos secundários aprendidos em execuções anteriores
+FORMAT_CACHE_PATH = ".cache/timestamp_formats.json"
+MAX_LEARNED_FORMATS = 8
+# Valores resolvidos pelo dateutil examinados para aprender novos formatos
+LEARN_SAMPLE = 1_000
+
+# Linhas por bloco nas passadas vetorizadas
+CHUNK_ROWS = 16_384
+
+# Camadas do parser, na ordem em que são aplicadas
+TIERS = ("exact", "learned", "strptime", "dateutil")
+
+# Diretivas aceitas pela passada vetorizada e a largura fixa de cada uma
+FIELD_WIDTHS = {"d": 2, "m": 2, "Y": 4, "H": 2, "M": 2, "S": 2}
+# Anos que cabem em datetime64[ns]; fora disso quem decide é o pandas
+MIN_YEAR, MAX_YEAR = 1678, 2261
+# Valores que o pandas pula ao deduzir o formato da coluna (tslib.first_non_null)
+NOT_INFERRED = {"", "NaT", "nat", "NAT", "nan", "NaN", "NAN", "now", "today"}
+
+
+class Layout(NamedTuple):
+    """Posições fixas de um formato com campos zero-padded (ex.: dd/mm/aaaa)."""
+
+    width: int
+    fields: dict[str, int]
+    literals: tuple[tuple[int, str], ...]
+
+
+def fixed_layout(fmt: str) -> Layout | None:
+    """
+    Layout de largura fixa do formato, ou None se ele usar diretivas fora de
+    `FIELD_WIDTHS` (ex.: %f, %z, %b) ou não tiver dia, mês e ano.
+    """
+    fields: dict[str, int] = {}
+    literals = []
+    position = index = 0
+    while index < len(fmt):
+        if fmt[index] == "%":
+            directive = fmt[index + 1 : index + 2]
+            if directive not in FIELD_WIDTHS or directive in fields:
+                return None
+            fields[directive] = position
+            position += FIELD_WIDTHS[directive]
+            index += 2
+        else:
+            if not fmt[index].isascii() or (fmt[index].isalnum() and fmt[index] != "T"):
+                return None
+            literals.append((position, fmt[index]))
+            position += 1
+            index += 1
+    if not {"d", "m", "Y"} <= fields.keys():
+        return None
+    return Layout(position, fields, tuple(literals))
+
+
+def learnable(fmt: str | None) -> bool:
+    """
+    Se o formato pode ser aplicado antes do dateutil sem mudar o resultado:
+    largura fixa, dia antes do mês (ou ano-mês-dia, como o ISO) e horário
+    como prefixo de H:M:S. "%m/%d/%Y", por exemplo, inverteria datas ambíguas.
+    """
+    layout = fixed_layout(fmt) if fmt else None
+    if layout is None:
+        return False
+    day, month, year = (layout.fields[key] for key in "dmY")
+    if not (day < month < year or year < month < day):
+        return False
+    time_fields = [key for key in "HMS" if key in layout.fields]
+    return time_fields == list("HMS")[: len(time_fields)]
+
+
+def parse_fixed(
+    text: "np.ndarray", layout: Layout
+) -> tuple["np.ndarray", "np.ndarray"]:
+    """
+    Passada vetorizada de um formato de largura fixa sobre um array de texto.
+    Retorna (datetime64[ns], máscara dos valores aceitos). Só aceita valores
+    exatamente no layout e com data e hora válidas (segundos até 59); o resto
+    fica para as camadas seguintes, que reproduzem o comportamento do pandas.
+    """
+    import numpy as np
+
+    n = len(text)
+    parsed = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    width = text.dtype.itemsize // 4
+    if n == 0 or width < layout.width:
+        return parsed, np.zeros(n, dtype=bool)
+
+    codes = np.ascontiguousarray(text).view(np.uint32).reshape(n, width)
+    ok = np.strings.str_len(text) == layout.width
+    for position, char in layout.literals:
+        ok &= codes[:, position] == ord(char)
+
+    values = {}
+    for directive, start in layout.fields.items():
+        digits = codes[:, start : start + FIELD_WIDTHS[directive]].astype(np.int64) - 48
+        ok &= np.all((digits >= 0) & (digits <= 9), axis=1)
+        values[directive] = digits @ 10 ** np.arange(digits.shape[1] - 1, -1, -1)
+
+    year, month, day = values["Y"], values["m"], values["d"]
+    hour, minute, second = (values.get(key, 0) for key in "HMS")
+    ok &= (year >= MIN_YEAR) & (year <= MAX_YEAR) & (month >= 1) & (month <= 12)
+    ok &= (hour < 24) & (minute < 60) & (second < 60) & (day >= 1)
+    months = np.where(ok, (year - 1970) * 12 + month - 1, 0).astype("datetime64[M]")
+    first_day = months.astype("datetime64[D]")
+    ok &= day <= ((months + 1).astype("datetime64[D]") - first_day).astype(np.int64)
+
+    seconds = hour * 3600 + minute * 60 + second
+    moments = (
+        first_day.astype("datetime64[s]")
+        + ((day - 1) * 86_400 + seconds).astype("timedelta64[s]")
+    ).astype("datetime64[ns]")
+    parsed[ok] = moments[ok]
+    return parsed, ok
+
+
+class FormatCache:
+    """
+    Formatos secundários aprendidos em execuções anteriores, com o número de
+    linhas que cada um já resolveu (os mais usados são tentados primeiro).
+    """
+
+    def __init__(self, path: str | None = None, hits: dict[str, int] | None = None):
+        self.path = path
+        self.hits = dict(hits or {})
+        self.changed = False
+
+    @classmethod
+    def load(cls, path: str) -> "FormatCache":
+        """Lê o cache; um arquivo ausente ou inválido vira um cache vazio."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                hits = json.load(f)["formats"]
+            hits = {fmt: int(count) for fmt, count in hits.items() if learnable(fmt)}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            hits = {}
+        return cls(path, hits)
+
+    def formats(self) -> list[str]:
+        ranked = sorted(self.hits.items(), key=lambda item: (-item[1], item[0]))
+        return [fmt for fmt, _count in ranked[:MAX_LEARNED_FORMATS]]
+
+    def record(self, fmt: str, count: int):
+        if count and learnable(fmt):
+            self.hits[fmt] = self.hits.get(fmt, 0) + int(count)
+            self.changed = True
+
+    def save(self):
+        if not (self.path and self.changed):
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        content = json.dumps({"formats": self.hits}, ensure_ascii=False, indent=2)
+        atomic_write(self.path, content.encode("utf-8"))
+        self.changed = False
+
+
+_active = FormatCache()
+
+
+def get_format_cache() -> FormatCache:
+    """Cache de formatos ativo; sem `use_format_cache`, só em memória."""
+    return _active
+
+
+@contextmanager
+def use_format_cache(path: str = FORMAT_CACHE_PATH) -> Iterator[FormatCache]:
+    """Carrega o cache de `path` durante o bloco e grava o que foi aprendido."""
+    global _active
+    previous = _active
+    _active = FormatCache.load(path)
+    try:
+        yield _active
+    finally:
+        _active.save()
+        _active = previous
+
+
+class ParsedTimestamps(NamedTuple):
+    """Datas convertidas (NaT onde inválidas) e quantas linhas cada camada resolveu."""
+
+    values: "np.ndarray"
+    tiers: dict[str, int]
+
+
+def column_format(values: "np.ndarray") -> str | None:
+    """
+    Formato que o pandas deduz para a coluna: o do primeiro valor não nulo,
+    se for texto. None faz o pandas analisar cada valor com o dateutil.
+    """
+    import pandas as pd
+    from pandas.tseries.api import guess_datetime_format
+
+    for value in values:
+        if pd.isna(value) or value in NOT_INFERRED:
+            continue
+        if type(value) is not str:
+            return None
+        with warnings.catch_warnings():
+            # Avisos de formatos mês/dia ou ano primeiro: o formato vale assim mesmo
+            warnings.simplefilter("ignore", UserWarning)
+            return guess_datetime_format(value, dayfirst=True)
+    return None
+
+
+def parse_timestamp_column(
+    values, cache: FormatCache | None = None
+) -> ParsedTimestamps:
+    """
+    Converte o 'Carimbo de data/hora' com o mesmo resultado de
+    `pd.to_datetime(values, dayfirst=True, errors="coerce")`, em camadas:
+
+    - exact: passada vetorizada no formato da coluna (normalmente o do Forms);
+    - learned: formatos aprendidos, só quando o pandas analisaria valor a valor;
+    - strptime: sobras no formato da coluna que não têm largura fixa (ex.: "9:05:00");
+    - dateutil: o que restar, valor a valor, como o pandas faria.
+    """
+    import numpy as np
+    import pandas as pd
+
+    cache = cache if cache is not None else get_format_cache()
+    column = np.asarray(values, dtype=object)
+    tiers = dict.fromkeys(TIERS, 0)
+    fmt = column_format(column)
+
+    # Só texto passa pelas camadas vetorizadas (checagem rápida se a coluna é toda texto)
+    all_text = pd.api.types.infer_dtype(column, skipna=False) == "string"
+    if all_text:
+        is_text = np.ones(len(column), dtype=bool)
+    else:
+        is_text = np.fromiter((type(v) is str for v in column), bool, len(column))
+    parsed = np.full(len(column), np.datetime64("NaT"), dtype="datetime64[ns]")
+    pending = np.ones(len(column), dtype=bool)
+
+    def apply(tier: str, layout: Layout | None) -> int:
+        if layout is None or not pending.any():
+            return 0
+        resolved = 0
+        # Em blocos: o texto de largura fixa (4 bytes por caractere) fica pequeno
+        for start in range(0, len(column), CHUNK_ROWS):
+            indices = start + np.flatnonzero(pending[start : start + CHUNK_ROWS])
+            if not len(indices):
+                continue
+            values = column[indices]
+            text = values if all_text else np.where(is_text[indices], values, "")
+            moments, ok = parse_fixed(text.astype(str), layout)
+            parsed[indices[ok]] = moments[ok]
+            pending[indices[ok]] = False
+            resolved += int(ok.sum())
+        tiers[tier] += resolved
+        return resolved
+
+    def rest(tier: str, **options) -> "np.ndarray | None":
+        # Índices resolvidos pela camada, ou None se o pandas não devolveu datetime64[ns]
+        indices = np.flatnonzero(pending)
+        if not len(indices):
+            return indices
+        result = pd.to_datetime(pd.Series(column[indices]), errors="coerce", **options)
+        if result.dtype != "datetime64[ns]":
+            return None
+        parsed[indices] = result.to_numpy()
+        tiers[tier] += int(result.notna().sum())
+        return indices[result.notna().to_numpy()]
+
+    if fmt is not None:
+        # O pandas aplicaria `fmt` à coluna inteira; o que não casar vira NaT
+        apply("exact", fixed_layout(fmt))
+        resolved = rest("strptime", format=fmt)
+    else:
+        apply("exact", fixed_layout(PINNED_FORMAT))
+        for learned in cache.formats():
+            cache.record(learned, apply("learned", fixed_layout(learned)))
+        resolved = rest("dateutil", format="mixed", dayfirst=True)
+        if resolved is not None:
+            learn_formats(column[resolved[is_text[resolved]]], cache)
+
+    if resolved is None:
+        # Fusos horários ou tipos mistos: devolve a conversão original
+        legacy = pd.to_datetime(pd.Series(column), dayfirst=True, errors="coerce")
+        tiers = dict.fromkeys(TIERS, 0)
+        tiers["strptime" if fmt else "dateutil"] = int(legacy.notna().sum())
+        return ParsedTimestamps(legacy.to_numpy(), tiers)
+    return ParsedTimestamps(parsed, tiers)
+
+
+def learn_formats(resolved: "np.ndarray", cache: FormatCache):
+    """Registra os formatos das datas que só o dateutil conseguiu converter."""
+    from pandas.tseries.api import guess_datetime_format
+
+    counts: dict[str, int] = {}
+    with warnings.catch_warnings():
+        # Avisos de formatos mês/dia: esses não são aprendidos (`learnable`)
+        warnings.simplefilter("ignore", UserWarning)
+        for value in dict.fromkeys(resolved[:LEARN_SAMPLE].tolist()):
+            fmt = guess_datetime_format(value, dayfirst=True)
+            if fmt != PINNED_FORMAT and learnable(fmt):
+                counts[fmt] = counts.get(fmt, 0) + 1
+    for fmt, count in counts.items():
+        cache.record(fmt, count)
@@ -1,39 +1,105 @@
+import argparse
 import json
 import os
-import unicodedata
-
-import gspread
-import pandas as pd
-from google.oauth2.service_account import Credentials
-from pandas.api.types import is_numeric_dtype
+import sys
+from contextlib import nullcontext
+
+from api_usage import track_api_usage
+from campaigns import CAMPAIGNS_PATH, Campaign, load_campaigns, run_campaigns
+from donor_patches import write_with_patches
+from donor_payload import (
+    DEFAULT_ENGINE,
+    ENGINES,
+    LATEST_N_DONORS,
+    REQUIRED_COLUMNS,
+    TOP_N_DONORS,
+    build_donor_payload,
+    clean_donation_rows,
+    column_rows,
+    empty_payload,
+    format_donor_lists,
+)
+from donor_snapshot import (
+    SNAPSHOT_DIR,
+    DonationSnapshot,
+    build_payload_from_snapshot,
+    cleaning_fingerprint,
+)
+from donor_state import make_checkpoint, row_hash
+from donor_store import DonorStore
+from event_spool import COALESCE_WINDOW, SPOOL_PATH, CoalescingRunner, EventSpool
+from fuzzy_dedup import ALIAS_TABLE_PATH, get_alias_table, use_alias_table
+from instrumentation import Metrics, collect, get_metrics
+from output_writer import write_if_changed
+from publish import PublishOptions, publish_artifacts, use_publish_options
+from rollups import TIMESERIES_PATH, day_of, format_timeseries
+from sheet_source import (
+    LocalSheetSource,
+    WorksheetSource,
+)
+from timestamps import use_format_cache
+from weighting import WEIGHTING_PATH, load_weighting, use_weighting
+from word_cloud_layout import write_word_cloud_layout
 
 # --- CONFIGURAÇÕES ---
 # Nome da planilha no Google Drive
 GOOGLE_SHEET_NAME = "Livro de Ouro - Turma de Medicina UFPB 110 (respostas)"
 # Nome da aba/worksheet dentro da planilha
 WORKSHEET_NAME = "Respostas ao formulário 1"
-# Número de doadores para as listas de "maiores" e "últimos"
-TOP_N_DONORS = 10
-LATEST_N_DONORS = 10
-# Faixa de tamanho da fonte para a nuvem de palavras (min, max)
-FONT_SIZE_RANGE = (12, 64)
 # Arquivo de saída
 OUTPUT_JSON_PATH = "donors.json"
+OUTPUT_FILE = "public/" + OUTPUT_JSON_PATH
+# Código de saída com `--exit-code` quando o JSON gerado não mudou
+EXIT_UNCHANGED = 3
+# Banco SQLite com os agregados de doadores e o checkpoint do modo incremental
+STORE_DB_PATH = ".cache/donors.sqlite3"
+# Campos da chave da conta de serviço sem os quais a autenticação nem começa
+SERVICE_ACCOUNT_KEYS = ("client_email", "private_key")
+# Variável com o endereço de um emulador local das APIs do Google (sem
+# credenciais), ex.: o servidor usado por benchmarks/replay_day.py
+EMULATOR_URL_ENV = "SHEETS_EMULATOR_URL"
+
+
+def service_account_info() -> dict:
+    """
+    Lê e valida a chave da conta de serviço da variável de ambiente GCP_SA_KEY,
+    sem importar as bibliotecas do Google.
+    """
+    credentials_json = os.getenv("GCP_SA_KEY")
+    if not credentials_json:
+        raise ValueError("GCP_SA_KEY environment variable not found")
+
+    try:
+        credentials_dict = json.loads(credentials_json)
+    except ValueError as e:
+        raise ValueError(f"GCP_SA_KEY não é um JSON válido: {e}") from e
+    if not isinstance(credentials_dict, dict):
+        raise TypeError("GCP_SA_KEY deve ser um objeto JSON.")
+    missing = [key for key in SERVICE_ACCOUNT_KEYS if not credentials_dict.get(key)]
+    if missing:
+        raise ValueError(f"GCP_SA_KEY sem os campos: {', '.join(missing)}")
+    return credentials_dict
 
 
 def setup_gspread_credentials():
     """
     Configura as credenciais do Google Sheets a partir da variável de ambiente.
-    Retorna o cliente gspread autenticado.
+    Retorna o cliente gspread autenticado. Com SHEETS_EMULATOR_URL definida,
+    usa o emulador local nesse endereço, sem credenciais.
     """
-    credentials_json = os.getenv("GCP_SA_KEY")
-    if not credentials_json:
-        raise ValueError("GCP_SA_KEY environment variable not found")
+    emulator_url = os.getenv(EMULATOR_URL_ENV)
+    if emulator_url:
+        from sheets_client import emulator_client
 
-    # Parse the JSON credentials
-    import json
+        print(f"Usando o emulador do Google Sheets em {emulator_url}.")
+        return emulator_client(emulator_url)
 
-    credentials_dict = json.loads(credentials_json)
+    # As bibliotecas do Google só são carregadas quando a planilha é usada
+    import gspread
+    from google.oauth2.service_account import Credentials
+    from sheets_client import rate_limited_client
+
+    credentials_dict = service_account_info()
 
     # Define the required scopes for Google Sheets and Drive
     scopes = [
@@ -41,204 +107,562 @@ def setup_gspread_credentials():
         "https://www.googleapis.com/auth/drive.readonly",
     ]
 
-    # Create credentials with proper scopes and authorize gspread client
+    # Create credentials with proper scopes and authorize gspread client; every
+    # request goes through the shared token bucket and retries 429/5xx errors
     credentials = Credentials.from_service_account_info(credentials_dict, scopes=scopes)
-    gc = gspread.authorize(credentials)
+    gc = gspread.authorize(credentials, http_client=rate_limited_client())
 
     print("Credenciais do Google configuradas com sucesso.")
     return gc
 
 
-def main():
+def fetch_new_rows(
+    source, checkpoint: dict | None
+) -> tuple[dict, int, list | None, bool]:
     """
-    Função principal que orquestra o processo de busca, processamento
-    e salvamento dos dados de doadores.
+    Busca apenas as linhas posteriores ao checkpoint, projetando só as colunas
+    essenciais. Se não houver checkpoint ou o hash da linha do checkpoint não
+    bater mais (linha editada ou removida), refaz a leitura completa.
+    Retorna as colunas novas, o número da última linha lida, as posições das
+    colunas (None se a planilha estiver vazia) e se houve leitura completa.
     """
-    print("Iniciando o processo de atualização de dados dos doadores...")
-
-    try:
-        # --- 0. CONFIGURAÇÃO DAS CREDENCIAIS ---
-        gc = setup_gspread_credentials()
-
-        # --- 1. AUTENTICAÇÃO E BUSCA DE DADOS ---
-        # Abre a planilha e acessa a worksheet específica
-        print(f"Acessando a planilha: '{GOOGLE_SHEET_NAME}'")
-        spreadsheet = gc.open(GOOGLE_SHEET_NAME)
-        worksheet = spreadsheet.worksheet(WORKSHEET_NAME)
-
-        # Obtém todos os dados como lista de dicionários
-        records = worksheet.get_all_records()
-
-        # Converte para DataFrame do Pandas
-        df = pd.DataFrame(records)
-        print(f"Foram encontradas {len(df)} linhas na planilha.")
-
-        if df.empty:
-            print("A planilha está vazia. Gerando arquivo JSON vazio.")
-            create_empty_json()
-            return
-
-        # --- 2. LIMPEZA E VALIDAÇÃO DOS DADOS ---
-        # Garante que as colunas essenciais existem
-        required_cols = [
-            "Carimbo de data/hora",
-            "Nome",
-            "Valor",
-        ]
-        if not all(col in df.columns for col in required_cols):
-            raise ValueError(
-                "A planilha não contém as colunas necessárias: " + str(required_cols)
-            )
-
-        # Remove linhas onde o nome do doador ou o valor da doação estão vazios
-        df.dropna(subset=required_cols, inplace=True)
-
-        # Remove linhas onde os campos de texto estão vazios (apenas espaços em branco)
-        for col in ["Nome"]:
-            if col in df.columns and df[col].dtype in ["object", str, "string"]:
-                df = df[df[col].astype(str).str.strip() != ""]
-
-        # Normaliza os nomes para garantir que variações sejam tratadas como a mesma pessoa
-        # O nome normalizado é usado apenas internamente para agregação
-        # O nome original mais recente será usado para exibição
-        def normalize_name(name: str) -> str:
-            """Normaliza um nome removendo acentos e padronizando formato."""
-            # Normaliza unicode (NFD = decompõe caracteres acentuados)
-            normalized = unicodedata.normalize("NFD", name)
-            # Remove marcas diacríticas (acentos)
-            ascii_name = "".join(
-                char for char in normalized if unicodedata.category(char) != "Mn"
+    if checkpoint is not None:
+        row, positions = checkpoint["row"], checkpoint["positions"]
+        columns = source.fetch_columns(start_row=row, positions=positions)
+        first_row = [values[0] for values in columns.values() if values]
+        if first_row and row_hash(first_row) == checkpoint["hash"]:
+            new_columns = {name: values[1:] for name, values in columns.items()}
+            new_rows = column_rows(new_columns)
+            print(f"Checkpoint válido na linha {row}: {new_rows} linhas novas.")
+            return new_columns, row + new_rows, positions, False
+        print("O checkpoint não confere com a planilha. Refazendo leitura completa.")
+
+    positions = source.resolve()
+    if positions is None:
+        return {}, 0, None, True
+    columns = source.fetch_columns(start_row=2, positions=positions)
+    return columns, 1 + column_rows(columns), positions, True
+
+
+def last_row_cells(columns: dict[str, list]) -> list:
+    """Células da última linha de um conjunto de colunas."""
+    return [values[-1] for values in columns.values()]
+
+
+def build_donor_lists_from_store(store: DonorStore) -> dict:
+    """Gera o JSON final com consultas indexadas ao banco de agregados."""
+    with get_metrics().stage("ranking") as stage:
+        ranked_names = store.ranked_donors()
+        amounts = store.ranked_totals()
+        top_names = store.top_donors(TOP_N_DONORS)
+        latest_names = store.latest_donors(LATEST_N_DONORS)
+        stage.rows_out = len(ranked_names)
+    return format_donor_lists(ranked_names, top_names, latest_names, amounts)
+
+
+def run_incremental(
+    source, db_path: str = STORE_DB_PATH, engine: str = DEFAULT_ENGINE
+) -> dict | None:
+    """
+    Processa apenas as respostas novas desde a última execução e as mescla
+    aos agregados persistidos (por doador e por dia). Retorna o JSON final, ou None se não houver doações.
+    """
+    metrics = get_metrics()
+    with DonorStore(db_path) as store:
+        checkpoint = store.get_meta("checkpoint")
+        with metrics.stage("fetch") as stage:
+            columns, last_row, positions, full = fetch_new_rows(source, checkpoint)
+            stage.rows_out = column_rows(columns)
+        if full:
+            store.clear()
+
+        if column_rows(columns):
+            new_donations = clean_donation_rows(columns, engine)
+            print(f"Após limpeza e validação, {len(new_donations)} doações novas.")
+            with metrics.stage("store", rows_in=len(new_donations)) as stage:
+                store.upsert_donations(new_donations)
+                stage.rows_out = store.donor_count()
+            with metrics.stage("rollups", rows_in=len(new_donations)) as stage:
+                store.upsert_daily(new_donations)
+                stage.rows_out = len({day_of(row[3]) for row in new_donations})
+            # O checkpoint aponta para a última linha lida, válida ou não
+            checkpoint = make_checkpoint(last_row, last_row_cells(columns))
+        elif full and last_row:
+            checkpoint = make_checkpoint(last_row, REQUIRED_COLUMNS)
+
+        if last_row:
+            store.set_meta("checkpoint", {**checkpoint, "positions": positions})
+
+        if store.donor_count() == 0:
+            return None
+
+        print(f"Foram encontrados {store.donor_count()} doadores únicos.")
+        return build_donor_lists_from_store(store)
+
+
+def run_snapshot(
+    source, path: str = SNAPSHOT_DIR, engine: str = DEFAULT_ENGINE
+) -> dict | None:
+    """
+    Carrega as doações já limpas do snapshot colunar, limpa só as linhas novas
+    da planilha e gera o JSON final a partir de todas. Se a limpeza mudou desde
+    o snapshot ou o checkpoint não confere, refaz a leitura completa.
+    Retorna o JSON final, ou None se não houver doações.
+    """
+    metrics = get_metrics()
+    fingerprint = cleaning_fingerprint(engine, fuzzy=get_alias_table() is not None)
+    snapshot = DonationSnapshot.open(path, fingerprint)
+    with metrics.stage("fetch") as stage:
+        columns, last_row, positions, full = fetch_new_rows(source, snapshot.checkpoint)
+        stage.rows_out = column_rows(columns)
+    if full:
+        snapshot.clear()
+
+    new_rows = column_rows(columns)
+    if new_rows:
+        new_donations = clean_donation_rows(columns, engine)
+        print(f"Após limpeza e validação, {len(new_donations)} doações novas.")
+        with metrics.stage("snapshot", rows_in=len(new_donations)) as stage:
+            checkpoint = make_checkpoint(last_row, last_row_cells(columns))
+            snapshot.append(
+                new_donations,
+                first_row=last_row - new_rows + 1,
+                last_row=last_row,
+                checkpoint={**checkpoint, "positions": positions},
             )
-            # Remove espaços extras, converte para maiúsculas
-            return " ".join(ascii_name.upper().split())
-
-        # Cria coluna com nome normalizado para agregação (uso interno)
-        df["NomeNormalizado"] = df["Nome"].astype(str).str.strip().apply(normalize_name)
-        # Mantém o nome original para exibição
-        df["Nome"] = df["Nome"].astype(str).str.strip()
-
-        # Converte 'Valor' para numérico, tratando erros
-        df["Valor"] = pd.to_numeric(
-            df["Valor"].astype(str).str.replace(".", "").replace(",", "."),
-            errors="coerce",
+            stage.rows_out = len(snapshot)
+    elif full and last_row:
+        checkpoint = make_checkpoint(last_row, REQUIRED_COLUMNS)
+        snapshot.append(
+            [], last_row + 1, last_row, {**checkpoint, "positions": positions}
         )
 
-        # Valida se a coluna é numérica após a conversão
-        if not is_numeric_dtype(df["Valor"]):
-            raise TypeError(
-                "A coluna 'Valor' não pôde ser convertida para um tipo numérico."
-            )
+    payload = build_payload_from_snapshot(snapshot)
+    if payload is not None:
+        print(f"Foram encontrados {len(payload['wordCloud'])} doadores únicos.")
+    return payload
 
-        # Remove linhas onde a conversão falhou (resultando em NaT)
-        df.dropna(subset=["Valor"], inplace=True)  # type: ignore
 
-        # Garante que 'Carimbo de data/hora' seja do tipo datetime para ordenação
-        df["Carimbo de data/hora"] = pd.to_datetime(
-            df["Carimbo de data/hora"], dayfirst=True, errors="coerce"
-        )
+def open_source(csv_path: str | None = None):
+    """
+    Abre a fonte das respostas: a worksheet no Google Sheets ou, se `csv_path`
+    for informado, uma exportação local (CSV ou JSON) com a mesma interface.
+    """
+    if csv_path:
+        print(f"Lendo exportação local: '{csv_path}'")
+        if csv_path.endswith(".json"):
+            return LocalSheetSource.from_json(csv_path)
+        return LocalSheetSource.from_csv(csv_path)
 
-        df.dropna(subset=["Carimbo de data/hora"], inplace=True)  # type: ignore
+    from sheets_client import open_spreadsheet
 
-        print(f"Após limpeza e validação, restaram {len(df)} doações válidas.")
+    # --- 0. CONFIGURAÇÃO DAS CREDENCIAIS ---
+    gc = setup_gspread_credentials()
 
-        if df.empty:
-            print(
-                "Nenhuma doação válida encontrada após a limpeza. Gerando arquivo JSON vazio."
-            )
-            create_empty_json()
-            return
-
-        # --- 3. PROCESSAMENTO E AGREGAÇÃO ---
-        # Ordena por data para garantir que o nome mais recente seja preservado
-        df = df.sort_values(by="Carimbo de data/hora", ascending=True)
-
-        # Agrega doações pelo nome normalizado para somar os valores totais
-        # Usa o nome original mais recente para exibição
-        aggregated_donors: pd.DataFrame = df.groupby(
-            "NomeNormalizado", as_index=False
-        ).agg(
-            {
-                "Nome": "last",  # Pega o nome original da doação mais recente
-                "Valor": "sum",  # Soma todos os valores
-            }
-        )
+    # --- 1. AUTENTICAÇÃO E BUSCA DE DADOS ---
+    # Abre a planilha (pela chave salva, sem busca no Drive) e acessa a worksheet
+    print(f"Acessando a planilha: '{GOOGLE_SHEET_NAME}'")
+    spreadsheet = open_spreadsheet(gc, GOOGLE_SHEET_NAME)
+    return WorksheetSource(spreadsheet.worksheet(WORKSHEET_NAME))
 
-        print(f"Foram encontrados {len(aggregated_donors)} doadores únicos.")
-
-        # --- 4. GERAÇÃO DAS LISTAS ---
-        # Lista dos Maiores Doadores (baseado nos valores agregados)
-        top_donors_df: pd.DataFrame = aggregated_donors.nlargest(TOP_N_DONORS, "Valor")
-        top_donors_list = [
-            {
-                "name": row["Nome"],
-            }  # "amount": row["Valor"]}
-            for index, row in top_donors_df.iterrows()
-        ]
-
-        # Lista dos Últimos Doadores (baseado no Carimbo de data/hora, pegando doadores únicos)
-        latest_donors_df: pd.DataFrame = (
-            df.sort_values(by="Carimbo de data/hora", ascending=False)  # type: ignore
-            .drop_duplicates(subset=["Nome"])
-            .head(LATEST_N_DONORS)
-        )
-        latest_donors_list = [
-            {
-                "name": row["Nome"],
-            }  # "amount": row["Valor"]}
-            for _index, row in latest_donors_df.iterrows()
-        ]
-
-        # --- 5. NORMALIZAÇÃO DE PESOS PARA A NUVEM DE PALAVRAS (TIERED) ---
-        # Ordena doadores por Valor (maior para menor)
-        sorted_donors = aggregated_donors.sort_values(
-            by="Valor", ascending=False
-        ).reset_index(drop=True)
-        weights = []
-        for idx in range(len(sorted_donors)):
-            if idx == 0:
-                weights.append(5)
-            elif idx < 4:
-                weights.append(4)
-            elif idx < 10:
-                weights.append(3)
-            elif idx < 20:
-                weights.append(2)
+
+def open_campaign_source(campaign: Campaign, gc=None):
+    """Fonte de uma campanha; as planilhas são abertas com o cliente `gc` compartilhado."""
+    from sheets_client import open_spreadsheet
+
+    if campaign.csv:
+        return open_source(campaign.csv)
+    print(f"[{campaign.id}] Acessando a planilha: '{campaign.spreadsheet}'")
+    spreadsheet = open_spreadsheet(gc, campaign.spreadsheet)
+    return WorksheetSource(spreadsheet.worksheet(campaign.worksheet))
+
+
+def main_campaigns(
+    config_path: str = CAMPAIGNS_PATH, engine: str = DEFAULT_ENGINE
+) -> bool:
+    """
+    Processa todas as campanhas do arquivo de configuração em paralelo e grava
+    o JSON de cada uma e o ranking combinado. Retorna True se algum arquivo mudou.
+    """
+    print(f"Iniciando o processamento das campanhas de '{config_path}'...")
+    config = load_campaigns(config_path)
+
+    gc = None
+    if any(not campaign.csv for campaign in config.campaigns):
+        # Um único cliente autorizado, compartilhado pelas threads de download
+        with get_metrics().stage("auth"):
+            gc = setup_gspread_credentials()
+
+    # Cada campanha é gravada como o donors.json: versionada, com patches e
+    # os artefatos de publicação (uma delas costuma ser o próprio donors.json)
+    return run_campaigns(
+        config,
+        lambda campaign: open_campaign_source(campaign, gc),
+        engine=engine,
+        write=write_json,
+    )
+
+
+def main(
+    incremental: bool = False,
+    csv_path: str | None = None,
+    rebuild: bool = False,
+    engine: str = DEFAULT_ENGINE,
+    snapshot: bool = False,
+) -> bool:
+    """
+    Função principal que orquestra o processo de busca, processamento
+    e salvamento dos dados de doadores.
+    Retorna True se `public/donors.json` (ou, no modo incremental, a série
+    diária `public/timeseries.json`) foi alterado.
+    """
+    print("Iniciando o processo de atualização de dados dos doadores...")
+
+    metrics = get_metrics()
+    try:
+        with metrics.stage("auth"):
+            source = open_source(csv_path)
+
+        if rebuild and snapshot:
+            # Um snapshot vazio faz a leitura completa abaixo recriá-lo
+            DonationSnapshot(SNAPSHOT_DIR).save()
+        elif rebuild:
+            # Descarta agregados e checkpoint; a leitura completa abaixo os recria
+            with DonorStore(STORE_DB_PATH) as store:
+                store.clear()
+            incremental = True
+
+        if incremental or snapshot:
+            timeseries_changed = False
+            if snapshot:
+                final_json_data = run_snapshot(source, engine=engine)
             else:
-                weights.append(1)
-        sorted_donors["weight"] = weights
+                final_json_data = run_incremental(source, engine=engine)
+                timeseries_changed = write_timeseries()
+            if final_json_data is None:
+                print("Nenhuma doação válida encontrada. Gerando arquivo JSON vazio.")
+                return create_empty_json() or timeseries_changed
+            return write_json(final_json_data) or timeseries_changed
 
-        # Prepara os dados para a nuvem de palavras no formato {text, value}
-        word_cloud_data = [
-            {"text": row["Nome"], "value": row["weight"]}
-            for index, row in sorted_donors.iterrows()
-        ]
+        # Baixa apenas as colunas usadas, em formato colunar
+        with metrics.stage("fetch") as stage:
+            columns = source.fetch_columns()
+            stage.rows_out = column_rows(columns)
+        print(f"Foram encontradas {column_rows(columns)} linhas na planilha.")
 
-        # --- 6. ESTRUTURAÇÃO E SALVAMENTO DO JSON FINAL ---
-        final_json_data = {
-            "wordCloud": word_cloud_data,
-            "topDonors": top_donors_list,
-            "latestDonations": latest_donors_list,
-        }
+        # --- 2 A 5. LIMPEZA, AGREGAÇÃO, LISTAS E PESOS ---
+        final_json_data = build_donor_payload(columns, engine)
+
+        if final_json_data == empty_payload():
+            print("Nenhuma doação válida encontrada. Gerando arquivo JSON vazio.")
+            return create_empty_json()
 
-        with open("public/" + OUTPUT_JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(final_json_data, f, ensure_ascii=False, indent=4)
+        print(f"Foram encontrados {len(final_json_data['wordCloud'])} doadores únicos.")
 
-        print(f"Arquivo '{OUTPUT_JSON_PATH}' gerado com sucesso.")
+        # --- 6. ESTRUTURAÇÃO E SALVAMENTO DO JSON FINAL ---
+        return write_json(final_json_data)
 
     except Exception as e:
         print(f"Ocorreu um erro: {e}")
-        # Em caso de erro, cria um arquivo JSON vazio para não quebrar o site
-        create_empty_json()
-        raise e
+        # Em caso de erro, mantém o último JSON válido; sem ele, cria um vazio
+        # para não quebrar o site
+        keep_last_known_good()
+        raise
+
+
+def run_coalesced(
+    window: float = COALESCE_WINDOW,
+    csv_path: str | None = None,
+    engine: str = DEFAULT_ENGINE,
+    spool_path: str = SPOOL_PATH,
+) -> bool:
+    """
+    Enfileira o evento atual e, se nenhum outro worker estiver ativo, esvazia
+    a fila rodando o pipeline incremental uma vez por lote de eventos.
+    Retorna True se algum lote alterou `public/donors.json`.
+    """
+    spool = EventSpool(spool_path)
+    spool.append({"source": os.getenv("GITHUB_EVENT_NAME", "manual")})
+
+    changes = []
+    runner = CoalescingRunner(
+        spool,
+        run=lambda events: changes.append(
+            main(incremental=True, csv_path=csv_path, engine=engine)
+        ),
+        window=window,
+    )
+    batches = runner.drain_all()
+    if batches is None:
+        print("Outro worker já está processando a fila; evento enfileirado.")
+    elif not batches:
+        print("Fila de eventos vazia; nada a processar.")
+    return any(changes)
+
+
+def write_json(final_json_data: dict, path: str = OUTPUT_FILE) -> bool:
+    """
+    Salva o JSON final consumido pelo frontend de forma atômica e só se o
+    conteúdo mudou, com o patch em relação à versão anterior
+    (`donor_patches`), o layout pré-calculado da nuvem de palavras em
+    `donors.layout.json` e os artefatos de publicação (`publish`).
+    Retorna True se o arquivo ou algum desses artefatos foi regravado.
+    """
+    name = os.path.basename(path)
+    with get_metrics().stage("write"):
+        changed = write_with_patches(final_json_data, path)
+    # Recalculado só quando as palavras posicionadas mudam
+    layout_changed = write_word_cloud_layout(final_json_data, path)
+    # Minificados e pré-comprimidos; com o JSON igual, só se faltar algum
+    _artifacts, artifacts_changed = publish_artifacts(
+        final_json_data, path, written=changed
+    )
+    if changed:
+        print(f"Arquivo '{name}' gerado com sucesso.")
+    elif layout_changed or artifacts_changed:
+        print(f"Arquivo '{name}' sem alterações; artefatos de publicação atualizados.")
+    else:
+        print(f"Arquivo '{name}' sem alterações; nada a gravar.")
+    return changed or artifacts_changed or layout_changed
+
+
+def write_timeseries(db_path: str = STORE_DB_PATH, path: str = TIMESERIES_PATH) -> bool:
+    """
+    Grava a série diária (um item por dia) a partir dos agregados por dia do
+    banco, só se o conteúdo mudou. Retorna True se o arquivo foi regravado.
+    """
+    with DonorStore(db_path) as store:
+        buckets = store.daily()
+    with get_metrics().stage("write", rows_in=len(buckets)):
+        changed = write_if_changed(format_timeseries(buckets), path)
+    if changed:
+        print(f"Série diária '{path}' gerada com {len(buckets)} dias.")
+    return changed
 
 
-def create_empty_json():
+def create_empty_json() -> bool:
     """Cria um arquivo JSON vazio com a estrutura esperada pelo frontend."""
-    empty_data = {"wordCloud": [], "topDonors": [], "latestDonations": []}
-    with open("public/" + OUTPUT_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(empty_data, f, ensure_ascii=False, indent=4)
+    changed = write_json(empty_payload())
     print(f"Arquivo '{OUTPUT_JSON_PATH}' vazio foi criado como fallback.")
+    return changed
+
+
+def keep_last_known_good():
+    """Após uma falha, preserva o último JSON gerado ou cria um vazio se não houver."""
+    if os.path.exists(OUTPUT_FILE):
+        print(f"Mantendo a última versão válida de '{OUTPUT_JSON_PATH}'.")
+    else:
+        create_empty_json()
+
+
+def check_setup(
+    csv_path: str | None = None,
+    campaigns_path: str | None = None,
+    weighting_path: str | None = None,
+) -> list[str]:
+    """
+    Valida a configuração da execução sem processar dados nem importar pandas,
+    numpy ou as bibliotecas do Google: credenciais (estrutura da chave), arquivos
+    de campanhas e pesos, exportação local e pasta de saída. Retorna os problemas.
+    """
+    problems = []
+    needs_credentials = not csv_path
+
+    if campaigns_path is not None:
+        try:
+            config = load_campaigns(campaigns_path)
+        except (OSError, ValueError) as e:
+            problems.append(f"Campanhas: {e}")
+        else:
+            needs_credentials = False
+            for campaign in config.campaigns:
+                if not campaign.csv:
+                    needs_credentials = True
+                elif not os.path.isfile(campaign.csv):
+                    problems.append(
+                        f"Campanha '{campaign.id}': arquivo '{campaign.csv}' não existe."
+                    )
+
+    if csv_path and campaigns_path is None:
+        try:
+            if csv_path.endswith(".json"):
+                LocalSheetSource.from_json(csv_path).resolve()
+            else:
+                LocalSheetSource.from_csv(csv_path).resolve()
+        except (OSError, ValueError) as e:
+            problems.append(f"Exportação local: {e}")
+
+    if weighting_path is not None:
+        try:
+            load_weighting(weighting_path)
+        except (OSError, ValueError) as e:
+            problems.append(f"Pesos: {e}")
+
+    if needs_credentials and not os.getenv(EMULATOR_URL_ENV):
+        try:
+            info = service_account_info()
+        except (ValueError, TypeError) as e:
+            problems.append(f"Credenciais: {e}")
+        else:
+            if "PRIVATE KEY" not in info["private_key"]:
+                problems.append("Credenciais: 'private_key' não está no formato PEM.")
+
+    output_dir = os.path.dirname(OUTPUT_FILE)
+    if not os.path.isdir(output_dir):
+        problems.append(f"Saída: a pasta '{output_dir}' não existe.")
+    return problems
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Atualiza public/donors.json a partir da planilha de respostas."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Processa apenas as respostas novas desde o último checkpoint.",
+    )
+    parser.add_argument(
+        "--csv",
+        metavar="ARQUIVO",
+        help="Lê uma exportação local (CSV ou JSON) em vez do Google Sheets.",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help=f"Recria o banco de agregados ({STORE_DB_PATH}) ou, com --snapshot, "
+        "o snapshot das doações a partir da planilha.",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help=f"Guarda as doações limpas em {SNAPSHOT_DIR} e, nas próximas "
+        "execuções, limpa só as linhas novas da planilha.",
+    )
+    parser.add_argument(
+        "--campaigns",
+        nargs="?",
+        const=CAMPAIGNS_PATH,
+        metavar="ARQUIVO",
+        help="Processa em paralelo todas as campanhas do arquivo (padrão: "
+        f"{CAMPAIGNS_PATH}), gravando o JSON de cada uma e o ranking combinado.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=DEFAULT_ENGINE,
+        help="Motor de processamento: pandas ou lean (sem pandas, partida rápida).",
+    )
+    parser.add_argument(
+        "--coalesce",
+        nargs="?",
+        type=float,
+        const=COALESCE_WINDOW,
+        metavar="SEGUNDOS",
+        help="Agrupa eventos recebidos dentro da janela em uma única execução "
+        f"incremental (padrão: {COALESCE_WINDOW:g}s).",
+    )
+    parser.add_argument(
+        "--fuzzy-merge",
+        action="store_true",
+        help="Une variações do nome do mesmo doador (partículas, sufixos, erros de "
+        f"digitação), guardando as uniões em {ALIAS_TABLE_PATH}. Ao ativar, use "
+        "junto com --rebuild para reagregar os doadores já salvos.",
+    )
+    parser.add_argument(
+        "--weighting",
+        nargs="?",
+        const=WEIGHTING_PATH,
+        metavar="ARQUIVO",
+        help="Lê do arquivo (padrão: "
+        f"{WEIGHTING_PATH}) as faixas de peso da nuvem de palavras (posição, "
+        "percentil ou escala log do total) e o limite de palavras.",
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Publica também um JSON crítico (maiores e últimos doadores) e um "
+        "da nuvem de palavras, minificados e pré-comprimidos.",
+    )
+    parser.add_argument(
+        "--exit-code",
+        action="store_true",
+        help=f"Sai com código {EXIT_UNCHANGED} se o JSON gerado não mudou.",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Só valida credenciais e arquivos de configuração, sem ler a planilha "
+        "nem importar pandas/numpy/gspread.",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="ARQUIVO",
+        help="Salva tempo, CPU e linhas de cada etapa em um arquivo JSON.",
+    )
+    parser.add_argument(
+        "--logfmt",
+        action="store_true",
+        help="Imprime as métricas de cada etapa em logfmt (stderr).",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Inclui o pico de memória (tracemalloc) de cada etapa nas métricas.",
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        problems = check_setup(
+            csv_path=args.csv,
+            campaigns_path=args.campaigns,
+            weighting_path=args.weighting,
+        )
+        for problem in problems:
+            print(f"- {problem}")
+        print("Configuração inválida." if problems else "Configuração válida.")
+        sys.exit(1 if problems else 0)
+
+    # Instrumentação só é ativada quando alguma saída de métricas é pedida
+    metrics = None
+    if args.metrics or args.logfmt:
+        metrics = Metrics(trace_memory=args.trace_memory)
+
+    try:
+        # Formatos de data aprendidos ficam em .cache/ entre execuções
+        aliases = use_alias_table() if args.fuzzy_merge else nullcontext()
+        weighting = (
+            use_weighting(load_weighting(args.weighting))
+            if args.weighting
+            else nullcontext()
+        )
+        with (
+            collect(metrics),
+            use_format_cache(),
+            aliases,
+            weighting,
+            use_publish_options(PublishOptions(split=args.split)),
+            track_api_usage(),
+        ):
+            if args.campaigns is not None:
+                changed = main_campaigns(args.campaigns, engine=args.engine)
+            elif args.coalesce is not None:
+                changed = run_coalesced(
+                    window=args.coalesce, csv_path=args.csv, engine=args.engine
+                )
+            else:
+                changed = main(
+                    incremental=args.incremental,
+                    csv_path=args.csv,
+                    rebuild=args.rebuild,
+                    engine=args.engine,
+                    snapshot=args.snapshot,
+                )
+    finally:
+        # Mesmo com erro: as métricas mostram até onde o pipeline chegou
+        if metrics is not None and args.metrics:
+            metrics.write_json(args.metrics)
+        if metrics is not None and args.logfmt:
+            metrics.print_logfmt()
+    if args.exit_code and not changed:
+        sys.exit(EXIT_UNCHANGED)
@@ -0,0 +1,139 @@
+import json
+import math
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Arquivo opcional com a configuração dos pesos da nuvem de palavras
+WEIGHTING_PATH = "weighting.json"
+SCHEMES = ("rank", "percentile", "log")
+
+
+class Weighting(NamedTuple):
+    """
+    Como o peso (`value`) de cada palavra da nuvem é calculado:
+
+    - "rank": faixas por posição no ranking; com `breakpoints` (1, 4, 10, 20)
+      o 1º doador tem peso 5, do 2º ao 4º peso 4, ..., a partir do 21º peso 1.
+    - "percentile": faixas por percentil do ranking; com `percentiles`
+      (1, 5, 20, 50) o 1% do topo tem peso 5, ..., a metade de baixo peso 1.
+    - "log": `levels` níveis na escala logarítmica do total doado, do menor
+      (peso 1) ao maior (peso `levels`).
+
+    Com `max_words`, a nuvem leva só os `max_words` primeiros doadores e um
+    resumo "e mais N doadores" com o restante.
+    """
+
+    scheme: str = "rank"
+    breakpoints: tuple[int, ...] = (1, 4, 10, 20)
+    percentiles: tuple[float, ...] = (1, 5, 20, 50)
+    levels: int = 5
+    max_words: int | None = None
+
+
+def _increasing(values, name: str, path: str) -> tuple:
+    # Tipos checados antes das comparações: texto ou null viram ValueError, não TypeError
+    numbers = isinstance(values, list | tuple) and all(
+        isinstance(v, int | float) and not isinstance(v, bool) for v in values
+    )
+    values = tuple(values) if numbers else ()
+    if not values or any(v <= 0 for v in values) or list(values) != sorted(set(values)):
+        raise ValueError(
+            f"'{name}' em '{path}' deve ser uma lista crescente de números positivos."
+        )
+    return values
+
+
+def load_weighting(path: str = WEIGHTING_PATH) -> Weighting:
+    """
+    Lê a configuração dos pesos, por exemplo:
+
+        {"scheme": "percentile", "percentiles": [1, 5, 20, 50], "max_words": 300}
+
+    Campos ausentes ficam com o padrão de `Weighting`.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    default = Weighting()
+    scheme = data.get("scheme", default.scheme)
+    if scheme not in SCHEMES:
+        raise ValueError(f"Esquema de pesos desconhecido em '{path}': {scheme!r}")
+    levels = data.get("levels", default.levels)
+    if not isinstance(levels, int) or levels < 1:
+        raise ValueError(f"'levels' em '{path}' deve ser um inteiro positivo.")
+    max_words = data.get("max_words")
+    if max_words is not None and (not isinstance(max_words, int) or max_words < 1):
+        raise ValueError(f"'max_words' em '{path}' deve ser um inteiro positivo.")
+    return Weighting(
+        scheme=scheme,
+        breakpoints=_increasing(
+            data.get("breakpoints", default.breakpoints), "breakpoints", path
+        ),
+        percentiles=_increasing(
+            data.get("percentiles", default.percentiles), "percentiles", path
+        ),
+        levels=levels,
+        max_words=max_words,
+    )
+
+
+def tier_weights(
+    count: int, weighting: Weighting, amounts: Sequence[int] | None = None
+) -> list[int]:
+    """
+    Peso de cada posição do ranking (0 = maior doador), em uma passada
+    vetorizada sobre o array de posições. `amounts` (centavos, na ordem do
+    ranking) só é usado pelo esquema "log".
+    """
+    import numpy as np
+
+    if weighting.scheme == "log" and (amounts is None or len(amounts) != count):
+        raise ValueError("O esquema 'log' precisa do total de cada doador.")
+    if not count:
+        return []
+
+    ranks = np.arange(count)
+    if weighting.scheme == "log":
+        scaled = np.log(np.maximum(np.asarray(amounts, dtype=np.float64), 1.0))
+        low, high = scaled.min(), scaled.max()
+        if high == low:
+            return [weighting.levels] * count
+        steps = np.rint((weighting.levels - 1) * (scaled - low) / (high - low))
+        return (1 + steps.astype(np.int64)).tolist()
+
+    if weighting.scheme == "percentile":
+        # Percentis viram posições de corte (pelo menos o 1º doador na faixa do topo)
+        breakpoints = [
+            max(1, math.ceil(count * p / 100)) for p in weighting.percentiles
+        ]
+    else:
+        breakpoints = list(weighting.breakpoints)
+    tiers = np.searchsorted(np.asarray(breakpoints), ranks, side="right")
+    return (len(breakpoints) + 1 - tiers).tolist()
+
+
+def others_summary(count: int) -> dict:
+    """Resumo dos doadores que ficaram fora da nuvem."""
+    noun = "doador" if count == 1 else "doadores"
+    return {"count": count, "text": f"e mais {count} {noun}"}
+
+
+_active = Weighting()
+
+
+def get_weighting() -> Weighting:
+    """Configuração de pesos ativa (por padrão, as faixas por posição)."""
+    return _active
+
+
+@contextmanager
+def use_weighting(weighting: Weighting) -> Iterator[Weighting]:
+    """Ativa `weighting` para os JSONs gerados dentro do bloco."""
+    global _active
+    previous = _active
+    _active = weighting
+    try:
+        yield weighting
+    finally:
+        _active = previous
@@ -0,0 +1,296 @@
+import json
+import math
+import unicodedata
+from typing import NamedTuple
+
+from instrumentation import get_metrics
+from output_writer import content_hash
+from publish import minify, publish_file, remove_variants, variant_path
+
+# Versão do formato de `wordCloudLayout`
+LAYOUT_VERSION = 1
+# Faixa de tamanho da fonte (px) na maior viewport; as menores reduzem o máximo
+FONT_SIZE_RANGE = (12, 64)
+# Palavras posicionadas (o `limit` padrão do WordCloud.vue)
+LAYOUT_WORDS = 90
+# Espaço mínimo, em px, entre palavras (`spacing` do componente)
+SPACING = 1
+# Rotações usadas pelo `rotationFn` do WordCloud.vue
+ROTATIONS = (0, 45, 90, 270, 315)
+# Cada tentativa sem espaço reduz a fonte por este fator ("shrink-to-fit")
+SHRINK = 0.85
+# Resolução (px) da grade de ocupação
+CELL = 2
+
+
+class Breakpoint(NamedTuple):
+    """Tamanho do container da nuvem (80vw x 80vh) em uma viewport de referência."""
+
+    name: str
+    width: int
+    height: int
+    max_font: int
+
+
+BREAKPOINTS = (
+    Breakpoint("sm", 300, 534, 32),  # celular 375x667
+    Breakpoint("md", 614, 819, 48),  # tablet 768x1024
+    Breakpoint("lg", 1152, 720, FONT_SIZE_RANGE[1]),  # desktop 1440x900
+)
+
+# Largura média dos caracteres em em (fonte sem serifa), sem acentos
+NARROW = dict.fromkeys("fijlrtI.,;:'!|()[] ", 0.32)
+WIDE = dict.fromkeys("mwMW", 0.85)
+
+
+def char_width(char: str) -> float:
+    base = unicodedata.normalize("NFKD", char)[:1] or char
+    if base in NARROW:
+        return NARROW[base]
+    if base in WIDE:
+        return WIDE[base]
+    return 0.68 if base.isupper() else 0.56
+
+
+def text_width(text: str, size: float) -> float:
+    """Largura estimada do texto em px (sem medir a fonte real)."""
+    return size * sum(char_width(char) for char in text)
+
+
+def _int32(value: int) -> int:
+    return (value + 2**31) % 2**32 - 2**31
+
+
+def rotation_for(text: str) -> int:
+    """Mesma rotação do `rotationFn` do WordCloud.vue (hash de string do JS)."""
+    value = 0
+    # O JS percorre unidades UTF-16 e converte para int32 antes do `<< 5`
+    units = text.encode("utf-16-le")
+    for index in range(0, len(units), 2):
+        code = int.from_bytes(units[index : index + 2], "little")
+        value = code + _int32(_int32(value) << 5) - value
+    return ROTATIONS[abs(value) % len(ROTATIONS)]
+
+
+def word_boxes(
+    width: float, height: float, rotation: int
+) -> list[tuple[float, float, float, float]]:
+    """
+    Caixas de colisão da palavra, relativas ao centro. Palavras inclinadas
+    viram uma fileira de quadrados ao longo da linha de base, em vez de uma
+    única caixa enorme envolvendo a diagonal.
+    """
+    pad = SPACING / 2
+    if rotation % 180 == 0:
+        half_w, half_h = width / 2 + pad, height / 2 + pad
+        return [(-half_w, -half_h, half_w, half_h)]
+    if rotation % 90 == 0:
+        half_w, half_h = height / 2 + pad, width / 2 + pad
+        return [(-half_w, -half_h, half_w, half_h)]
+
+    angle = math.radians(rotation)
+    cos, sin = math.cos(angle), math.sin(angle)
+    count = max(1, math.ceil(width / height))
+    step = width / count
+    half = (step * abs(cos) + height * abs(sin)) / 2 + pad
+    half_y = (step * abs(sin) + height * abs(cos)) / 2 + pad
+    boxes = []
+    for index in range(count):
+        offset = (index + 0.5) * step - width / 2
+        # y cresce para baixo na tela: rotação horária
+        x, y = offset * cos, offset * sin
+        boxes.append((x - half, y - half_y, x + half, y + half_y))
+    return boxes
+
+
+def spiral_cells(width: int, height: int):
+    """
+    Células de uma espiral de Arquimedes a partir do centro, no formato do
+    container (a mesma do d3-cloud: raio e ângulo crescem 0,1 por passo),
+    sem repetições e na ordem em que a espiral passa por elas.
+    """
+    import numpy as np
+
+    ratio = width / height
+    steps = int(10 * math.hypot(width, height) / 2 / min(ratio, 1.0)) + 1
+    t = np.arange(steps) / 10
+    xs = np.rint((width / 2 + ratio * t * np.cos(t)) / CELL).astype(np.int64)
+    ys = np.rint((height / 2 + t * np.sin(t)) / CELL).astype(np.int64)
+    inside = (xs >= 0) & (xs <= width // CELL) & (ys >= 0) & (ys <= height // CELL)
+    xs, ys = xs[inside], ys[inside]
+    _, first = np.unique(ys * (width // CELL + 1) + xs, return_index=True)
+    first.sort()
+    return xs[first], ys[first]
+
+
+def cell_rects(boxes) -> list[tuple[int, int, int, int]]:
+    """Caixas em células (arredondadas para fora), relativas à célula do centro."""
+    return [
+        (
+            math.floor(x0 / CELL),
+            math.floor(y0 / CELL),
+            math.ceil(x1 / CELL),
+            math.ceil(y1 / CELL),
+        )
+        for x0, y0, x1, y1 in boxes
+    ]
+
+
+class Canvas:
+    """
+    Ocupação do container em células de CELL px. Com a tabela de somas
+    acumuladas, testar todas as posições de uma palavra custa algumas
+    operações vetorizadas, em vez de um teste de colisão por ponto da espiral.
+    """
+
+    def __init__(self, width: int, height: int):
+        import numpy as np
+
+        self.columns = width // CELL
+        self.rows = height // CELL
+        self.occupied = np.zeros((self.rows, self.columns), dtype=np.int32)
+        self.spiral = spiral_cells(width, height)
+        self._sums = None
+
+    def sums(self):
+        import numpy as np
+
+        if self._sums is None:
+            sums = np.zeros((self.rows + 1, self.columns + 1), dtype=np.int32)
+            sums[1:, 1:] = self.occupied.cumsum(axis=0).cumsum(axis=1)
+            self._sums = sums
+        return self._sums
+
+    def free(self, rects):
+        """Máscara (linhas+1 x colunas+1) dos centros em que todas as caixas cabem."""
+        import numpy as np
+
+        sums = self.sums()
+        free = np.ones((self.rows + 1, self.columns + 1), dtype=bool)
+        for a0, b0, a1, b1 in rects:
+            # Centros para os quais a caixa fica dentro do container
+            low_x, high_x = max(0, -a0), min(self.columns, self.columns - a1)
+            low_y, high_y = max(0, -b0), min(self.rows, self.rows - b1)
+            if low_x > high_x or low_y > high_y:
+                return None
+            fits = np.zeros_like(free)
+            ys = slice(low_y, high_y + 1)
+            xs = slice(low_x, high_x + 1)
+            fits[ys, xs] = (
+                sums[low_y + b1 : high_y + b1 + 1, low_x + a1 : high_x + a1 + 1]
+                - sums[low_y + b0 : high_y + b0 + 1, low_x + a1 : high_x + a1 + 1]
+                - sums[low_y + b1 : high_y + b1 + 1, low_x + a0 : high_x + a0 + 1]
+                + sums[low_y + b0 : high_y + b0 + 1, low_x + a0 : high_x + a0 + 1]
+            ) == 0
+            free &= fits
+        return free
+
+    def place(self, rects) -> tuple[int, int] | None:
+        """Primeira célula da espiral em que a palavra cabe, já marcada como ocupada."""
+        free = self.free(rects)
+        if free is None:
+            return None
+        xs, ys = self.spiral
+        hits = free[ys, xs]
+        if not hits.any():
+            return None
+        index = int(hits.argmax())
+        x, y = int(xs[index]), int(ys[index])
+        for a0, b0, a1, b1 in rects:
+            self.occupied[y + b0 : y + b1, x + a0 : x + a1] = 1
+        self._sums = None
+        return x, y
+
+
+def font_sizes(values: list[int], max_font: int) -> list[float]:
+    """Tamanho de cada palavra, linear no peso, de FONT_SIZE_RANGE[0] a `max_font`."""
+    low, high = min(values), max(values)
+    min_font = FONT_SIZE_RANGE[0]
+    if low == high:
+        return [float(max_font)] * len(values)
+    return [min_font + (max_font - min_font) * (v - low) / (high - low) for v in values]
+
+
+def layout_breakpoint(words: list[dict], breakpoint: Breakpoint) -> list[list]:
+    """
+    Posiciona as palavras (maiores primeiro, na ordem do ranking) e retorna
+    `[índice, x, y, fonte, rotação]` com o centro da palavra em px. Palavras
+    que não cabem encolhem; as que não cabem nem no tamanho mínimo ficam de fora.
+    """
+    canvas = Canvas(breakpoint.width, breakpoint.height)
+    sizes = font_sizes([word["value"] for word in words], breakpoint.max_font)
+    placed = []
+    for index, (word, size) in enumerate(zip(words, sizes, strict=True)):
+        rotation = rotation_for(word["text"])
+        # Começa em um tamanho em que a palavra cabe na largura do container
+        fit = 0.95 * breakpoint.width / max(text_width(word["text"], 1.0), 1e-9)
+        size = min(size, fit)
+        while size >= FONT_SIZE_RANGE[0] * SHRINK**2:
+            size = round(size, 1)
+            boxes = word_boxes(text_width(word["text"], size), size, rotation)
+            spot = canvas.place(cell_rects(boxes))
+            if spot is not None:
+                x, y = spot
+                placed.append([index, x * CELL, y * CELL, size, rotation])
+                break
+            size *= SHRINK
+    return placed
+
+
+def build_word_cloud_layout(
+    word_cloud: list[dict], breakpoints=BREAKPOINTS, limit: int = LAYOUT_WORDS
+) -> dict:
+    """Bloco `wordCloudLayout` com as posições para cada viewport de referência."""
+    words = word_cloud[:limit]
+    return {
+        "version": LAYOUT_VERSION,
+        "breakpoints": [
+            {
+                "name": breakpoint.name,
+                "width": breakpoint.width,
+                "height": breakpoint.height,
+                "words": layout_breakpoint(words, breakpoint),
+            }
+            for breakpoint in breakpoints
+        ],
+    }
+
+
+def layout_source(word_cloud: list[dict], limit: int = LAYOUT_WORDS) -> str:
+    """Hash das palavras posicionadas (texto e peso) e da versão do formato."""
+    words = [[word["text"], word["value"]] for word in word_cloud[:limit]]
+    return content_hash(minify({"version": LAYOUT_VERSION, "words": words}))
+
+
+def read_layout_source(path: str) -> str | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("source")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def write_word_cloud_layout(payload: dict, path: str) -> bool:
+    """
+    Grava o layout da nuvem em um artefato próprio ao lado do JSON final
+    (`donors.json` -> `donors.layout.json`, minificado e pré-comprimido), fora
+    do `donors.json` e dos seus patches. O layout só é recalculado quando as
+    `LAYOUT_WORDS` primeiras palavras (ou seus pesos) mudam; com a nuvem
+    vazia, o artefato é removido. Retorna True se algum arquivo mudou.
+    """
+    layout_path = variant_path(path, "layout")
+    word_cloud = payload.get("wordCloud") or []
+    if not word_cloud:
+        return remove_variants([layout_path])
+
+    source = layout_source(word_cloud)
+    with get_metrics().stage("layout", rows_in=len(word_cloud)) as stage:
+        if read_layout_source(layout_path) == source:
+            stage.count("reused", 1)
+            return False
+        layout = build_word_cloud_layout(word_cloud)
+        stage.rows_out = sum(len(item["words"]) for item in layout["breakpoints"])
+        _artifact, changed = publish_file(
+            layout_path, minify({**layout, "source": source})
+        )
+    return changed
@@ -0,0 +1,37 @@
+"""
+In-memory stand-in for the subset of the gspread worksheet API used by
+sheet_source.WorksheetSource, recording every request it receives. The local
+HTTP server faking the Google APIs lives in benchmarks/sheets_emulator.py and
+is re-exported here as FakeSheetsServer.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from sheets_emulator import SheetsEmulator as FakeSheetsServer
+from sheets_emulator import column_cells, row_cells
+
+__all__ = ["FakeSheetsServer", "FakeWorksheet"]
+
+
+class FakeWorksheet:
+    """Worksheet backed by a list of raw string rows (header first)."""
+
+    def __init__(self, values):
+        self.values = values
+        self.requests = []
+
+    def row_values(self, row):
+        self.requests.append(f"row {row}")
+        return row_cells(self.values, row)
+
+    def batch_get(self, ranges, major_dimension=None):
+        self.requests.append(list(ranges))
+        result = []
+        for range_name in ranges:
+            cells = column_cells(self.values, range_name)
+            result.append([cells] if cells else [])
+        return result
@@ -0,0 +1,316 @@
+"""
+Unit tests for campaigns.py module.
+Tests the campaign config, concurrent processing and the combined leaderboard.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tests.fake_sheets import FakeWorksheet
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from campaigns import (
+    Campaign,
+    CampaignConfig,
+    load_campaigns,
+    process_context,
+    run_campaigns,
+)
+from donor_payload import build_donor_payload
+from fuzzy_dedup import use_alias_table
+from sheet_source import LocalSheetSource
+from update_donors import OUTPUT_FILE, main_campaigns, write_json
+
+HEADER = ["Carimbo de data/hora", "Nome", "Valor"]
+SHEETS = {
+    "livro": [
+        ["13/12/2025 10:00:00", "José Silva", "100"],
+        ["13/12/2025 11:00:00", "Maria Santos", "200"],
+    ],
+    "formatura": [
+        ["13/12/2025 10:00:00", "jose silva", "150"],
+        ["14/12/2025 09:00:00", "Ana Lima", "50"],
+        ["14/12/2025 10:00:00", "", "10"],
+    ],
+}
+
+
+def full_rebuild(rows):
+    """Runs the single-sheet pipeline over raw rows."""
+    return build_donor_payload([dict(zip(HEADER, row)) for row in rows])
+
+
+def read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+class SlowSource:
+    """Local source whose download takes `delay` seconds, counting overlaps."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, rows, delay=0.0, error=None):
+        self.source = LocalSheetSource([HEADER, *rows])
+        self.delay = delay
+        self.error = error
+
+    def fetch_columns(self):
+        with SlowSource.lock:
+            SlowSource.active += 1
+            SlowSource.peak = max(SlowSource.peak, SlowSource.active)
+        try:
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return self.source.fetch_columns()
+        finally:
+            with SlowSource.lock:
+                SlowSource.active -= 1
+
+
+def make_config(tmp_path, ids=("livro", "formatura")):
+    campaigns = [Campaign(id=i, output=str(tmp_path / f"{i}.json")) for i in ids]
+    return CampaignConfig(campaigns, str(tmp_path / "combined" / "donors.json"))
+
+
+class TestLoadCampaigns:
+    """Tests for the campaign config file."""
+
+    def write(self, tmp_path, data):
+        path = tmp_path / "campaigns.json"
+        path.write_text(json.dumps(data), encoding="utf-8")
+        return str(path)
+
+    def test_defaults(self, tmp_path):
+        """Test default per-campaign and combined outputs."""
+        path = self.write(
+            tmp_path,
+            {
+                "campaigns": [
+                    {"id": "livro", "spreadsheet": "Livro", "worksheet": "Aba"},
+                    {"id": "formatura", "csv": "formatura.csv", "output": "f.json"},
+                ]
+            },
+        )
+
+        config = load_campaigns(path)
+
+        assert config.combined_output == "public/donors.combined.json"
+        assert config.campaigns == [
+            Campaign("livro", "public/campaigns/livro.json", "Livro", "Aba"),
+            Campaign("formatura", "f.json", csv="formatura.csv"),
+        ]
+
+    def test_example_config_is_valid(self):
+        """Test that the example shipped with the repo loads."""
+        path = os.path.join(os.path.dirname(__file__), "..", "campaigns.example.json")
+
+        config = load_campaigns(path)
+
+        assert config.campaigns[0].output == "public/donors.json"
+
+    @pytest.mark.parametrize(
+        ("campaigns", "message"),
+        [
+            ([], "Nenhuma campanha"),
+            ([{"spreadsheet": "Livro", "worksheet": "Aba"}], "sem 'id'"),
+            ([{"id": "livro", "spreadsheet": "Livro"}], "'worksheet'"),
+            ([{"id": "a", "csv": "a.csv"}, {"id": "a", "csv": "b.csv"}], "repetidas"),
+        ],
+    )
+    def test_invalid_configs(self, tmp_path, campaigns, message):
+        """Test that incomplete or ambiguous configs are rejected."""
+        path = self.write(tmp_path, {"campaigns": campaigns})
+
+        with pytest.raises(ValueError, match=message):
+            load_campaigns(path)
+
+
+class TestRunCampaigns:
+    """Tests for processing several campaigns in one job."""
+
+    def test_outputs_and_combined_leaderboard(self, tmp_path):
+        """Test per-campaign outputs and donors summed across campaigns."""
+        config = make_config(tmp_path)
+
+        changed = run_campaigns(
+            config, lambda campaign: SlowSource(SHEETS[campaign.id]), process_workers=2
+        )
+
+        assert changed
+        assert read(tmp_path / "livro.json") == full_rebuild(SHEETS["livro"])
+        assert read(tmp_path / "formatura.json") == full_rebuild(SHEETS["formatura"])
+        combined = read(tmp_path / "combined" / "donors.json")
+        assert combined == full_rebuild(SHEETS["livro"] + SHEETS["formatura"])
+        # José: 100 + 150, com o nome da doação mais recente
+        assert combined["topDonors"][0] == {"name": "jose silva"}
+
+    def test_wall_time_close_to_slowest_source(self, tmp_path):
+        """Test that downloads overlap instead of adding up."""
+        ids = ("a", "b", "c", "d")
+        config = make_config(tmp_path, ids)
+        SlowSource.peak = 0
+
+        start = time.perf_counter()
+        run_campaigns(
+            config,
+            lambda campaign: SlowSource(SHEETS["livro"], delay=0.4),
+            process_workers=2,
+        )
+        elapsed = time.perf_counter() - start
+
+        assert SlowSource.peak == len(ids)
+        assert elapsed < 0.4 * len(ids) * 0.75
+
+    def test_fetch_pool_is_bounded(self, tmp_path):
+        """Test that at most `fetch_workers` downloads run at once."""
+        config = make_config(tmp_path, ("a", "b", "c"))
+        SlowSource.peak = 0
+
+        run_campaigns(
+            config,
+            lambda campaign: SlowSource(SHEETS["livro"], delay=0.05),
+            fetch_workers=1,
+            process_workers=1,
+        )
+
+        assert SlowSource.peak == 1
+
+    def test_failed_campaign_keeps_others(self, tmp_path):
+        """Test that one failing source does not block the other outputs."""
+        config = make_config(tmp_path)
+        errors = {"formatura": ConnectionError("timeout")}
+
+        with pytest.raises(RuntimeError, match="formatura"):
+            run_campaigns(
+                config,
+                lambda c: SlowSource(SHEETS[c.id], error=errors.get(c.id)),
+                process_workers=1,
+            )
+
+        assert read(tmp_path / "livro.json") == full_rebuild(SHEETS["livro"])
+        assert not (tmp_path / "combined" / "donors.json").exists()
+
+    def test_workers_are_not_forked_from_the_threads(self, tmp_path):
+        """Test that cleaning never forks the multi-threaded parent."""
+        config = make_config(tmp_path)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            run_campaigns(
+                config,
+                lambda c: SlowSource(SHEETS[c.id], delay=0.05),
+                process_workers=2,
+            )
+
+        assert process_context().get_start_method() != "fork"
+        assert not [w for w in caught if "fork()" in str(w.message)]
+
+    def test_fuzzy_merge_runs_once_across_campaigns(self, tmp_path):
+        """Test that aliases are resolved in the parent for every campaign."""
+        config = make_config(tmp_path)
+        sheets = {
+            "livro": [["13/12/2025 10:00:00", "José da Silva Jr", "100"]],
+            "formatura": [["13/12/2025 11:00:00", "Jose Silva", "150"]],
+        }
+
+        with use_alias_table(str(tmp_path / "aliases.json")) as aliases:
+            run_campaigns(config, lambda c: SlowSource(sheets[c.id]), process_workers=1)
+
+        combined = read(tmp_path / "combined" / "donors.json")
+        assert combined["topDonors"] == [{"name": "Jose Silva"}]
+        assert aliases.canonical("JOSE SILVA") == aliases.canonical("JOSE DA SILVA JR")
+
+
+class TestMainCampaigns:
+    """Tests for the command-line entry point."""
+
+    def test_sheets_share_one_client(self, tmp_path, monkeypatch):
+        """Test that every spreadsheet is opened with a single authorized client."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "campaigns.json").write_text(
+            json.dumps(
+                {
+                    "campaigns": [
+                        {"id": i, "spreadsheet": i.title(), "worksheet": "Aba"}
+                        for i in SHEETS
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        gc = MagicMock()
+        gc.open.side_effect = lambda name: MagicMock(
+            id=f"key-{name}",
+            worksheet=lambda _name: FakeWorksheet([HEADER, *SHEETS[name.lower()]]),
+        )
+
+        with patch("update_donors.setup_gspread_credentials", return_value=gc) as auth:
+            assert main_campaigns("campaigns.json", engine="lean")
+
+        auth.assert_called_once()
+        assert sorted(call.args[0] for call in gc.open.call_args_list) == [
+            "Formatura",
+            "Livro",
+        ]
+        assert read(tmp_path / "public" / "campaigns" / "livro.json") == full_rebuild(
+            SHEETS["livro"]
+        )
+
+    def test_campaign_output_keeps_the_versioned_feed(self, tmp_path, monkeypatch):
+        """Test that a campaign writing donors.json keeps its manifest and patches."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "public").mkdir()
+        write_json(full_rebuild(SHEETS["livro"][:1]))
+        (tmp_path / "livro.csv").write_text(
+            "\n".join(",".join(row) for row in [HEADER, *SHEETS["livro"]]) + "\n",
+            "utf-8",
+        )
+        (tmp_path / "campaigns.json").write_text(
+            json.dumps(
+                {
+                    "campaigns": [
+                        {"id": "livro", "csv": "livro.csv", "output": OUTPUT_FILE}
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+
+        assert main_campaigns("campaigns.json")
+
+        manifest = read(tmp_path / "public" / "donors.manifest.json")
+        assert manifest["version"] == 2
+        assert (tmp_path / "public" / "donors.v2.patch.json").exists()
+        assert (tmp_path / "public" / "donors.min.json").exists()
+        assert read(tmp_path / OUTPUT_FILE) == full_rebuild(SHEETS["livro"])
+
+    def test_local_exports_skip_authentication(self, tmp_path, monkeypatch):
+        """Test that CSV-only configs never ask for Google credentials."""
+        monkeypatch.chdir(tmp_path)
+        for name, rows in SHEETS.items():
+            lines = [",".join(HEADER)] + [",".join(row) for row in rows]
+            (tmp_path / f"{name}.csv").write_text("\n".join(lines) + "\n", "utf-8")
+        (tmp_path / "campaigns.json").write_text(
+            json.dumps({"campaigns": [{"id": i, "csv": f"{i}.csv"} for i in SHEETS]}),
+            encoding="utf-8",
+        )
+
+        with patch("update_donors.setup_gspread_credentials") as auth:
+            main_campaigns("campaigns.json")
+
+        auth.assert_not_called()
+        assert read(tmp_path / "public" / "donors.combined.json") == full_rebuild(
+            SHEETS["livro"] + SHEETS["formatura"]
+        )
@@ -0,0 +1,147 @@
+"""
+Unit tests for currency.py module.
+Tests the scalar and vectorized Brazilian amount parsers.
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+import currency
+from currency import (
+    EMPTY,
+    INVALID_FORMAT,
+    MISSING,
+    OK,
+    REJECTION_REASONS,
+    TOO_LARGE,
+    parse_amount,
+    parse_amounts,
+)
+from donor_payload import build_donor_payload
+
+CASES = [
+    ("50", 5_000, OK),
+    ("1.000", 100_000, OK),
+    ("1.234,56", 123_456, OK),
+    ("R$ 1.234,56", 123_456, OK),
+    ("R$ 1.234,56", 123_456, OK),
+    (" 1 234,5 ", 123_450, OK),
+    ("1234.56", 123_456, OK),
+    ("12.5", 1_250, OK),
+    ("1,234.56", 123_456, OK),
+    ("1.234.567,89", 123_456_789, OK),
+    ("0,01", 1, OK),
+    ("007", 700, OK),
+    (100, 10_000, OK),
+    (12.5, 1_250, OK),
+    ("1,234", None, INVALID_FORMAT),
+    ("1.2345", None, INVALID_FORMAT),
+    ("1.234.56", None, INVALID_FORMAT),
+    ("12,345", None, INVALID_FORMAT),
+    (",5", None, INVALID_FORMAT),
+    ("5,", None, INVALID_FORMAT),
+    ("-50", None, INVALID_FORMAT),
+    ("abc", None, INVALID_FORMAT),
+    ("٥", None, INVALID_FORMAT),
+    ("", None, EMPTY),
+    ("R$  ", None, EMPTY),
+    (None, None, MISSING),
+    (float("nan"), None, MISSING),
+    ("1" * 17, None, TOO_LARGE),
+]
+
+
+@pytest.mark.parametrize("value,cents,reason", CASES)
+def test_parse_amount(value, cents, reason):
+    """Test the scalar parser on Brazilian and edge-case inputs."""
+    assert parse_amount(value) == (cents, reason)
+
+
+def test_vectorized_matches_scalar_on_cases():
+    """Test that the vectorized parser agrees with the scalar one."""
+    parsed = parse_amounts([value for value, _cents, _reason in CASES])
+
+    assert parsed.cents.dtype == np.int64
+    assert parsed.cents.tolist() == [cents or 0 for _v, cents, _r in CASES]
+    assert parsed.reasons.tolist() == [reason for _v, _c, reason in CASES]
+
+
+@pytest.mark.parametrize("alphabet", ["0123456789.,R$ -a ", "1.,", "12., "])
+def test_vectorized_matches_scalar_fuzz(alphabet):
+    """Test both parsers on random strings built from separator-heavy alphabets."""
+    rng = random.Random(110)
+    values = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 14)))
+        for _ in range(20_000)
+    ]
+
+    parsed = parse_amounts(values)
+
+    expected = [parse_amount(value) for value in values]
+    assert parsed.cents.tolist() == [cents or 0 for cents, _reason in expected]
+    assert parsed.reasons.tolist() == [reason for _cents, reason in expected]
+
+
+def test_chunks_match_single_pass(monkeypatch):
+    """Test that parsing in small blocks gives the same arrays as one block."""
+    values = [value for value, _cents, _reason in CASES] * 3
+    expected = parse_amounts(values)
+    monkeypatch.setattr(currency, "CHUNK_ROWS", 7)
+
+    parsed = parse_amounts(values)
+
+    assert parsed.cents.tolist() == expected.cents.tolist()
+    assert parsed.reasons.tolist() == expected.reasons.tolist()
+
+
+def test_rejection_mask_and_counts():
+    """Test the rejection mask and per-reason counts."""
+    parsed = parse_amounts(["10", "", "abc", None, "x", "1.000"])
+
+    assert parsed.rejected.tolist() == [False, True, True, True, True, False]
+    assert parsed.rejection_counts() == {
+        "empty": 1,
+        "invalid_format": 2,
+        "missing": 1,
+    }
+    assert set(parsed.rejection_counts()) <= set(REJECTION_REASONS)
+
+
+def test_empty_input():
+    """Test that an empty column parses to empty arrays."""
+    parsed = parse_amounts([])
+
+    assert parsed.cents.tolist() == [] and parsed.reasons.tolist() == []
+
+
+@pytest.mark.parametrize("engine", ["pandas", "lean"])
+def test_decimal_amounts_rank_exactly(engine):
+    """Test that comma decimals are honoured and summed without float error."""
+    records = [
+        {"Carimbo de data/hora": "13/12/2025 10:00:00", "Nome": "Ana", "Valor": v}
+        for v in ["0,10", "0,20"]
+    ] + [
+        {"Carimbo de data/hora": "13/12/2025 11:00:00", "Nome": "Bia", "Valor": "0,3"},
+        {"Carimbo de data/hora": "13/12/2025 12:00:00", "Nome": "Caio", "Valor": "1"},
+        {
+            "Carimbo de data/hora": "13/12/2025 12:00:00",
+            "Nome": "Duda",
+            "Valor": "R$ 1.234,56",
+        },
+    ]
+
+    payload = build_donor_payload(records, engine)
+
+    # Ana (0,10 + 0,20) empata exatamente com Bia (0,30): desempate pelo nome
+    assert [donor["text"] for donor in payload["wordCloud"]] == [
+        "Duda",
+        "Caio",
+        "Ana",
+        "Bia",
+    ]
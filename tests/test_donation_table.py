@@ -0,0 +1,127 @@
+"""
+Unit tests for donation_table.py module.
+Tests the compact donation model, its vectorized ranking and the memory budget.
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from donation_table import (
+    BYTES_PER_DONATION,
+    DONATION_DTYPE,
+    DonationTable,
+    build_donor_lists,
+)
+from donor_payload import build_donor_payload, empty_payload, format_donor_lists
+from pandas_engine import clean_donations, load_columns
+from ranking import DonorRanking
+from synthetic_responses import make_responses
+
+
+def make_table(donations):
+    """Builds a table from (normalized, name, cents, ISO date) tuples."""
+    names = list(dict.fromkeys(name for row in donations for name in row[:2]))
+    records = np.zeros(len(donations), dtype=DONATION_DTYPE)
+    records["normalized"] = [names.index(row[0]) for row in donations]
+    records["name"] = [names.index(row[1]) for row in donations]
+    records["cents"] = [row[2] for row in donations]
+    records["timestamp"] = [row[3] for row in donations]
+    return DonationTable(records, np.array(names, dtype=object))
+
+
+class TestDonationTable:
+    """Tests for the compact column layout."""
+
+    DONATIONS = (
+        ("JOSE SILVA", "José Silva", 10000, "2025-12-14T09:00:00"),
+        ("MARIA SANTOS", "Maria Santos", 20000, "2025-12-13T11:00:00"),
+        ("JOSE SILVA", "Jose Silva", 3000, "2025-12-13T10:00:00.500000"),
+    )
+
+    def test_record_is_24_bytes(self):
+        """Test that a donation costs two name codes, cents and a date."""
+        assert np.dtype(DONATION_DTYPE).itemsize == 24
+
+    def test_rows_are_chronological_iso(self):
+        """Test that rows come back in date order with ISO dates."""
+        assert make_table(self.DONATIONS).rows() == [
+            ("JOSE SILVA", "Jose Silva", 3000, "2025-12-13T10:00:00.500000"),
+            ("MARIA SANTOS", "Maria Santos", 20000, "2025-12-13T11:00:00"),
+            ("JOSE SILVA", "José Silva", 10000, "2025-12-14T09:00:00"),
+        ]
+
+    def test_empty_table_gives_empty_payload(self):
+        """Test that no donations yield the empty payload."""
+        assert build_donor_lists(make_table([])) == empty_payload()
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_lists_match_donor_ranking(self, seed):
+        """Test that the vectorized lists follow the DonorRanking rules, ties included."""
+        rng = random.Random(seed)
+        spellings = {"ANA": ["Ana", "ana"], "BIA": ["Bia"], "CAIO": ["Caio", "caio"]}
+        donations = []
+        for _ in range(200):
+            normalized = rng.choice([*spellings, "DUDA", "EVA"])
+            donations.append(
+                (
+                    normalized,
+                    rng.choice(spellings.get(normalized, [normalized.title()])),
+                    rng.choice([100, 250, 1000]),
+                    f"2025-12-{rng.randint(10, 12)}T{rng.randint(8, 9):02d}:00:00",
+                )
+            )
+        table = make_table(donations)
+        ranking = DonorRanking()
+        ranking.extend(table.rows())
+
+        assert build_donor_lists(table) == format_donor_lists(
+            ranking.ranked_names(), ranking.top(), ranking.latest()
+        )
+
+
+class TestPandasEngineModel:
+    """Tests for the pandas engine building the compact model."""
+
+    def test_spellings_share_one_normalized_code(self):
+        """Test that name variations are interned into one dictionary entry."""
+        columns = load_columns(
+            {
+                "Carimbo de data/hora": ["13/12/2025 10:00:00"] * 3,
+                "Nome": ["José Silva", " jose  silva ", "JOSÉ SILVA"],
+                "Valor": ["10", "20", "30"],
+            }
+        )
+
+        table = clean_donations(columns)
+
+        assert len(set(table.records["normalized"])) == 1
+        assert list(table.names).count("JOSE SILVA") == 1
+        assert table.names[table.records["name"]].tolist() == [
+            "José Silva",
+            "jose  silva",
+            "JOSÉ SILVA",
+        ]
+
+    def test_peak_memory_within_budget_at_1m_rows(self):
+        """Test that the pandas engine stays within BYTES_PER_DONATION at 1M rows."""
+        rows = 1_000_000
+        columns = make_responses(rows, unique=20_000)
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            payload = build_donor_payload(columns, "pandas")
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+
+        assert len(payload["wordCloud"]) == 20_000
+        assert peak / rows < BYTES_PER_DONATION
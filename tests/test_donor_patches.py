@@ -0,0 +1,258 @@
+"""
+Unit tests for donor_patches.py module.
+Tests list diffs, versioned patch files and replaying patches to the snapshot.
+"""
+
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from donor_patches import (
+    apply_ops,
+    apply_patch,
+    diff_list,
+    make_patch,
+    patch_path,
+    read_manifest,
+    write_with_patches,
+)
+from donor_payload import build_donor_payload, empty_payload
+from output_writer import content_hash, serialize_payload, write_if_changed
+from weighting import Weighting, use_weighting
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def random_payloads(seed, versions=30):
+    """Payloads of a growing sheet, as successive runs would produce them."""
+    rng = random.Random(seed)
+    names = [f"Doador {i}" for i in range(60)]
+    rows = []
+    for day in range(versions):
+        for _ in range(rng.randint(1, 6)):
+            rows.append(
+                {
+                    "Carimbo de data/hora": f"{1 + day % 28}/11/2025 "
+                    f"{rng.randint(8, 20)}:00:00",
+                    "Nome": rng.choice(names),
+                    "Valor": str(rng.choice([10, 50, 100, 500])),
+                }
+            )
+        yield build_donor_payload(rows, "lean")
+
+
+class TestDiffList:
+    """Tests for the splice operations."""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_ops_rebuild_new_list(self, seed):
+        """Test that applying the ops to the old list gives the new one."""
+        rng = random.Random(seed)
+        old = [{"text": f"n{i}", "value": rng.randint(1, 5)} for i in range(30)]
+        new = [dict(item) for item in old if rng.random() > 0.2]
+        rng.shuffle(new[:5])
+        new.insert(rng.randint(0, len(new)), {"text": "novo", "value": 1})
+        new[-1]["value"] = 9
+
+        assert apply_ops(old, diff_list(old, new)) == new
+
+    def test_ops_are_splices_from_the_end(self):
+        """Test the operation format, applied like Array.prototype.splice."""
+        old = ["a", "b", "c", "d"]
+        new = ["x", "a", "c", "d", "e"]
+
+        assert diff_list(old, new) == [[4, 0, ["e"]], [1, 1, []], [0, 0, ["x"]]]
+
+    def test_equal_lists_have_no_ops(self):
+        assert diff_list([{"name": "Ana"}], [{"name": "Ana"}]) == []
+
+
+class TestMakePatch:
+    """Tests for keys that are not patched item by item."""
+
+    def test_other_keys_are_set_or_unset_whole(self):
+        """Test that changed, new and removed keys round-trip in order."""
+        old = {"wordCloud": [], "meta": 1, "old": True}
+        new = {"wordCloud": [{"text": "Ana"}], "meta": 2, "layout": {"v": 1}}
+
+        patch = make_patch(old, new, 2, "base")
+
+        assert patch["set"] == {"meta": 2, "layout": {"v": 1}}
+        assert patch["unset"] == ["old"]
+        result = apply_patch(old, patch)
+        assert serialize_payload(result) == serialize_payload(new)
+
+    def test_new_key_before_others_keeps_the_order(self):
+        """Test that a key added mid-object replays to the same bytes."""
+        old = {"wordCloud": [], "meta": 1}
+        new = {"wordCloud": [], "wordCloudOthers": {"count": 3}, "meta": 1}
+
+        patch = make_patch(old, new, 2, "base")
+
+        assert patch["keys"] == ["wordCloud", "wordCloudOthers", "meta"]
+        result = apply_patch(old, patch)
+        assert serialize_payload(result) == serialize_payload(new)
+
+    def test_unchanged_keys_are_not_repeated(self):
+        old = {"wordCloud": [], "meta": {"a": 1}}
+
+        patch = make_patch(old, {**old, "wordCloud": [1]}, 2, "base")
+
+        assert "set" not in patch
+        assert "unset" not in patch
+
+
+class TestWriteWithPatches:
+    """Tests for the versioned writer."""
+
+    def test_first_write_is_version_1_without_patches(self, tmp_path):
+        """Test that the first file starts the sequence."""
+        path = str(tmp_path / "donors.json")
+
+        assert write_with_patches(empty_payload(), path, clock=lambda: 0)
+
+        manifest = read_manifest(path)
+        assert manifest["version"] == 1
+        assert manifest["patches"] == []
+        assert manifest["sha256"] == content_hash(serialize_payload(empty_payload()))
+
+    def test_unchanged_payload_keeps_version(self, tmp_path):
+        """Test that identical content writes neither a patch nor a new version."""
+        path = str(tmp_path / "donors.json")
+        write_with_patches(empty_payload(), path)
+
+        assert not write_with_patches(empty_payload(), path)
+
+        assert read_manifest(path)["version"] == 1
+        assert sorted(os.listdir(tmp_path)) == ["donors.json", "donors.manifest.json"]
+
+    def test_patch_describes_only_the_change(self, tmp_path):
+        """Test that a new donor costs a small patch, not a full file."""
+        path = str(tmp_path / "donors.json")
+        payloads = list(random_payloads(0, versions=20))
+        for payload in payloads:
+            write_with_patches(payload, path)
+        final = {
+            **payloads[-1],
+            "latestDonations": [{"name": "Nova"}, *payloads[-1]["latestDonations"]],
+        }
+
+        write_with_patches(final, path)
+
+        version = read_manifest(path)["version"]
+        patch = read_json(patch_path(path, version))
+        assert patch["ops"] == {"latestDonations": [[0, 0, [{"name": "Nova"}]]]}
+        assert patch["baseVersion"] == version - 1
+        assert os.path.getsize(patch_path(path, version)) < os.path.getsize(path) / 10
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_replaying_all_patches_reproduces_snapshot(self, tmp_path, seed):
+        """Test that version 1 plus every patch equals the latest file, byte for byte."""
+        path = str(tmp_path / "donors.json")
+        payloads = random_payloads(seed)
+        write_with_patches(next(payloads), path)
+        with open(path, "rb") as f:
+            base = f.read()
+        for payload in payloads:
+            write_with_patches(payload, path)
+
+        manifest = read_manifest(path)
+        state = json.loads(base)
+        for name in manifest["patches"]:
+            patch = read_json(tmp_path / name)
+            assert patch["baseSha256"] == content_hash(serialize_payload(state))
+            state = apply_patch(state, patch)
+            assert patch["sha256"] == content_hash(serialize_payload(state))
+
+        with open(path, "rb") as f:
+            assert serialize_payload(state) == f.read()
+        assert manifest["version"] == 1 + len(manifest["patches"])
+
+    def test_replay_with_non_list_block(self, tmp_path):
+        """Test that a block replaced whole (`set`) also replays."""
+        path = str(tmp_path / "donors.json")
+        payloads = [
+            {**payload, "meta": {"donors": len(payload["wordCloud"])}}
+            for payload in random_payloads(3, versions=4)
+        ]
+        write_with_patches(payloads[0], path)
+        state = read_json(path)
+        for payload in payloads[1:]:
+            write_with_patches(payload, path)
+            patch = read_json(patch_path(path, read_manifest(path)["version"]))
+            state = apply_patch(state, patch)
+
+        with open(path, "rb") as f:
+            assert serialize_payload(state) == f.read()
+        assert "meta" in patch["set"]
+
+    def test_replay_across_the_max_words_cap(self, tmp_path):
+        """Test that replay matches when `wordCloudOthers` appears mid-sequence."""
+        path = str(tmp_path / "donors.json")
+        with use_weighting(Weighting(max_words=20)):
+            payloads = list(random_payloads(5, versions=12))
+        assert "wordCloudOthers" not in payloads[0]
+        assert "wordCloudOthers" in payloads[-1]
+
+        write_with_patches(payloads[0], path)
+        state = read_json(path)
+        for payload in payloads[1:]:
+            write_with_patches(payload, path)
+            manifest = read_manifest(path)
+            patch = read_json(patch_path(path, manifest["version"]))
+            state = apply_patch(state, patch)
+            assert content_hash(serialize_payload(state)) == patch["sha256"]
+
+        assert content_hash(serialize_payload(state)) == manifest["sha256"]
+
+    def test_old_patches_are_pruned(self, tmp_path):
+        """Test that only the latest `keep` patches stay, contiguous."""
+        path = str(tmp_path / "donors.json")
+        for payload in random_payloads(1, versions=12):
+            write_with_patches(payload, path, keep=3)
+
+        manifest = read_manifest(path)
+        version = manifest["version"]
+        expected = [
+            os.path.basename(patch_path(path, v))
+            for v in range(version - 2, version + 1)
+        ]
+        assert manifest["patches"] == expected
+        assert sorted(
+            name for name in os.listdir(tmp_path) if ".patch." in name
+        ) == sorted(expected)
+
+    def test_external_edit_restarts_sequence(self, tmp_path):
+        """Test that a file the manifest does not describe cannot be a patch base."""
+        path = str(tmp_path / "donors.json")
+        payloads = list(random_payloads(2, versions=3))
+        for payload in payloads[:2]:
+            write_with_patches(payload, path)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{}")
+
+        write_with_patches(payloads[2], path)
+
+        manifest = read_manifest(path)
+        assert manifest["version"] == 3
+        assert manifest["patches"] == []
+        assert not os.path.exists(patch_path(path, 2))
+        assert not os.path.exists(patch_path(path, 3))
+
+    def test_legacy_manifest_gets_a_version(self, tmp_path):
+        """Test that files written before versioning start at version 1."""
+        path = str(tmp_path / "donors.json")
+        write_if_changed(empty_payload(), path)
+
+        assert not write_with_patches(empty_payload(), path)
+
+        assert read_manifest(path)["version"] == 1
@@ -0,0 +1,151 @@
+"""
+Unit tests for donor_payload.py and its processing engines.
+Tests that the pandas and lean engines produce the same payload.
+"""
+
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from donor_payload import build_donor_payload, clean_donation_rows, empty_payload
+from lean_engine import parse_timestamps
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "services")
+
+
+def make_records(count: int, seed: int = 110) -> list[dict]:
+    """Builds form responses with repeated donors, ties and invalid rows."""
+    rng = random.Random(seed)
+    names = ["José Silva", "jose  silva", "Maria", "MARIA", "Ana Lú", "Caio", "Bia"]
+    values = ["100", "50", "1.000", "25", "abc", "", 75, 10, ",", "1.234,56", "R$ 12,5"]
+    records = []
+    for _ in range(count):
+        day = rng.randint(1, 28)
+        hour = rng.randint(8, 9)
+        records.append(
+            {
+                "Carimbo de data/hora": f"{day:02d}/12/2025 {hour:02d}:00:00",
+                "Nome": rng.choice(names + ["", "   "]),
+                "Valor": rng.choice(values),
+            }
+        )
+    return records
+
+
+class TestBuildDonorPayload:
+    """Tests for the public payload API."""
+
+    @pytest.mark.parametrize("engine", ["pandas", "lean"])
+    def test_payload_structure(self, engine):
+        """Test that the payload has the structure expected by the frontend."""
+        records = [
+            {"Carimbo de data/hora": "13/12/2025 10:00:00", "Nome": "Ana", "Valor": 10},
+            {"Carimbo de data/hora": "13/12/2025 11:00:00", "Nome": "Bia", "Valor": 20},
+        ]
+
+        payload = build_donor_payload(records, engine)
+
+        assert payload == {
+            "wordCloud": [{"text": "Bia", "value": 5}, {"text": "Ana", "value": 4}],
+            "topDonors": [{"name": "Bia"}, {"name": "Ana"}],
+            "latestDonations": [{"name": "Bia"}, {"name": "Ana"}],
+        }
+
+    @pytest.mark.parametrize("engine", ["pandas", "lean"])
+    def test_empty_records(self, engine):
+        """Test that no records yield the empty payload."""
+        assert build_donor_payload([], engine) == empty_payload()
+
+    @pytest.mark.parametrize("engine", ["pandas", "lean"])
+    def test_missing_columns_raise(self, engine):
+        """Test that a sheet without the required columns is rejected."""
+        with pytest.raises(ValueError, match="colunas necessárias"):
+            build_donor_payload([{"Nome": "Ana"}], engine)
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine name is rejected."""
+        with pytest.raises(ValueError, match="Motor desconhecido"):
+            build_donor_payload([], "spark")
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_engines_agree(self, seed):
+        """Test that both engines produce identical payloads, ties included."""
+        records = make_records(300, seed)
+
+        assert build_donor_payload(records, "lean") == build_donor_payload(
+            records, "pandas"
+        )
+
+    def test_engines_agree_on_donation_rows(self):
+        """Test that both engines clean rows identically for the store."""
+        records = make_records(200)
+
+        assert clean_donation_rows(records, "lean") == clean_donation_rows(
+            records, "pandas"
+        )
+
+    def test_engines_agree_after_a_leading_blank_timestamp(self):
+        """Test that both engines infer the format from the first filled value."""
+        records = {
+            "Carimbo de data/hora": [
+                "",
+                "13/12/2025 10:00:00",
+                "2025-12-14 10:00:00",
+            ],
+            "Nome": ["Ana", "Bia", "Caio"],
+            "Valor": ["10", "20", "5"],
+        }
+
+        lean = build_donor_payload(records, "lean")
+
+        assert lean == build_donor_payload(records, "pandas")
+        assert lean["latestDonations"] == [{"name": "Bia"}]
+
+    def test_pandas_engine_with_timezones(self):
+        """Test that tz-aware timestamps (pandas' fallback parse) still work."""
+        records = {
+            "Carimbo de data/hora": [
+                "2025-12-13 10:00:00+00:00",
+                "2025-12-13 11:00:00-03:00",
+                "sem data",
+            ],
+            "Nome": ["Ana", "Bia", "Caio"],
+            "Valor": ["10", "20", "5"],
+        }
+
+        payload = build_donor_payload(records, "pandas")
+
+        # 11:00-03:00 is 14:00 UTC, after Ana's donation
+        assert payload["latestDonations"] == [{"name": "Bia"}, {"name": "Ana"}]
+        assert [word["text"] for word in payload["wordCloud"]] == ["Bia", "Ana"]
+
+    def test_lean_engine_does_not_import_pandas(self):
+        """Test that the lean engine runs without loading pandas."""
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from donor_payload import build_donor_payload;"
+            "build_donor_payload([{'Carimbo de data/hora': '13/12/2025 10:00:00',"
+            " 'Nome': 'Ana', 'Valor': 1}], 'lean');"
+            "assert 'pandas' not in sys.modules"
+        )
+        subprocess.run([sys.executable, "-c", code, SERVICES_DIR], check=True)
+
+
+class TestLeanParsers:
+    """Tests for the pandas-free timestamp parser."""
+
+    def test_parse_timestamps_infers_format_from_first_value(self):
+        """Test that values in another format than the first are dropped."""
+        parsed = parse_timestamps(
+            ["13/12/2025 10:00:00", "2025-12-13", "14/12/2025 08:30:00"]
+        )
+
+        assert parsed[0].day == 13 and parsed[0].hour == 10
+        assert parsed[1] is None
+        assert parsed[2].day == 14
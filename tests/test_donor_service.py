@@ -0,0 +1,219 @@
+"""
+Unit tests for donor_service.py module.
+Tests the in-memory service and its webhook endpoint against a local sheet.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from donor_payload import build_donor_payload
+from donor_service import DonorService, WebhookServer, parse_webhook
+from sheet_source import LocalSheetSource
+
+HEADER = ["Carimbo de data/hora", "Nome", "Valor"]
+ROWS = [
+    ["13/12/2025 10:00:00", "José Silva", "100"],
+    ["13/12/2025 11:00:00", "Maria Santos", "50"],
+    ["13/12/2025 12:00:00", "Jose Silva", "25"],
+]
+NEW_ROW = {"Carimbo de data/hora": "14/12/2025 09:00:00", "Nome": "Ana", "Valor": "500"}
+
+
+def make_service(rows=ROWS):
+    source = LocalSheetSource([HEADER, *rows])
+    written = []
+    service = DonorService(source, write=written.append)
+    return source, service, written
+
+
+def full_rebuild(rows):
+    records = [dict(zip(HEADER, row)) for row in rows]
+    return build_donor_payload(records, "lean")
+
+
+class TestDonorService:
+    """Tests for incremental application of webhook rows."""
+
+    def test_reconcile_matches_full_rebuild(self):
+        """Test that reconciliation produces the batch payload."""
+        _source, service, written = make_service()
+
+        assert service.reconcile() == 2
+        assert written[-1] == full_rebuild(ROWS)
+        assert service.last_row == 4
+
+    def test_apply_matches_full_rebuild(self):
+        """Test that applying a webhook row equals rebuilding with that row."""
+        _source, service, written = make_service()
+        service.reconcile()
+
+        assert service.apply([NEW_ROW]) == 1
+        assert written[-1] == full_rebuild([*ROWS, list(NEW_ROW.values())])
+        assert written[-1]["topDonors"][0] == {"name": "Ana"}
+
+    def test_rows_already_read_are_ignored(self):
+        """Test that retries and rows covered by the last read are not summed."""
+        _source, service, written = make_service()
+        service.reconcile()
+
+        assert service.apply([{**NEW_ROW, "row": 3}]) == 0
+        assert service.apply([{**NEW_ROW, "row": 5}]) == 1
+        assert service.apply([{**NEW_ROW, "row": "5"}]) == 0
+        assert len(written) == 2
+
+    def test_reconcile_replaces_webhook_state(self):
+        """Test that reconciliation heals rows that never reached the sheet."""
+        _source, service, written = make_service()
+        service.reconcile()
+        service.apply([NEW_ROW])
+
+        service.reconcile()
+
+        assert written[-1] == full_rebuild(ROWS)
+
+    def test_invalid_rows_are_not_written(self):
+        """Test that a webhook with only invalid rows does not rewrite output."""
+        _source, service, written = make_service()
+        service.reconcile()
+
+        assert service.apply([{**NEW_ROW, "Valor": "abc"}]) == 0
+        assert len(written) == 1
+
+
+def test_parse_webhook_formats():
+    """Test the accepted webhook body shapes."""
+    assert parse_webhook(json.dumps(NEW_ROW).encode()) == [NEW_ROW]
+    assert parse_webhook(json.dumps([NEW_ROW]).encode()) == [NEW_ROW]
+    assert parse_webhook(json.dumps({"rows": [NEW_ROW]}).encode()) == [NEW_ROW]
+
+
+async def request(port, method, path, body=None, headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    lines = [f"{method} {path} HTTP/1.1", f"Content-Length: {len(payload)}"]
+    lines += [f"{key}: {value}" for key, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+class TestWebhookServer:
+    """End-to-end tests for the asyncio HTTP endpoint."""
+
+    def test_webhook_roundtrip(self):
+        """Test health, webhook application and token checks over HTTP."""
+        _source, service, written = make_service()
+
+        async def scenario():
+            server = WebhookServer(service, token="s3cret", reconcile_interval=None)
+            port = await server.start(port=0)
+            try:
+                health = await request(port, "GET", "/health")
+                denied = await request(port, "POST", "/webhook", NEW_ROW)
+                accepted = await request(
+                    port, "POST", "/webhook", NEW_ROW, {"X-Webhook-Token": "s3cret"}
+                )
+                bad = await request(
+                    port, "POST", "/webhook", [1, 2], {"X-Webhook-Token": "s3cret"}
+                )
+                missing = await request(port, "GET", "/nope")
+            finally:
+                await server.stop()
+            return health, denied, accepted, bad, missing
+
+        health, denied, accepted, bad, missing = asyncio.run(scenario())
+
+        assert health == (
+            200,
+            {"donors": 2, "lastReconcile": health[1]["lastReconcile"]},
+        )
+        assert denied[0] == 401
+        assert accepted == (202, {"applied": 1, "donors": 3})
+        assert bad[0] == 400
+        assert missing[0] == 404
+        assert written[-1]["topDonors"][0] == {"name": "Ana"}
+
+    def test_periodic_reconciliation(self):
+        """Test that the background task re-reads the sheet source."""
+        source, service, written = make_service()
+
+        async def scenario():
+            server = WebhookServer(service, reconcile_interval=0.01)
+            await server.start(port=0)
+            source.values.append(list(NEW_ROW.values()))
+            try:
+                for _ in range(200):
+                    if len(service.ranking) == 3:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await server.stop()
+
+        asyncio.run(scenario())
+
+        assert written[-1] == full_rebuild([*ROWS, list(NEW_ROW.values())])
+
+    def test_slow_write_does_not_block_health(self):
+        """Test that regenerating the JSON runs off the event loop."""
+        source = LocalSheetSource([HEADER, *ROWS])
+        service = DonorService(source, write=lambda payload: time.sleep(0.3))
+
+        async def scenario():
+            server = WebhookServer(service, reconcile_interval=None)
+            port = await server.start(port=0)
+            try:
+                webhook = asyncio.create_task(
+                    request(port, "POST", "/webhook", NEW_ROW)
+                )
+                await asyncio.sleep(0.05)
+                start = time.perf_counter()
+                health = await request(port, "GET", "/health")
+                health_s = time.perf_counter() - start
+                return health, health_s, await webhook
+            finally:
+                await server.stop()
+
+        health, health_s, webhook = asyncio.run(scenario())
+
+        assert health[0] == 200
+        assert health_s < 0.2
+        assert webhook == (202, {"applied": 1, "donors": 3})
+
+    def test_truncated_body_and_write_failure(self):
+        """Test that a short body gets a 400 and a failing write a 500."""
+        _source, service, _written = make_service()
+
+        async def truncated(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /webhook HTTP/1.1\r\nContent-Length: 100\r\n\r\n{}")
+            writer.write_eof()
+            response = await reader.read()
+            writer.close()
+            return int(response.split()[1])
+
+        def fail(payload):
+            raise OSError("disco cheio")
+
+        async def scenario():
+            server = WebhookServer(service, reconcile_interval=None)
+            port = await server.start(port=0)
+            try:
+                short = await truncated(port)
+                service.write = fail
+                failed = await request(port, "POST", "/webhook", NEW_ROW)
+                return short, failed
+            finally:
+                await server.stop()
+
+        short, failed = asyncio.run(scenario())
+
+        assert short == 400
+        assert failed == (500, {"error": "disco cheio"})
@@ -0,0 +1,289 @@
+"""
+Unit tests for donor_snapshot.py module.
+Tests the columnar snapshot of cleaned donations and warm runs over it.
+"""
+
+import json
+import os
+import random
+import sys
+from typing import ClassVar
+
+import numpy as np
+import pytest
+
+from tests.fake_sheets import FakeWorksheet
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+import donor_snapshot
+import update_donors
+from donor_payload import build_donor_payload
+from donor_snapshot import (
+    DonationSnapshot,
+    build_payload_from_snapshot,
+    cleaning_fingerprint,
+)
+from sheet_source import WorksheetSource
+from update_donors import run_snapshot
+
+HEADER = ["Carimbo de data/hora", "Nome", "Valor"]
+ROWS = [
+    ["13/12/2025 10:00:00", "José Silva", "100"],
+    ["13/12/2025 11:00:00", "Maria Santos", "200"],
+    ["13/12/2025 12:00:00", "", "50"],
+]
+
+
+def full_rebuild(values, engine="pandas"):
+    """Runs the non-incremental pipeline over raw sheet values."""
+    header, rows = values[0], values[1:]
+    return build_donor_payload([dict(zip(header, row)) for row in rows], engine)
+
+
+def random_rows(count, seed):
+    """Random responses with repeated donors, ties and invalid cells."""
+    rng = random.Random(seed)
+    names = ["José Silva", "jose  silva", "Maria Santos", "Ana Lima", "Bia", "Caio"]
+    rows = []
+    for _ in range(count):
+        day, hour = rng.randint(10, 14), rng.randint(8, 10)
+        rows.append(
+            [
+                f"{day}/12/2025 {hour:02d}:00:00" if rng.random() > 0.05 else "ontem",
+                rng.choice(names + [""]),
+                rng.choice(["10", "25,50", "1.000", "R$ 5", "abc", "0,01"]),
+            ]
+        )
+    return rows
+
+
+class TestDonationSnapshot:
+    """Tests for the on-disk snapshot format."""
+
+    DONATIONS = (
+        ("JOSE SILVA", "José Silva", 10000, "2025-12-13T10:00:00"),
+        ("MARIA SANTOS", "Maria Santos", 20000, "2025-12-13T11:00:00"),
+        ("JOSE SILVA", "Jose Silva", 3000, "2025-12-14T09:00:00"),
+    )
+    CHECKPOINT: ClassVar[dict] = {"row": 4, "hash": "abc", "positions": [0, 1, 2]}
+
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        """Test that segments reopen as read-only memory maps with the same data."""
+        path = str(tmp_path / "snapshot")
+        snapshot = DonationSnapshot(path, "v1")
+        snapshot.append(self.DONATIONS, 2, 4, self.CHECKPOINT)
+
+        reopened = DonationSnapshot.open(path, "v1")
+        (segment,) = reopened.load()
+
+        assert isinstance(segment, np.memmap)
+        assert reopened.checkpoint == self.CHECKPOINT
+        assert len(reopened) == 3
+        assert [reopened.names[code] for code in segment["name"]] == [
+            "José Silva",
+            "Maria Santos",
+            "Jose Silva",
+        ]
+        assert segment["cents"].tolist() == [10000, 20000, 3000]
+        assert segment.dtype.itemsize == 24
+
+    def test_other_fingerprint_starts_empty(self, tmp_path):
+        """Test that a snapshot from another cleaning is discarded."""
+        path = str(tmp_path / "snapshot")
+        DonationSnapshot(path, "v1").append(self.DONATIONS, 2, 4, self.CHECKPOINT)
+
+        snapshot = DonationSnapshot.open(path, "v2")
+
+        assert snapshot.checkpoint is None
+        assert len(snapshot) == 0
+
+    def test_corrupt_manifest_starts_empty(self, tmp_path):
+        """Test that an unreadable manifest is treated as no snapshot."""
+        path = tmp_path / "snapshot"
+        path.mkdir()
+        (path / "snapshot.json").write_text("{", encoding="utf-8")
+
+        assert DonationSnapshot.open(str(path), "v1").checkpoint is None
+
+    def test_segments_are_keyed_by_row_range_and_compacted(self, tmp_path, monkeypatch):
+        """Test that appends add row-range segments and compaction merges them."""
+        monkeypatch.setattr(donor_snapshot, "MAX_SEGMENTS", 2)
+        path = tmp_path / "snapshot"
+        snapshot = DonationSnapshot(str(path), "v1")
+        for row, donation in enumerate(self.DONATIONS[:2], start=2):
+            snapshot.append([donation], row, row, {**self.CHECKPOINT, "row": row})
+        assert [s["file"] for s in snapshot.segments] == [
+            "rows-2-2.npy",
+            "rows-3-3.npy",
+        ]
+
+        snapshot.append(self.DONATIONS[2:], 4, 4, self.CHECKPOINT)
+
+        assert snapshot.segments == [
+            {"file": "rows-2-4.npy", "first_row": 2, "last_row": 4, "donations": 3}
+        ]
+        assert sorted(f for f in os.listdir(path) if f.endswith(".npy")) == [
+            "rows-2-4.npy"
+        ]
+
+    def test_interrupted_rebuild_keeps_previous_snapshot(self, tmp_path, monkeypatch):
+        """Test that a rebuild dying before the manifest leaves the old files alone."""
+        path = str(tmp_path / "snapshot")
+        DonationSnapshot(path, "v1").append(self.DONATIONS, 2, 4, self.CHECKPOINT)
+        snapshot = DonationSnapshot.open(path, "v1")
+        snapshot.clear()
+        write = donor_snapshot.atomic_write
+
+        def crash_on_manifest(file, content):
+            if file.endswith("snapshot.json"):
+                raise OSError("interrupted")
+            write(file, content)
+
+        monkeypatch.setattr(donor_snapshot, "atomic_write", crash_on_manifest)
+        with pytest.raises(OSError):
+            snapshot.append(self.DONATIONS[2:], 2, 4, {**self.CHECKPOINT, "row": 9})
+
+        reopened = DonationSnapshot.open(path, "v1")
+        records = reopened.table().records
+        assert reopened.checkpoint == self.CHECKPOINT
+        assert records["cents"].tolist() == [10000, 20000, 3000]
+        assert [reopened.names[code] for code in records["name"]] == [
+            name for _normalized, name, _cents, _date in self.DONATIONS
+        ]
+
+    def test_donations_are_chronological_across_segments(self, tmp_path):
+        """Test that a later segment with older dates is merged in date order."""
+        snapshot = DonationSnapshot(str(tmp_path / "snapshot"), "v1")
+        snapshot.append(self.DONATIONS[2:], 2, 2, self.CHECKPOINT)
+        snapshot.append(self.DONATIONS[:2], 3, 4, self.CHECKPOINT)
+
+        data = snapshot.table().records
+
+        assert data["cents"].tolist() == [10000, 20000, 3000]
+
+    def test_timezone_dates_are_rejected(self, tmp_path):
+        """Test that dates with an offset are not silently shifted."""
+        snapshot = DonationSnapshot(str(tmp_path / "snapshot"), "v1")
+
+        with pytest.raises(ValueError, match="snapshot"):
+            snapshot.encode([("ANA", "Ana", 100, "2025-12-13T10:00:00+03:00")])
+
+    def test_payload_matches_ranking_rules(self, tmp_path):
+        """Test that the vectorized payload keeps the latest display name."""
+        snapshot = DonationSnapshot(str(tmp_path / "snapshot"), "v1")
+        snapshot.append(self.DONATIONS, 2, 4, self.CHECKPOINT)
+
+        payload = build_payload_from_snapshot(snapshot)
+
+        assert payload["topDonors"] == [
+            {"name": "Maria Santos"},
+            {"name": "Jose Silva"},
+        ]
+        assert payload["latestDonations"][0] == {"name": "Jose Silva"}
+
+    def test_empty_snapshot_has_no_payload(self, tmp_path):
+        """Test that an empty snapshot yields no payload."""
+        assert build_payload_from_snapshot(DonationSnapshot(str(tmp_path))) is None
+
+
+class TestFingerprint:
+    """Tests for snapshot invalidation on cleaning changes."""
+
+    def test_depends_on_engine_and_fuzzy_merge(self):
+        """Test that engine and fuzzy merging change the fingerprint."""
+        assert cleaning_fingerprint("lean") == cleaning_fingerprint("lean")
+        assert cleaning_fingerprint("lean") != cleaning_fingerprint("pandas")
+        assert cleaning_fingerprint("lean") != cleaning_fingerprint("lean", fuzzy=True)
+
+    def test_depends_on_cleaning_source(self, tmp_path, monkeypatch):
+        """Test that editing a cleaning module changes the fingerprint."""
+        module = tmp_path / "fake_cleaning.py"
+        module.write_text("RULE = 1\n", encoding="utf-8")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(
+            donor_snapshot,
+            "CLEANING_MODULES",
+            (*donor_snapshot.CLEANING_MODULES, "fake_cleaning"),
+        )
+        before = cleaning_fingerprint("lean")
+
+        module.write_text("RULE = 2\n", encoding="utf-8")
+
+        assert cleaning_fingerprint("lean") != before
+
+
+class TestRunSnapshot:
+    """Tests for warm runs that only clean the new tail of the sheet."""
+
+    def run(self, worksheet, path, engine="pandas"):
+        """Runs one cycle with a fresh source, as each job does."""
+        return run_snapshot(WorksheetSource(worksheet), str(path), engine)
+
+    def test_warm_run_cleans_only_new_rows(self, tmp_path, monkeypatch):
+        """Test that a warm run fetches and cleans only rows after the checkpoint."""
+        worksheet = FakeWorksheet([HEADER] + ROWS)
+        assert self.run(worksheet, tmp_path) == full_rebuild(worksheet.values)
+
+        cleaned = []
+        original = update_donors.clean_donation_rows
+        monkeypatch.setattr(
+            update_donors,
+            "clean_donation_rows",
+            lambda columns, engine: (
+                cleaned.append(columns) or original(columns, engine)
+            ),
+        )
+        worksheet.values.append(["14/12/2025 09:00:00", "jose  silva", "30"])
+        worksheet.requests.clear()
+        result = self.run(worksheet, tmp_path)
+
+        assert worksheet.requests == [["A4:A", "B4:B", "C4:C"]]
+        assert [column["Nome"] for column in cleaned] == [["jose  silva"]]
+        assert result == full_rebuild(worksheet.values)
+
+    def test_edited_checkpoint_row_rebuilds_snapshot(self, tmp_path):
+        """Test that an edited checkpoint row discards the snapshot."""
+        worksheet = FakeWorksheet([HEADER] + ROWS)
+        self.run(worksheet, tmp_path)
+
+        worksheet.values[3] = ["13/12/2025 12:00:00", "Pedro", "500"]
+        result = self.run(worksheet, tmp_path)
+
+        assert result == full_rebuild(worksheet.values)
+        assert result["topDonors"][0] == {"name": "Pedro"}
+
+    def test_cleaning_change_rebuilds_snapshot(self, tmp_path, monkeypatch):
+        """Test that a new cleaning fingerprint forces a full read."""
+        worksheet = FakeWorksheet([HEADER] + ROWS)
+        self.run(worksheet, tmp_path)
+        monkeypatch.setattr(donor_snapshot, "SNAPSHOT_VERSION", 0)
+
+        worksheet.requests.clear()
+        result = self.run(worksheet, tmp_path)
+
+        assert worksheet.requests == ["row 1", ["A2:A", "B2:B", "C2:C"]]
+        assert result == full_rebuild(worksheet.values)
+
+    def test_header_only_sheet_returns_none(self, tmp_path):
+        """Test that a sheet with only the header yields no payload."""
+        worksheet = FakeWorksheet([HEADER])
+        assert self.run(worksheet, tmp_path) is None
+
+        worksheet.values.append(ROWS[0])
+        assert self.run(worksheet, tmp_path)["topDonors"] == [{"name": "José Silva"}]
+
+    @pytest.mark.parametrize("engine", ["pandas", "lean"])
+    @pytest.mark.parametrize("seed", range(3))
+    def test_warm_runs_match_full_rebuild(self, tmp_path, engine, seed):
+        """Test that growing the sheet in batches gives the same payload as a cold run."""
+        rows = random_rows(120, seed)
+        worksheet = FakeWorksheet([HEADER])
+        for start in range(0, len(rows), 17):
+            worksheet.values.extend(rows[start : start + 17])
+            result = self.run(worksheet, tmp_path, engine)
+
+        assert result == full_rebuild(worksheet.values, engine)
+        manifest = json.loads((tmp_path / "snapshot.json").read_text(encoding="utf-8"))
+        assert manifest["checkpoint"]["row"] == len(rows) + 1
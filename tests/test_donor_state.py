@@ -0,0 +1,41 @@
+"""
+Unit tests for donor_state.py module.
+Tests checkpoint hashing of raw sheet rows.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from donor_state import make_checkpoint, row_hash
+
+
+class TestRowHash:
+    """Tests for the row content hash."""
+
+    def test_same_content_same_hash(self):
+        """Test that equal rows hash equally."""
+        row = ["13/12/2025 10:00:00", "José Silva", "100"]
+        assert row_hash(row) == row_hash(list(row))
+
+    def test_ignores_trailing_padding(self):
+        """Test that trailing empty cells do not change the hash."""
+        row = ["13/12/2025 10:00:00", "José Silva", "100"]
+        assert row_hash(row) == row_hash(row + ["", ""])
+
+    def test_detects_edited_row(self):
+        """Test that editing a cell changes the hash."""
+        row = ["13/12/2025 10:00:00", "José Silva", "100"]
+        assert row_hash(row) != row_hash(["13/12/2025 10:00:00", "José Silva", "150"])
+
+
+class TestMakeCheckpoint:
+    """Tests for checkpoint creation."""
+
+    def test_checkpoint_points_to_row(self):
+        """Test that the checkpoint stores the row number and its hash."""
+        row = ["13/12/2025 10:00:00", "José Silva", "100"]
+        checkpoint = make_checkpoint(7, row)
+
+        assert checkpoint == {"row": 7, "hash": row_hash(row)}
@@ -0,0 +1,170 @@
+"""
+Unit tests for donor_store.py module.
+Tests upsert semantics, indexed rankings and checkpoint metadata.
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from donor_store import SCHEMA_VERSION, DonorStore
+from rollups import DayBucket, daily_rollups
+
+
+class TestUpsert:
+    """Tests for aggregate upserts."""
+
+    def test_sums_and_counts_donations(self):
+        """Test that donations of the same donor are summed and counted."""
+        store = DonorStore()
+        store.upsert_donations(
+            [
+                ("JOSE SILVA", "José Silva", 10_000, "2025-12-13T10:00:00"),
+                ("JOSE SILVA", "jose silva", 5_000, "2025-12-13T11:00:00"),
+            ]
+        )
+
+        assert store.donors() == [
+            ("JOSE SILVA", "jose silva", 15_000, 2, "2025-12-13T11:00:00")
+        ]
+
+    def test_keeps_most_recent_display_name(self):
+        """Test that an older donation does not overwrite the latest name."""
+        store = DonorStore()
+        store.upsert_donations(
+            [
+                ("JOAO", "João", 1_000, "2025-12-13T12:00:00"),
+                ("JOAO", "JOAO", 1_000, "2025-12-13T09:00:00"),
+            ]
+        )
+
+        assert store.donors()[0][1] == "João"
+        assert store.donors()[0][4] == "2025-12-13T12:00:00"
+
+
+class TestRankings:
+    """Tests for top-N and latest-N queries."""
+
+    def setup_method(self):
+        self.store = DonorStore()
+        self.store.upsert_donations(
+            [
+                ("ANA", "Ana", 30_000, "2025-12-13T10:00:00"),
+                ("BIA", "Bia", 10_000, "2025-12-13T11:00:00"),
+                ("CAIO", "Caio", 20_000, "2025-12-13T12:00:00"),
+                ("BIA", "Bia", 25_000, "2025-12-13T13:00:00"),
+            ]
+        )
+
+    def test_top_donors_by_total(self):
+        """Test that top donors are ordered by aggregated total."""
+        assert self.store.top_donors(2) == ["Bia", "Ana"]
+        assert self.store.ranked_donors() == ["Bia", "Ana", "Caio"]
+
+    def test_ranked_totals_follow_ranking(self):
+        """Test that totals come in the same order as the ranked names."""
+        assert self.store.ranked_totals() == [35_000, 30_000, 20_000]
+        assert self.store.ranked_totals(1) == [35_000]
+
+    def test_latest_donors_unique(self):
+        """Test that latest donors are unique and newest first."""
+        assert self.store.latest_donors(10) == ["Bia", "Caio", "Ana"]
+
+    def test_queries_use_indexes(self):
+        """Test that the ranking queries are served by the indexes."""
+        plan = self.store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT name FROM donors "
+            "ORDER BY total_cents DESC, normalized LIMIT 10"
+        ).fetchall()
+
+        assert any("idx_donors_total" in row[-1] for row in plan)
+
+
+class TestDailyRollups:
+    """Tests for the per-day buckets."""
+
+    DONATIONS = (
+        ("ANA", "Ana", 1_000, "2025-12-13T10:00:00"),
+        ("BIA", "Bia", 2_000, "2025-12-13T11:00:00"),
+        ("ANA", "Ana", 500, "2025-12-13T12:00:00"),
+        ("ANA", "Ana", 300, "2025-12-14T09:00:00"),
+    )
+
+    def test_buckets_count_distinct_donors(self):
+        """Test totals, donations and donors counted once per day."""
+        store = DonorStore()
+        store.upsert_daily(self.DONATIONS)
+
+        assert store.daily() == [
+            DayBucket("2025-12-13", 3_500, 3, 2),
+            DayBucket("2025-12-14", 300, 1, 1),
+        ]
+
+    def test_batches_match_full_rollup(self):
+        """Test that batch-by-batch upserts equal a rollup from scratch."""
+        store = DonorStore()
+        for donation in self.DONATIONS:
+            store.upsert_daily([donation])
+
+        assert store.daily() == daily_rollups(self.DONATIONS)
+
+    def test_new_donation_only_touches_its_day(self):
+        """Test that a new response writes only its own day's bucket."""
+        store = DonorStore()
+        store.upsert_daily(self.DONATIONS)
+        store.conn.execute("CREATE TEMP TABLE touched (day TEXT)")
+        for event in ("INSERT", "UPDATE"):
+            store.conn.execute(
+                f"CREATE TEMP TRIGGER log_{event} AFTER {event} ON daily "
+                "BEGIN INSERT INTO touched VALUES (NEW.day); END"
+            )
+
+        store.upsert_daily([("BIA", "Bia", 700, "2025-12-14T18:00:00")])
+
+        touched = store.conn.execute("SELECT day FROM touched").fetchall()
+        assert touched == [("2025-12-14",)]
+        assert store.daily()[0] == DayBucket("2025-12-13", 3_500, 3, 2)
+
+
+class TestPersistence:
+    """Tests for metadata and on-disk persistence."""
+
+    def test_meta_round_trip_on_disk(self, tmp_path):
+        """Test that aggregates and checkpoint survive reopening the file."""
+        path = str(tmp_path / "cache" / "donors.sqlite3")
+        with DonorStore(path) as store:
+            store.upsert_donations([("ANA", "Ana", 100, "2025-12-13T10:00:00")])
+            store.set_meta("checkpoint", {"row": 2, "hash": "abc"})
+
+        with DonorStore(path) as store:
+            assert store.donor_count() == 1
+            assert store.get_meta("checkpoint") == {"row": 2, "hash": "abc"}
+
+    def test_clear_removes_everything(self):
+        """Test that clear drops aggregates and checkpoint."""
+        store = DonorStore()
+        store.upsert_donations([("ANA", "Ana", 100, "2025-12-13T10:00:00")])
+        store.upsert_daily([("ANA", "Ana", 100, "2025-12-13T10:00:00")])
+        store.set_meta("checkpoint", {"row": 2})
+
+        store.clear()
+
+        assert store.donor_count() == 0
+        assert store.latest_donors(10) == []
+        assert store.daily() == []
+        assert store.get_meta("checkpoint") is None
+
+    def test_old_schema_is_recreated(self, tmp_path):
+        """Test that a database from another schema version is reset."""
+        path = str(tmp_path / "donors.sqlite3")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE donors (legacy TEXT)")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        conn.commit()
+        conn.close()
+
+        with DonorStore(path) as store:
+            assert store.donor_count() == 0
+            assert store.get_meta("checkpoint") is None
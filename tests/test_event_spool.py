@@ -0,0 +1,194 @@
+"""
+Unit tests for event_spool.py module.
+Tests the file spool and the coalescing runner with a fake event source.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from event_spool import CoalescingRunner, EventSpool, WorkerLock
+
+
+class FakeClock:
+    """Manual clock; `sleep` advances time and delivers scheduled events."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.scheduled = []  # (time, event)
+        self.spool = None
+
+    def __call__(self):
+        return self.now
+
+    def schedule(self, delay, event):
+        self.scheduled.append((self.now + delay, event))
+
+    def sleep(self, seconds):
+        self.now += seconds
+        due = [item for item in self.scheduled if item[0] <= self.now]
+        self.scheduled = [item for item in self.scheduled if item[0] > self.now]
+        for _at, event in due:
+            self.spool.append(event)
+
+
+def make_runner(tmp_path, window=30.0):
+    clock = FakeClock()
+    spool = EventSpool(str(tmp_path / "events.jsonl"), clock=clock)
+    clock.spool = spool
+    runs = []
+    runner = CoalescingRunner(spool, run=runs.append, window=window, sleep=clock.sleep)
+    return clock, spool, runner, runs
+
+
+class TestEventSpool:
+    """Tests for the file-based queue."""
+
+    def test_append_and_drain(self, tmp_path):
+        """Test that drained events come back in order and empty the spool."""
+        spool = EventSpool(str(tmp_path / "events.jsonl"))
+        spool.append({"id": 1})
+        spool.append({"id": 2})
+
+        assert [event["id"] for event in spool.drain()] == [1, 2]
+        assert spool.drain() == []
+
+    def test_partial_line_is_ignored(self, tmp_path):
+        """Test that a truncated write does not break draining."""
+        path = tmp_path / "events.jsonl"
+        spool = EventSpool(str(path))
+        spool.append({"id": 1})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"id": ')
+
+        assert [event["id"] for event in spool.drain()] == [1]
+
+    def test_concurrent_appends_are_never_lost(self, tmp_path):
+        """Test that no event is dropped while another process keeps draining."""
+        spool = EventSpool(str(tmp_path / "events.jsonl"))
+        writers = [
+            threading.Thread(
+                target=lambda w=w: [spool.append({"id": (w, i)}) for i in range(200)]
+            )
+            for w in range(4)
+        ]
+        for writer in writers:
+            writer.start()
+        drained = []
+        while any(writer.is_alive() for writer in writers):
+            drained += spool.drain()
+        for writer in writers:
+            writer.join()
+        drained += spool.drain()
+
+        assert len(drained) == 800
+        assert len({tuple(event["id"]) for event in drained}) == 800
+
+    def test_crashed_batch_is_recovered(self, tmp_path):
+        """Test that a batch left by a killed worker is drained before newer events."""
+        spool = EventSpool(str(tmp_path / "events.jsonl"))
+        spool.append({"id": 1})
+        os.replace(spool.path, spool.draining)
+        spool.append({"id": 2})
+
+        assert [event["id"] for event in spool.peek()] == [1, 2]
+        assert [event["id"] for event in spool.drain()] == [1, 2]
+        assert spool.peek() == []
+
+    def test_failed_batch_goes_back_to_the_queue(self, tmp_path):
+        """Test that events survive a failing block, ahead of later arrivals."""
+        spool = EventSpool(str(tmp_path / "events.jsonl"))
+        spool.append({"id": 1})
+
+        try:
+            with spool.batch() as events:
+                spool.append({"id": 2})
+                raise RuntimeError(len(events))
+        except RuntimeError:
+            pass
+
+        assert not os.path.exists(spool.draining)
+        assert [event["id"] for event in spool.drain()] == [1, 2]
+
+
+class TestCoalescingRunner:
+    """Tests for the debounce worker."""
+
+    def test_burst_is_coalesced_into_one_run(self, tmp_path):
+        """Test that a burst inside the window triggers a single run."""
+        clock, spool, runner, runs = make_runner(tmp_path)
+        spool.append({"id": 0})
+        for i in range(1, 50):
+            clock.schedule(i * 0.5, {"id": i})
+
+        assert runner.drain_all() == [50]
+        assert len(runs) == 1
+        assert [event["id"] for event in runs[0]] == list(range(50))
+
+    def test_late_events_start_a_new_batch(self, tmp_path):
+        """Test that events after the window are processed in another run."""
+        clock, spool, runner, runs = make_runner(tmp_path, window=10.0)
+        spool.append({"id": 0})
+        clock.schedule(5, {"id": 1})
+        clock.schedule(15, {"id": 2})
+
+        assert runner.run_batch() == 2
+        # O evento das 15s ainda não chegou: fila vazia, nada a fazer
+        assert runner.run_batch() == 0
+        clock.sleep(5)
+        assert runner.run_batch() == 1
+        assert len(runs) == 2
+
+    def test_no_wait_when_window_already_elapsed(self, tmp_path):
+        """Test that old pending events are processed immediately."""
+        clock, spool, runner, _runs = make_runner(tmp_path)
+        spool.append({"id": 0})
+        clock.now += 60
+        slept = []
+        runner.sleep = slept.append
+
+        assert runner.run_batch() == 1
+        assert slept == []
+
+    def test_second_worker_only_enqueues(self, tmp_path):
+        """Test that a held lock leaves events queued for the active worker."""
+        _clock, spool, runner, runs = make_runner(tmp_path)
+        spool.append({"id": 0})
+        held = WorkerLock(spool.path + ".lock")
+        assert held.acquire()
+        try:
+            assert runner.drain_all() is None
+            assert runs == []
+            assert len(spool.peek()) == 1
+        finally:
+            held.release()
+
+        assert runner.drain_all() == [1]
+
+    def test_failed_run_keeps_events_for_the_next_worker(self, tmp_path):
+        """Test that a pipeline error re-queues the batch instead of losing it."""
+        clock, spool, _runner, _runs = make_runner(tmp_path)
+
+        def fail(events):
+            raise ConnectionError("Sheets indisponível")
+
+        failing = CoalescingRunner(spool, run=fail, sleep=clock.sleep)
+        spool.append({"id": 0})
+        with pytest.raises(ConnectionError):
+            failing.drain_all()
+
+        runs = []
+        runner = CoalescingRunner(spool, run=runs.append, sleep=clock.sleep)
+        assert runner.drain_all() == [1]
+        assert [event["id"] for event in runs[0]] == [0]
+
+    def test_empty_spool(self, tmp_path):
+        """Test that an empty spool never runs the pipeline."""
+        _clock, _spool, runner, runs = make_runner(tmp_path)
+
+        assert runner.drain_all() == []
+        assert runs == []
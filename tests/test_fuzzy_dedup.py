@@ -0,0 +1,177 @@
+"""
+Unit tests for fuzzy_dedup.py module.
+Tests the fuzzy donor merge, its blocking and the persisted alias table.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+import fuzzy_dedup
+from donor_payload import build_donor_payload
+from fuzzy_dedup import (
+    AliasTable,
+    block_keys,
+    core_name,
+    edit_distance,
+    get_alias_table,
+    same_person,
+    use_alias_table,
+)
+from normalization import normalize_name
+
+
+def resolve(table: AliasTable, names: list[str]) -> dict[str, str]:
+    """Resolves display names, returning only the merged ones."""
+    canonical = table.resolve(normalize_name(name) for name in names)
+    return {name: target for name, target in canonical.items() if name != target}
+
+
+class TestRules:
+    """Tests for the name comparison rules."""
+
+    def test_core_name_drops_particles_and_suffixes(self):
+        """Test that particles and kinship suffixes are ignored."""
+        assert core_name("JOSE DA SILVA JR.") == "JOSE SILVA"
+        assert core_name("CONCEICAO DOS SANTOS FILHO") == "CONCEICAO SANTOS"
+        assert core_name("JUNIOR") == "JUNIOR"
+
+    def test_block_keys_survive_one_typo(self):
+        """Test that a typo in one end of the last name keeps a shared block."""
+        for typo in ["JOSE SLIVA", "JOSE SILVAA", "JOSEE SILVA"]:
+            assert set(block_keys(typo)) & set(block_keys("JOSE SILVA"))
+        assert not set(block_keys("JOSE SILVA")) & set(block_keys("JOSE SILVA LIMA"))
+
+    def test_edit_distance(self):
+        """Test the edit distance with adjacent transpositions."""
+        assert edit_distance("SILVA", "SLIVA") == 1
+        assert edit_distance("SILVA", "SILVAA") == 1
+        assert edit_distance("SOUZA", "SOUSA") == 1
+        assert edit_distance("ABC", "CBA") == 2
+
+    @pytest.mark.parametrize(
+        "a,b,expected",
+        [
+            ("JOSE SILVA", "JOSE SILVA", True),
+            ("JOSE SILVA", "JOSE SLIVA", True),
+            ("ANA SOUZA", "ANA SOUSA", True),
+            ("MARIA SILVA", "MARIO SILVA", False),
+            ("ANA LIMA", "ANA LIMA SOUZA", False),
+            ("JOSE SILVA", "JOAO SOUZA", False),
+            ("ANA LIMA", "ANA LIMO", False),
+            ("ANA SA", "ANA SO", False),
+        ],
+    )
+    def test_same_person(self, a, b, expected):
+        """Test the conservative merge rule."""
+        assert same_person(a, b) is expected
+
+
+class TestAliasTable:
+    """Tests for merging and the alias table."""
+
+    def test_merges_variants(self):
+        """Test that spelling variants of one donor share a canonical name."""
+        merged = resolve(
+            AliasTable(),
+            [
+                "José Silva",
+                "Jose da Silva",
+                "Jose  da Silva Jr",
+                "Jose Sliva",
+                "Maria Silva",
+                "Mario Silva",
+                "Ana Lima",
+                "Ana Lima Souza",
+            ],
+        )
+
+        assert merged == {
+            "JOSE SILVA": "JOSE DA SILVA",
+            "JOSE DA SILVA JR": "JOSE DA SILVA",
+            "JOSE SLIVA": "JOSE DA SILVA",
+        }
+
+    def test_repeat_runs_only_score_new_names(self, monkeypatch):
+        """Test that known names are never queried again."""
+        table = AliasTable()
+        table.resolve(["JOSE SILVA", "MARIA SOUZA"])
+        queried = []
+        similar_pairs = fuzzy_dedup.similar_pairs
+
+        def spy(cores, flags):
+            queried.extend(core for core, flag in zip(cores, flags) if flag)
+            return similar_pairs(cores, flags)
+
+        monkeypatch.setattr(fuzzy_dedup, "similar_pairs", spy)
+
+        assert (
+            table.resolve(["JOSE SILVA", "MARIA SOUZA"])["JOSE SILVA"] == "JOSE SILVA"
+        )
+        assert queried == []
+        assert (
+            table.resolve(["JOSE SILVA", "JOSE SILVAA"])["JOSE SILVAA"] == "JOSE SILVA"
+        )
+        assert queried == ["JOSE SILVAA"]
+
+    def test_new_name_never_joins_two_known_donors(self):
+        """Test that a canonical name never changes once assigned."""
+        # "LUIZ LIMA" está a uma letra de cada um dos dois doadores conhecidos
+        table = AliasTable(known=["LUIS LIMA", "LUIZ LIMY"])
+
+        canonical = table.resolve(["LUIS LIMA", "LUIZ LIMY", "LUIZ LIMA"])
+
+        assert canonical["LUIS LIMA"] == "LUIS LIMA"
+        assert canonical["LUIZ LIMY"] == "LUIZ LIMY"
+        assert canonical["LUIZ LIMA"] in {"LUIS LIMA", "LUIZ LIMY"}
+
+    def test_distinct_pairs_are_kept_apart(self):
+        """Test that manually separated names are never merged."""
+        table = AliasTable(distinct=[["JOSE SILVA", "JOSE SILVA JR"]])
+
+        canonical = table.resolve(["JOSE SILVA", "JOSE SILVA JR", "JOSE DA SILVA"])
+
+        assert canonical["JOSE SILVA"] != canonical["JOSE SILVA JR"]
+
+    def test_round_trip(self, tmp_path):
+        """Test that merges persist and a corrupt file starts empty."""
+        path = tmp_path / "cache" / "aliases.json"
+        with use_alias_table(str(path)) as table:
+            assert get_alias_table() is table
+            table.resolve(["JOSE SILVA", "JOSE DA SILVA"])
+        assert get_alias_table() is None
+
+        data = json.loads(path.read_text())
+        assert data["aliases"] == {"JOSE SILVA": "JOSE DA SILVA"}
+        assert AliasTable.load(str(path)).canonical("JOSE SILVA") == "JOSE DA SILVA"
+
+        path.write_text("{corrompido")
+        assert AliasTable.load(str(path)).aliases == {}
+
+
+@pytest.mark.parametrize("engine", ["pandas", "lean"])
+def test_engines_merge_donors(engine, tmp_path):
+    """Test that both engines aggregate merged donors under one name."""
+    records = [
+        {
+            "Carimbo de data/hora": "13/12/2025 10:00:00",
+            "Nome": "Jose Silva",
+            "Valor": 10,
+        },
+        {"Carimbo de data/hora": "13/12/2025 11:00:00", "Nome": "Bia", "Valor": 15},
+        {
+            "Carimbo de data/hora": "13/12/2025 12:00:00",
+            "Nome": "José da Silva",
+            "Valor": 10,
+        },
+    ]
+
+    with use_alias_table(str(tmp_path / "aliases.json")):
+        payload = build_donor_payload(records, engine)
+
+    assert [donor["name"] for donor in payload["topDonors"]] == ["José da Silva", "Bia"]
+    assert build_donor_payload(records, engine)["topDonors"][0] == {"name": "Bia"}
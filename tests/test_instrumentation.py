@@ -0,0 +1,122 @@
+"""
+Unit tests for instrumentation.py module.
+Tests per-stage metrics, drop counters and their pipeline integration.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from donor_payload import build_donor_payload
+from instrumentation import NULL_METRICS, Metrics, collect, get_metrics
+
+COLUMNS = {
+    "Carimbo de data/hora": [
+        "13/12/2025 10:00:00",
+        "13/12/2025 11:00:00",
+        "13/12/2025 12:00:00",
+        "data inválida",
+        None,
+    ],
+    "Nome": ["Ana", "   ", "Bia", "Caio", "Duda"],
+    "Valor": [100, 50, "abc", 10, 5],
+}
+
+
+class TestMetrics:
+    """Tests for the metrics collector."""
+
+    def test_disabled_by_default(self):
+        """Test that no metrics are collected unless explicitly enabled."""
+        assert get_metrics() is NULL_METRICS
+        with NULL_METRICS.stage("clean", rows_in=10) as stage:
+            stage.rows_out = 5
+            stage.drop("blank_name", 5)
+        assert stage.rows_out is None
+
+    def test_stage_records_times_and_rows(self):
+        """Test that a stage records wall/CPU time, rows and drops."""
+        metrics = Metrics()
+        with metrics.stage("clean", rows_in=10) as stage:
+            stage.drop("blank_name", 3)
+            stage.drop("blank_name", 1)
+            stage.drop("invalid_valor", 0)
+            stage.rows_out = 6
+
+        (recorded,) = metrics.to_dict()["stages"]
+        assert recorded["stage"] == "clean"
+        assert recorded["rows_in"] == 10 and recorded["rows_out"] == 6
+        assert recorded["wall_s"] >= 0 and recorded["cpu_s"] >= 0
+        assert recorded["dropped"] == {"blank_name": 4}
+        assert "peak_mb" not in recorded
+
+    def test_stage_recorded_on_error(self):
+        """Test that a failing stage is still reported."""
+        metrics = Metrics()
+        with pytest.raises(RuntimeError), metrics.stage("fetch"):
+            raise RuntimeError("falha")
+
+        assert [stage.name for stage in metrics.stages] == ["fetch"]
+
+    def test_trace_memory(self):
+        """Test that tracemalloc peaks are recorded per stage."""
+        metrics = Metrics(trace_memory=True)
+        with metrics.stage("alloc"):
+            data = [0] * 1_000_000
+        with metrics.stage("small"):
+            pass
+        del data
+
+        big, small = metrics.stages
+        assert big.peak_mb > 5
+        assert small.peak_mb < big.peak_mb
+
+    def test_logfmt_and_json(self, tmp_path):
+        """Test the logfmt lines and the JSON file."""
+        metrics = Metrics()
+        with metrics.stage("clean", rows_in=2) as stage:
+            stage.drop("blank_name", 1)
+            stage.count("tier_exact", 1)
+            stage.rows_out = 1
+
+        (line,) = metrics.logfmt()
+        assert line.startswith("stage=clean wall_s=")
+        assert "rows_in=2 rows_out=1 tier_exact=1 dropped_blank_name=1" in line
+        assert metrics.to_dict()["stages"][0]["counts"] == {"tier_exact": 1}
+
+        path = tmp_path / "metrics.json"
+        metrics.write_json(str(path))
+        assert json.loads(path.read_text())["dropped"] == {"blank_name": 1}
+
+    def test_collect_restores_previous(self):
+        """Test that collect() only activates metrics inside the block."""
+        metrics = Metrics()
+        with collect(metrics):
+            assert get_metrics() is metrics
+            with collect(None):
+                assert get_metrics() is NULL_METRICS
+            assert get_metrics() is metrics
+        assert get_metrics() is NULL_METRICS
+
+
+@pytest.mark.parametrize("engine", ["pandas", "lean"])
+def test_pipeline_reports_stages_and_drops(engine):
+    """Test that both engines report their stages and the same drop counts."""
+    metrics = Metrics()
+    with collect(metrics):
+        payload = build_donor_payload(COLUMNS, engine)
+
+    names = [stage.name for stage in metrics.stages]
+    assert names[0] in ("load", "clean")
+    assert {"clean", "parse_dates", "ranking", "weighting"} <= set(names)
+    assert metrics.dropped() == {
+        "missing_fields": 1,
+        "blank_name": 1,
+        "valor_invalid_format": 1,
+        "invalid_timestamp": 1,
+    }
+    assert [donor["text"] for donor in payload["wordCloud"]] == ["Ana"]
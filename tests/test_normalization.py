@@ -0,0 +1,91 @@
+"""
+Unit tests for normalization.py module.
+Tests that the fast normalization engine matches the original implementation.
+"""
+
+import os
+import sys
+import unicodedata
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from normalization import ACCENT_TABLE, normalize_name, normalize_series
+
+
+def reference_normalize_name(name: str) -> str:
+    """Original per-row implementation from update_donors.main()."""
+    normalized = unicodedata.normalize("NFD", name)
+    ascii_name = "".join(
+        char for char in normalized if unicodedata.category(char) != "Mn"
+    )
+    return " ".join(ascii_name.upper().split())
+
+
+class TestNormalizeName:
+    """Tests for byte-identical output against the original function."""
+
+    def test_common_names(self):
+        """Test a sample of realistic donor names."""
+        names = [
+            "José Silva",
+            "  João   Pedro   Silva  ",
+            "maria garcia",
+            "CONCEIÇÃO Araújo",
+            "Ângela Müller",
+            "Ñoño\xa0Peña",
+            "Zoë Łukasz",
+            "Straße",
+            "",
+        ]
+        for name in names:
+            assert normalize_name(name) == reference_normalize_name(name)
+
+    def test_every_char_in_table_range(self):
+        """Test each character covered by the translation table individually."""
+        for code in range(0x20, 0x250):
+            name = f"a{chr(code)}b {chr(code)}"
+            assert normalize_name(name) == reference_normalize_name(name), hex(code)
+
+    def test_fallback_for_decomposed_and_other_scripts(self):
+        """Test names that need the unicodedata fallback path."""
+        names = [
+            "José Silva",  # acento combinante já decomposto
+            "Ελένη Παπαδοπούλου",
+            "Nguyễn Văn An",
+            "ｆｕｌｌｗｉｄｔｈ",
+        ]
+        for name in names:
+            assert normalize_name(name) == reference_normalize_name(name)
+
+    def test_table_has_portuguese_accents(self):
+        """Test that the Portuguese accent set is served by the table."""
+        for char in "áàâãéêíóôõúüçÁÀÂÃÉÊÍÓÔÕÚÜÇ":
+            assert ord(char) in ACCENT_TABLE
+
+
+class TestNormalizeSeries:
+    """Tests for the factorized column normalization."""
+
+    def test_matches_row_by_row(self):
+        """Test that the factorized path matches applying row by row."""
+        names = pd.Series(
+            ["José", "jose", "José", "Ana  Lú", "ana lu"], index=[5, 3, 1, 9, 7]
+        )
+
+        result = normalize_series(names)
+
+        expected = names.apply(reference_normalize_name)
+        pd.testing.assert_series_equal(result, expected)
+
+    def test_preserves_missing_values(self):
+        """Test that missing names stay missing."""
+        result = normalize_series(pd.Series(["Ana", None]))
+
+        assert result.iloc[0] == "ANA"
+        assert result.iloc[1] is None
+
+    def test_empty_series(self):
+        """Test that an empty column is handled."""
+        assert normalize_series(pd.Series([], dtype=object)).empty
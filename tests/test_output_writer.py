@@ -0,0 +1,89 @@
+"""
+Unit tests for output_writer.py module.
+Tests deterministic serialization, change detection and the manifest.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from output_writer import (
+    content_hash,
+    manifest_path,
+    serialize_payload,
+    write_if_changed,
+)
+
+PAYLOAD = {
+    "wordCloud": [{"text": "José", "value": 5}],
+    "topDonors": [{"name": "José"}],
+    "latestDonations": [{"name": "José"}],
+}
+
+
+def test_serialization_matches_legacy_format():
+    """Test that bytes equal what json.dump(indent=4) used to write."""
+    legacy = json.dumps(PAYLOAD, ensure_ascii=False, indent=4).encode("utf-8")
+
+    assert serialize_payload(PAYLOAD) == legacy
+
+
+def test_manifest_path():
+    assert manifest_path("public/donors.json") == "public/donors.manifest.json"
+
+
+class TestWriteIfChanged:
+    """Tests for the change-aware atomic writer."""
+
+    def test_first_write_creates_file_and_manifest(self, tmp_path):
+        """Test that a new file is written with a matching manifest."""
+        path = str(tmp_path / "donors.json")
+
+        assert write_if_changed(PAYLOAD, path, clock=lambda: 0) is True
+
+        with open(path, "rb") as f:
+            content = f.read()
+        with open(manifest_path(path), encoding="utf-8") as f:
+            manifest = json.load(f)
+        assert manifest == {
+            "file": "donors.json",
+            "sha256": content_hash(content),
+            "bytes": len(content),
+            "generatedAt": "1970-01-01T00:00:00+00:00",
+        }
+
+    def test_identical_payload_is_not_rewritten(self, tmp_path):
+        """Test that unchanged content leaves file and manifest untouched."""
+        path = str(tmp_path / "donors.json")
+        write_if_changed(PAYLOAD, path, clock=lambda: 0)
+        mtimes = (os.stat(path).st_mtime_ns, os.stat(manifest_path(path)).st_mtime_ns)
+
+        assert write_if_changed(PAYLOAD, path, clock=lambda: 100) is False
+        assert mtimes == (
+            os.stat(path).st_mtime_ns,
+            os.stat(manifest_path(path)).st_mtime_ns,
+        )
+
+    def test_changed_payload_updates_manifest(self, tmp_path):
+        """Test that new content is written and the manifest follows it."""
+        path = str(tmp_path / "donors.json")
+        write_if_changed(PAYLOAD, path, clock=lambda: 0)
+
+        changed = {**PAYLOAD, "topDonors": []}
+        assert write_if_changed(changed, path, clock=lambda: 60) is True
+
+        with open(manifest_path(path), encoding="utf-8") as f:
+            manifest = json.load(f)
+        assert manifest["sha256"] == content_hash(serialize_payload(changed))
+        assert manifest["generatedAt"] == "1970-01-01T00:01:00+00:00"
+
+    def test_no_temporary_files_left(self, tmp_path):
+        """Test that the atomic rename leaves only the final files."""
+        write_if_changed(PAYLOAD, str(tmp_path / "donors.json"))
+
+        assert sorted(os.listdir(tmp_path)) == [
+            "donors.json",
+            "donors.manifest.json",
+        ]
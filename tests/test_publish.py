@@ -0,0 +1,186 @@
+"""
+Unit tests for publish.py module.
+Tests the minified, precompressed and split publish artifacts.
+"""
+
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from instrumentation import Metrics, collect
+from output_writer import atomic_write, serialize_payload
+from publish import (
+    CRITICAL_KEYS,
+    PublishOptions,
+    gzip_bytes,
+    minify,
+    publish_artifacts,
+    split_payload,
+    use_publish_options,
+)
+
+PAYLOAD = {
+    "wordCloud": [{"text": f"Doador {i}", "value": 1 + i % 5} for i in range(200)],
+    "topDonors": [{"name": f"Doador {i}"} for i in range(10)],
+    "latestDonations": [{"name": f"Doador {i}"} for i in range(190, 200)],
+    "wordCloudLayout": {"version": 1, "breakpoints": []},
+}
+
+
+def publish(tmp_path, payload=PAYLOAD, split=False):
+    """Writes the pretty donors.json, as write_json does, and publishes it."""
+    path = str(tmp_path / "donors.json")
+    atomic_write(path, serialize_payload(payload))
+    with use_publish_options(PublishOptions(split=split)):
+        artifacts, _changed = publish_artifacts(payload, path)
+        return artifacts
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestMinify:
+    """Tests for the compact serialization."""
+
+    def test_same_data_without_whitespace(self):
+        content = minify(PAYLOAD)
+
+        assert json.loads(content) == PAYLOAD
+        assert b"\n" not in content
+        assert len(content) < len(serialize_payload(PAYLOAD)) * 0.7
+
+    def test_gzip_is_deterministic(self):
+        """Test that equal content gives equal bytes (no timestamp in the header)."""
+        content = minify(PAYLOAD)
+
+        assert gzip_bytes(content) == gzip_bytes(content)
+        assert gzip.decompress(gzip_bytes(content)) == content
+
+
+class TestPublishArtifacts:
+    """Tests for the files written next to donors.json."""
+
+    def test_min_and_gzip_variants(self, tmp_path):
+        artifacts = publish(tmp_path)
+
+        content = read_bytes(tmp_path / "donors.min.json")
+        assert json.loads(content) == PAYLOAD
+        assert gzip.decompress(read_bytes(tmp_path / "donors.min.json.gz")) == content
+        assert [artifact.file for artifact in artifacts] == [
+            "donors.json",
+            "donors.min.json",
+        ]
+        original, minified = artifacts
+        assert minified.raw < original.raw
+        assert minified.gzip < minified.raw
+
+    def test_brotli_variant(self, tmp_path):
+        brotli = pytest.importorskip("brotli")
+
+        artifacts = publish(tmp_path)
+
+        content = read_bytes(tmp_path / "donors.min.json")
+        assert brotli.decompress(read_bytes(tmp_path / "donors.min.json.br")) == content
+        assert artifacts[1].brotli == os.path.getsize(tmp_path / "donors.min.json.br")
+
+    def test_without_brotli_stale_br_is_removed(self, tmp_path, monkeypatch):
+        """Test that a missing brotli package never leaves an outdated .br."""
+        (tmp_path / "donors.min.json.br").write_bytes(b"old")
+        monkeypatch.setitem(sys.modules, "brotli", None)
+
+        artifacts = publish(tmp_path)
+
+        assert not (tmp_path / "donors.min.json.br").exists()
+        assert artifacts[1].brotli is None
+
+    def test_unchanged_payload_rewrites_nothing(self, tmp_path, capsys):
+        """Test that a second run leaves the files alone and prints no report."""
+        publish(tmp_path)
+        assert "donors.min.json" in capsys.readouterr().out
+        before = {
+            name: os.stat(tmp_path / name).st_mtime_ns
+            for name in os.listdir(tmp_path)
+            if name.startswith("donors.min")
+        }
+
+        publish(tmp_path)
+
+        after = {name: os.stat(tmp_path / name).st_mtime_ns for name in before}
+        assert after == before
+        assert capsys.readouterr().out == ""
+
+    def test_unchanged_content_is_not_recompressed(self, tmp_path, monkeypatch):
+        """Test that brotli only runs for bytes that actually changed."""
+        publish(tmp_path)
+        monkeypatch.setattr("publish.brotli_bytes", pytest.fail)
+
+        artifacts = publish(tmp_path)
+
+        assert artifacts[0].brotli is None
+        assert artifacts[1].gzip == os.path.getsize(tmp_path / "donors.min.json.gz")
+
+    def test_unwritten_json_skips_publishing(self, tmp_path, monkeypatch):
+        """Test that an unchanged donors.json with its artifacts costs nothing."""
+        publish(tmp_path)
+        monkeypatch.setattr("publish.gzip_bytes", pytest.fail)
+        path = str(tmp_path / "donors.json")
+
+        assert publish_artifacts(PAYLOAD, path, written=False) == ([], False)
+
+    def test_unwritten_json_restores_missing_artifacts(self, tmp_path):
+        """Test that a missing variant is published even if donors.json kept."""
+        publish(tmp_path)
+        os.remove(tmp_path / "donors.min.json.gz")
+        path = str(tmp_path / "donors.json")
+
+        artifacts, changed = publish_artifacts(PAYLOAD, path, written=False)
+
+        assert changed
+        assert [artifact.file for artifact in artifacts][1:] == ["donors.min.json"]
+        assert (tmp_path / "donors.min.json.gz").exists()
+
+    def test_sizes_are_recorded_in_metrics(self, tmp_path):
+        with collect(Metrics()) as metrics:
+            artifacts = publish(tmp_path)
+
+        (stage,) = metrics.stages
+        assert stage.name == "publish"
+        assert stage.counts["donors_min_bytes"] == artifacts[1].raw
+        assert stage.counts["donors_gzip_bytes"] == artifacts[0].gzip
+
+
+class TestSplit:
+    """Tests for the critical/deferred split."""
+
+    def test_split_payload(self):
+        critical, deferred = split_payload(PAYLOAD)
+
+        assert list(critical) == list(CRITICAL_KEYS)
+        assert list(deferred) == ["wordCloud", "wordCloudLayout"]
+
+    def test_critical_file_is_small(self, tmp_path):
+        """Test that first paint needs only the hero and table lists."""
+        artifacts = publish(tmp_path, split=True)
+
+        critical = json.loads(read_bytes(tmp_path / "donors.critical.json"))
+        deferred = json.loads(read_bytes(tmp_path / "donors.wordcloud.json"))
+        assert {**critical, **deferred} == PAYLOAD
+        sizes = {artifact.file: artifact for artifact in artifacts}
+        assert sizes["donors.critical.json"].gzip < 500
+        assert (tmp_path / "donors.critical.json.gz").exists()
+
+    def test_turning_split_off_removes_its_files(self, tmp_path):
+        publish(tmp_path, split=True)
+
+        publish(tmp_path)
+
+        assert not [name for name in os.listdir(tmp_path) if "critical" in name]
+        assert not [name for name in os.listdir(tmp_path) if "wordcloud" in name]
@@ -0,0 +1,138 @@
+"""
+Unit tests for ranking.py module.
+Tests the streaming top-K / latest-K structure and its serialization.
+"""
+
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from ranking import DonorRanking
+
+
+def make_donations(count: int, seed: int = 110) -> list[tuple[str, str, int, str]]:
+    """Builds chronologically ordered donations with repeated donors and ties."""
+    rng = random.Random(seed)
+    donations = []
+    for minute in sorted(rng.randint(0, 59) for _ in range(count)):
+        donor = rng.randint(1, 40)
+        donations.append(
+            (
+                f"DONOR {donor}",
+                f"Donor {donor}",
+                rng.choice([1_000, 2_500, 5_000]),
+                f"2025-12-13T10:{minute:02d}:00",
+            )
+        )
+    return donations
+
+
+def brute_force(donations, top_k: int, latest_k: int):
+    """Reference ranking computed by re-sorting all donors."""
+    donors = {}
+    for normalized, name, amount, ts in donations:
+        entry = donors.setdefault(normalized, [name, 0, ts])
+        entry[1] += amount
+        if ts >= entry[2]:
+            entry[0], entry[2] = name, ts
+    ranked = sorted(donors.items(), key=lambda item: (-item[1][1], item[0]))
+    latest = sorted(
+        donors.items(), key=lambda item: (item[1][2], item[0]), reverse=True
+    )
+    return (
+        [entry[0] for _, entry in ranked],
+        [entry[0] for _, entry in ranked[:top_k]],
+        [entry[0] for _, entry in latest[:latest_k]],
+    )
+
+
+class TestStreamingRanking:
+    """Tests for incremental maintenance of the rankings."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_full_resort(self, seed):
+        """Test that streaming updates match re-sorting everything."""
+        donations = make_donations(400, seed)
+        ranking = DonorRanking(top_k=5, latest_k=7)
+        ranking.extend(donations)
+
+        ranked, top, latest = brute_force(donations, 5, 7)
+
+        assert ranking.ranked_names() == ranked
+        assert ranking.top() == top
+        assert ranking.latest() == latest
+        totals = ranking.ranked_totals()
+        assert totals == sorted(totals, reverse=True)
+        assert sum(totals) == sum(cents for _, _, cents, _ in donations)
+
+    def test_latest_dedups_on_normalized_name(self):
+        """Test that name variants of one donor appear once in latest-K."""
+        ranking = DonorRanking()
+        ranking.extend(
+            [
+                ("JOSE SILVA", "José Silva", 1_000, "2025-12-13T10:00:00"),
+                ("ANA", "Ana", 1_000, "2025-12-13T11:00:00"),
+                ("JOSE SILVA", "jose silva", 1_000, "2025-12-13T12:00:00"),
+            ]
+        )
+
+        assert ranking.latest() == ["jose silva", "Ana"]
+
+    def test_evicted_donor_returns_with_new_donation(self):
+        """Test that a donor dropped from latest-K re-enters when donating again."""
+        ranking = DonorRanking(latest_k=2)
+        ranking.extend(
+            [
+                ("A", "A", 100, "2025-12-13T10:00:00"),
+                ("B", "B", 100, "2025-12-13T11:00:00"),
+                ("C", "C", 100, "2025-12-13T12:00:00"),
+            ]
+        )
+        assert ranking.latest() == ["C", "B"]
+
+        ranking.add("A", "A", 100, "2025-12-13T13:00:00")
+
+        assert ranking.latest() == ["A", "C"]
+
+    def test_late_older_donation_keeps_latest_name(self):
+        """Test that an out-of-order older donation only adds to the total."""
+        ranking = DonorRanking()
+        ranking.add("JOAO", "João", 1_000, "2025-12-13T12:00:00")
+        ranking.add("JOAO", "JOAO", 500, "2025-12-13T09:00:00")
+
+        assert ranking.ranked_names() == ["João"]
+        assert ranking.to_dict()["donors"] == [
+            ["JOAO", "João", 1_500, "2025-12-13T12:00:00"]
+        ]
+
+
+class TestSerialization:
+    """Tests for persisting the ranking between runs."""
+
+    def test_round_trip_then_continue(self):
+        """Test that a reloaded ranking keeps accepting donations correctly."""
+        donations = make_donations(300)
+        first, second = donations[:150], donations[150:]
+
+        ranking = DonorRanking(top_k=5, latest_k=7)
+        ranking.extend(first)
+        restored = DonorRanking.from_dict(json.loads(json.dumps(ranking.to_dict())))
+        restored.extend(second)
+
+        ranked, top, latest = brute_force(donations, 5, 7)
+        assert restored.ranked_names() == ranked
+        assert restored.top() == top
+        assert restored.latest() == latest
+
+    def test_rejects_other_version(self):
+        """Test that an incompatible serialized ranking is refused."""
+        data = DonorRanking().to_dict()
+        data["version"] = -1
+
+        with pytest.raises(ValueError, match="incompatível"):
+            DonorRanking.from_dict(data)
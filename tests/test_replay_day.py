@@ -0,0 +1,79 @@
+"""
+Unit tests for benchmarks/replay_day.py.
+Tests the offline end-to-end replay against the local Sheets emulator.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add src and benchmarks to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from replay_day import replay, split_day
+
+HEADER = ["Carimbo de data/hora", "Nome", "Valor", "Mensagem"]
+VALUES = [
+    HEADER,
+    ["30/11/2025 09:00:00", "Ana Lima", "100", ""],
+    ["30/11/2025 18:30:00", "José Silva", "50,00", ""],
+    ["01/12/2025 08:00:00", "jose  silva", "1.000", "Parabéns!"],
+    ["01/12/2025 08:00:30", "Bia Souza", "abc", ""],
+    ["01/12/2025 08:01:00", "Caio Nóbrega", "25,50", ""],
+    ["01/12/2025 08:02:00", "ANA LIMA", "10", ""],
+]
+
+
+class TestSplitDay:
+    """Tests for separating the history from the replayed day."""
+
+    def test_defaults_to_the_last_day(self):
+        history, events = split_day(VALUES)
+
+        assert history == VALUES[:3]
+        assert [offset for offset, _row in events] == [0.0, 30.0, 60.0, 120.0]
+        assert [row for _offset, row in events] == VALUES[3:]
+
+    def test_explicit_day_drops_later_rows(self):
+        history, events = split_day(VALUES, "30/11/2025")
+
+        assert history == VALUES[:1]
+        assert [row[1] for _offset, row in events] == ["Ana Lima", "José Silva"]
+
+    def test_unreadable_timestamp_keeps_previous_time(self):
+        values = [*VALUES, ["", "Duda", "5", ""]]
+
+        _history, events = split_day(values)
+
+        assert events[-1] == (120.0, values[-1])
+
+    def test_no_readable_timestamp(self):
+        with pytest.raises(ValueError, match="carimbo"):
+            split_day([HEADER, ["ontem", "Ana", "1", ""]])
+
+
+class TestReplay:
+    """Tests for the full pipeline replayed through the emulator."""
+
+    def test_one_run_per_event_matches_full_read(self):
+        """Test that incremental runs end with the same JSON as a full read."""
+        result = replay(VALUES)
+
+        assert result["matches_full"]
+        assert result["day"] == "01/12/2025"
+        assert (result["history_rows"], result["events"], result["runs"]) == (2, 4, 4)
+        # Spreadsheet and worksheet metadata, then the incremental batchGet;
+        # the title search happens only in the first run
+        assert result["api_calls_per_run"] == 3
+        assert {"fetch", "store", "write"} <= set(result["stages"])
+
+    def test_timed_replay_with_latency(self):
+        """Test that arrivals during a run are served together by the next one."""
+        result = replay(VALUES, speed=120, latency=0.01, engine="pandas")
+
+        assert result["matches_full"]
+        assert 1 <= result["runs"] <= result["events"] == 4
+        latency = result["event_latency_s"]
+        assert 0.02 <= latency["p50"] <= latency["p95"] <= latency["max"]
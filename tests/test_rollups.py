@@ -0,0 +1,60 @@
+"""
+Unit tests for rollups.py module.
+Tests the per-day aggregation and the compact timeseries format.
+"""
+
+import os
+import sys
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from rollups import TIMESERIES_VERSION, DayBucket, daily_rollups, format_timeseries
+
+
+class TestDailyRollups:
+    """Tests for aggregating donations by day."""
+
+    def test_groups_by_calendar_day(self):
+        """Test totals, counts and distinct donors per day, in day order."""
+        donations = [
+            ("BIA", "Bia", 500, "2025-12-14T00:00:00"),
+            ("ANA", "Ana", 1_000, "2025-12-13T23:59:59.500000"),
+            ("ANA", "ana", 250, "2025-12-13T08:00:00"),
+        ]
+
+        assert daily_rollups(donations) == [
+            DayBucket("2025-12-13", 1_250, 2, 1),
+            DayBucket("2025-12-14", 500, 1, 1),
+        ]
+
+    def test_empty(self):
+        """Test that no donations give no buckets."""
+        assert daily_rollups([]) == []
+
+
+class TestFormatTimeseries:
+    """Tests for the JSON consumed by the progress charts."""
+
+    def test_columnar_with_cumulative_total(self):
+        """Test one entry per day and the running total in cents."""
+        buckets = [
+            DayBucket("2025-12-14", 500, 1, 1),
+            DayBucket("2025-12-13", 1_250, 2, 1),
+        ]
+
+        assert format_timeseries(buckets) == {
+            "version": TIMESERIES_VERSION,
+            "days": ["2025-12-13", "2025-12-14"],
+            "totalCents": [1_250, 500],
+            "cumulativeCents": [1_250, 1_750],
+            "donations": [2, 1],
+            "donors": [1, 1],
+        }
+
+    def test_empty_series(self):
+        """Test that an empty series keeps every column."""
+        data = format_timeseries([])
+
+        assert data["days"] == []
+        assert data["cumulativeCents"] == []
@@ -0,0 +1,113 @@
+"""
+Unit tests for sheet_source.py module.
+Tests column-projected fetching from gspread and from local fixtures.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from sheet_source import LocalSheetSource, WorksheetSource
+
+from tests.fake_sheets import FakeWorksheet
+
+# Planilha com colunas extras do formulário que não são usadas pelo pipeline
+VALUES = [
+    ["Carimbo de data/hora", "E-mail", "Nome", "Mensagem", "Valor"],
+    ["13/12/2025 10:00:00", "a@x.com", "José Silva", "Parabéns!", "100"],
+    ["13/12/2025 11:00:00", "b@x.com", "Maria", "", "1.000"],
+    ["13/12/2025 12:00:00", "c@x.com", "Ana", "Boa sorte", ""],
+]
+EXPECTED = {
+    "Carimbo de data/hora": [
+        "13/12/2025 10:00:00",
+        "13/12/2025 11:00:00",
+        "13/12/2025 12:00:00",
+    ],
+    "Nome": ["José Silva", "Maria", "Ana"],
+    "Valor": ["100", "1.000", ""],
+}
+
+
+class TestWorksheetSource:
+    """Tests for the gspread-backed projected fetch."""
+
+    def test_fetches_only_required_columns_in_one_batch(self):
+        """Test that only the used columns are requested, in a single batch."""
+        worksheet = FakeWorksheet(VALUES)
+
+        columns = WorksheetSource(worksheet).fetch_columns()
+
+        assert columns == EXPECTED
+        assert worksheet.requests == ["row 1", ["A2:A", "C2:C", "E2:E"]]
+
+    def test_paged_fetch_by_row_blocks(self):
+        """Test that block paging returns the same columns."""
+        worksheet = FakeWorksheet(VALUES)
+
+        columns = WorksheetSource(worksheet).fetch_columns(block_rows=2)
+
+        assert columns == EXPECTED
+        assert worksheet.requests[1:] == [
+            ["A2:A3", "C2:C3", "E2:E3"],
+            ["A4:A5", "C4:C5", "E4:E5"],
+        ]
+
+    def test_known_positions_skip_header(self):
+        """Test that cached column positions avoid the header request."""
+        worksheet = FakeWorksheet(VALUES)
+
+        columns = WorksheetSource(worksheet).fetch_columns(
+            start_row=3, positions=[1, 3, 5]
+        )
+
+        assert columns["Nome"] == ["Maria", "Ana"]
+        assert worksheet.requests == [["A3:A", "C3:C", "E3:E"]]
+
+    def test_missing_column_raises(self):
+        """Test that a sheet without a required column is rejected."""
+        worksheet = FakeWorksheet([["Carimbo de data/hora", "Nome"]])
+
+        with pytest.raises(ValueError, match="colunas necessárias"):
+            WorksheetSource(worksheet).fetch_columns()
+
+    def test_empty_sheet(self):
+        """Test that an empty sheet yields empty columns."""
+        columns = WorksheetSource(FakeWorksheet([])).fetch_columns()
+
+        assert columns == {name: [] for name in EXPECTED}
+
+
+class TestLocalSheetSource:
+    """Tests for the offline CSV/JSON source."""
+
+    def test_csv_matches_worksheet_source(self, tmp_path):
+        """Test that a CSV export yields the same columns as the Sheets API."""
+        path = tmp_path / "respostas.csv"
+        path.write_text(
+            "\n".join(",".join(row) for row in VALUES) + "\n\n", encoding="utf-8"
+        )
+
+        assert LocalSheetSource.from_csv(str(path)).fetch_columns() == EXPECTED
+
+    def test_json_records_fixture(self, tmp_path):
+        """Test that a get_all_records-style JSON fixture is accepted."""
+        header = VALUES[0]
+        records = [dict(zip(header, row)) for row in VALUES[1:]]
+        path = tmp_path / "respostas.json"
+        path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+
+        assert LocalSheetSource.from_json(str(path)).fetch_columns() == EXPECTED
+
+    def test_json_rows_fixture_with_start_row(self, tmp_path):
+        """Test that a row-list JSON fixture supports fetching a tail."""
+        path = tmp_path / "respostas.json"
+        path.write_text(json.dumps(VALUES, ensure_ascii=False), encoding="utf-8")
+
+        columns = LocalSheetSource.from_json(str(path)).fetch_columns(start_row=4)
+
+        assert columns == {name: values[2:] for name, values in EXPECTED.items()}
@@ -0,0 +1,254 @@
+"""
+Unit tests for sheets_client.py module.
+Tests request budgeting, retries with backoff and opening spreadsheets by key,
+against a local fake of the Google APIs.
+"""
+
+import json
+import os
+import sys
+
+import gspread
+import pytest
+from gspread.exceptions import APIError
+
+from tests.fake_sheets import FakeSheetsServer
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from api_usage import track_api_usage
+from instrumentation import Metrics, collect
+from sheet_source import WorksheetSource
+from sheets_client import (
+    BACKOFF_MAX,
+    SpreadsheetKeys,
+    TokenBucket,
+    open_spreadsheet,
+    rate_limited_client,
+)
+
+TITLE = "Livro de Ouro (respostas)"
+WORKSHEET = "Respostas ao formulário 1"
+VALUES = [
+    ["Carimbo de data/hora", "Endereço de e-mail", "Nome", "Valor"],
+    ["13/12/2025 10:00:00", "a@x.com", "José Silva", "100"],
+    ["13/12/2025 11:00:00", "b@x.com", "Maria Santos", "200,50"],
+]
+COLUMNS = {
+    "Carimbo de data/hora": ["13/12/2025 10:00:00", "13/12/2025 11:00:00"],
+    "Nome": ["José Silva", "Maria Santos"],
+    "Valor": ["100", "200,50"],
+}
+
+
+class FakeClock:
+    """Monotonic clock that only advances when something sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def server():
+    with FakeSheetsServer({"key-livro": (TITLE, {WORKSHEET: VALUES})}) as server:
+        yield server
+
+
+def make_client(server, clock=None, **options):
+    """gspread client talking to the fake server, with a fake clock for waits."""
+    clock = clock or FakeClock()
+    options.setdefault("bucket", TokenBucket(clock=clock, sleep=clock.sleep))
+    options.setdefault("sleep", clock.sleep)
+    options.setdefault("jitter", lambda: 1.0)
+    return gspread.Client(
+        None, session=server.session(), http_client=rate_limited_client(**options)
+    )
+
+
+def fetch(gc, keys):
+    return WorksheetSource(
+        open_spreadsheet(gc, TITLE, keys).worksheet(WORKSHEET)
+    ).fetch_columns()
+
+
+class TestTokenBucket:
+    """Tests for the request budget."""
+
+    def test_burst_then_steady_rate(self):
+        """Test that a burst passes freely and later requests are spaced out."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, capacity=3, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(5)]
+
+        assert waits == [0.0, 0.0, 0.0, 0.5, 0.5]
+        assert clock.now == 1.0
+
+    def test_refills_while_idle_up_to_capacity(self):
+        """Test that idle time refills tokens but never above capacity."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        bucket.acquire()
+
+        clock.now += 60
+
+        assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 1.0]
+
+
+class TestRateLimitedClient:
+    """Tests for retries against injected throttling."""
+
+    def test_fetch_survives_throttling(self, server):
+        """Test that 429 and 5xx answers are retried until the data arrives."""
+        clock = FakeClock()
+        gc = make_client(server, clock)
+        server.fail(429, times=2)
+        server.fail(503)
+
+        with track_api_usage() as usage:
+            assert fetch(gc, SpreadsheetKeys()) == COLUMNS
+
+        assert usage.retries == 3
+        assert usage.statuses == {429: 2, 503: 1}
+        # Espera exponencial: 1s, 2s, 4s (jitter fixo no teto)
+        assert clock.sleeps == [1.0, 2.0, 4.0]
+
+    def test_honors_retry_after(self, server):
+        """Test that the server's Retry-After wins over a shorter backoff."""
+        clock = FakeClock()
+        gc = make_client(server, clock, jitter=lambda: 0.0)
+        server.fail(429, retry_after=7)
+
+        fetch(gc, SpreadsheetKeys())
+
+        assert clock.sleeps == [7.0]
+
+    def test_jitter_spreads_backoff_below_ceiling(self, server):
+        """Test that each delay is drawn between zero and the exponential ceiling."""
+        clock = FakeClock()
+        draws = iter([0.25, 0.5, 0.75, 0.1])
+        gc = make_client(server, clock, jitter=lambda: next(draws))
+        server.fail(500, times=4)
+
+        fetch(gc, SpreadsheetKeys())
+
+        assert clock.sleeps == [0.25, 1.0, 3.0, 0.8]
+        assert max(clock.sleeps) <= BACKOFF_MAX
+
+    def test_drive_usage_limit_and_dropped_connection_are_retried(self, server):
+        """Test the Drive 403 rate-limit answer and a closed connection."""
+        gc = make_client(server)
+        server.fail(403, reason="userRateLimitExceeded")
+        server.fail("drop")
+
+        with track_api_usage() as usage:
+            assert fetch(gc, SpreadsheetKeys()) == COLUMNS
+
+        assert usage.statuses == {403: 1, 0: 1}
+
+    def test_gives_up_after_max_retries(self, server):
+        """Test that a persistent 429 surfaces as APIError after the retry budget."""
+        gc = make_client(server, max_retries=2)
+        server.fail(429, times=10)
+
+        with track_api_usage() as usage, pytest.raises(APIError):
+            fetch(gc, SpreadsheetKeys())
+
+        assert usage.calls == 3
+
+    def test_permission_errors_are_not_retried(self, server):
+        """Test that a plain 403 fails at once."""
+        gc = make_client(server)
+        server.fail(403)
+
+        with track_api_usage() as usage, pytest.raises(APIError):
+            fetch(gc, SpreadsheetKeys())
+
+        assert usage.calls == 1
+        assert usage.retries == 0
+
+    def test_bucket_paces_requests(self, server):
+        """Test that requests beyond the burst wait for the token bucket."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=1, clock=clock, sleep=clock.sleep)
+        gc = make_client(server, clock, bucket=bucket)
+
+        with track_api_usage() as usage:
+            fetch(gc, SpreadsheetKeys())
+
+        assert usage.retries == 0
+        assert usage.throttled_s == pytest.approx(usage.calls - 1)
+
+
+class TestOpenSpreadsheet:
+    """Tests for opening spreadsheets by cached key."""
+
+    def test_key_is_cached_and_skips_drive_search(self, server, tmp_path):
+        """Test that the second run opens by key, without the Drive listing."""
+        path = str(tmp_path / "keys.json")
+
+        with track_api_usage() as first:
+            fetch(make_client(server), SpreadsheetKeys.load(path))
+        cold = server.paths()
+        server.requests.clear()
+        with track_api_usage() as second:
+            assert fetch(make_client(server), SpreadsheetKeys.load(path)) == COLUMNS
+
+        assert "/drive/v3/files" in cold
+        assert "/drive/v3/files" not in server.paths()
+        assert second.calls == first.calls - 1
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == {"keys": {TITLE: "key-livro"}}
+
+    def test_stale_key_falls_back_to_title(self, server):
+        """Test that a key that no longer exists is replaced by a fresh search."""
+        keys = SpreadsheetKeys(keys={TITLE: "deleted"})
+
+        spreadsheet = open_spreadsheet(make_client(server), TITLE, keys)
+
+        assert spreadsheet.id == "key-livro"
+        assert keys.get(TITLE) == "key-livro"
+
+    def test_corrupt_cache_is_ignored(self, tmp_path):
+        """Test that an unreadable cache becomes an empty one."""
+        path = tmp_path / "keys.json"
+        path.write_text("{not json", encoding="utf-8")
+
+        assert SpreadsheetKeys.load(str(path)).keys == {}
+
+
+class TestApiUsageMetrics:
+    """Tests for the per-run API call counter."""
+
+    def test_calls_recorded_as_stage(self, server):
+        """Test that the run's API calls show up in the metrics."""
+        metrics = Metrics()
+        server.fail(429)
+
+        with collect(metrics), track_api_usage():
+            fetch(make_client(server), SpreadsheetKeys())
+
+        (stage,) = metrics.stages
+        assert stage.name == "sheets_api"
+        assert stage.counts["api_calls"] == len(server.requests)
+        assert stage.counts["api_retries"] == 1
+        assert stage.counts["api_retry_429"] == 1
+
+    def test_no_stage_without_calls(self):
+        """Test that local runs do not get an empty API stage."""
+        metrics = Metrics()
+
+        with collect(metrics), track_api_usage():
+            pass
+
+        assert metrics.stages == []
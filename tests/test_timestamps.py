@@ -0,0 +1,199 @@
+"""
+Unit tests for timestamps.py module.
+Tests the tiered timestamp parser against pandas' own parse.
+"""
+
+import json
+import os
+import random
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+import timestamps
+from pandas._libs import tslib
+from timestamps import (
+    NOT_INFERRED,
+    FormatCache,
+    fixed_layout,
+    learnable,
+    parse_timestamp_column,
+    use_format_cache,
+)
+
+PATTERNS = [
+    "{d}/{m}/{y} {H}:{M}:{S}",
+    "{d}/{m}/{y} {H}:{M}:{S}",
+    "{d}/{m}/{y} {H}:{M}",
+    "{d}/{m}/{y}",
+    "{y}-{m}-{d} {H}:{M}:{S}",
+    "{y}-{m}-{d}T{H}:{M}:{S}",
+    "{y}-{m}-{d}",
+    "{d}.{m}.{y}",
+    "{m}/{d}/{y}",
+    " {d}/{m}/{y} {H}:{M}:{S}",
+    "{d}/{m}/{y} {H}:{M}:{S}.5",
+    "sem data",
+    "",
+]
+
+
+def make_timestamps(count: int, rng: random.Random) -> list[str]:
+    """Builds mixed-format timestamps, with unpadded and out-of-range fields."""
+    values = []
+    for _ in range(count):
+        fields = {
+            "d": rng.randint(0, 32),
+            "m": rng.randint(0, 13),
+            "H": rng.randint(0, 24),
+            "M": rng.randint(0, 59),
+            "S": rng.randint(0, 61),
+        }
+        text = {
+            k: f"{v:02d}" if rng.random() < 0.85 else str(v) for k, v in fields.items()
+        }
+        text["y"] = rng.choice(["2024", "2025", "2000", "1500", "25"])
+        values.append(rng.choice(PATTERNS).format(**text))
+    return values
+
+
+def pandas_parse(values: list) -> np.ndarray:
+    """Today's parse in the pandas engine."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        series = pd.Series(values, dtype=object)
+        return pd.to_datetime(series, dayfirst=True, errors="coerce").to_numpy()
+
+
+def assert_same(values: list, cache: FormatCache | None = None):
+    parsed = parse_timestamp_column(values, cache or FormatCache())
+    expected = pandas_parse(values)
+    np.testing.assert_array_equal(parsed.values, expected)
+    return parsed
+
+
+@pytest.mark.parametrize("first", [None, "13/12/2025 10:00:00", "2025-12-13", "x", 7])
+@pytest.mark.parametrize("seed", range(4))
+def test_identical_to_pandas(first, seed):
+    """Test that every tier combination reproduces pd.to_datetime exactly."""
+    values = make_timestamps(400, random.Random(seed))
+    if first is not None:
+        values.insert(0, first)
+
+    assert_same(values)
+
+
+@pytest.mark.parametrize("first", [None, 7])
+def test_identical_to_pandas_in_chunks(first, monkeypatch):
+    """Test that the vectorized tiers give the same result in small blocks."""
+    monkeypatch.setattr(timestamps, "CHUNK_ROWS", 16)
+    values = make_timestamps(400, random.Random(110))
+    if first is not None:
+        values.insert(0, first)
+
+    assert_same(values)
+
+
+def test_pinned_format_is_resolved_by_the_exact_tier():
+    """Test that Google Forms timestamps never reach pandas."""
+    values = ["13/12/2025 10:00:00", "29/02/2024 23:59:59", "01/02/2025 00:00:00"]
+
+    parsed = assert_same(values)
+
+    assert parsed.tiers == {"exact": 3, "learned": 0, "strptime": 0, "dateutil": 0}
+
+
+def test_column_format_leftovers_use_strptime():
+    """Test that unpadded and invalid values follow the inferred format only."""
+    values = [
+        "13/12/2025 10:00:00",
+        "13/12/2025 9:05:00",  # sem zero à esquerda: strptime
+        "13/12/2025 10:00:60",  # o pandas aceita segundo 60 neste caminho
+        "30/02/2025 10:00:00",  # data inexistente: NaT
+        "2025-12-13 10:00:00",  # outro formato: NaT, como hoje
+    ]
+
+    parsed = assert_same(values)
+
+    assert parsed.tiers == {"exact": 1, "learned": 0, "strptime": 2, "dateutil": 0}
+
+
+def test_learned_formats_skip_dateutil_on_the_next_run():
+    """Test that formats resolved by dateutil are learned and reused."""
+    values = ["sem data", "13/12/2025 10:00:00", "2025-12-13 10:00:00"]
+    values += ["2025-11-30 08:15:00", "14.12.2025"]
+    cache = FormatCache()
+
+    first = assert_same(values, cache)
+    second = assert_same(values, cache)
+
+    assert first.tiers == {"exact": 1, "learned": 0, "strptime": 0, "dateutil": 3}
+    assert cache.formats() == ["%Y-%m-%d %H:%M:%S", "%d.%m.%Y"]
+    assert second.tiers == {"exact": 1, "learned": 3, "strptime": 0, "dateutil": 0}
+
+
+def test_ambiguous_formats_are_not_learned():
+    """Test that month-first or day-last-month formats never run before dateutil."""
+    assert learnable("%d/%m/%Y %H:%M:%S")
+    assert learnable("%Y-%m-%dT%H:%M:%S")
+    assert not learnable("%m/%d/%Y")
+    assert not learnable("%Y-%d-%m")
+    assert not learnable("%d/%m/%Y %M:%S")
+    assert not learnable("%d/%m/%Y %H:%M:%S.%f")
+    assert fixed_layout("%d %b %Y") is None
+
+
+def test_timezones_fall_back_to_pandas():
+    """Test that tz-aware values keep pandas' own conversion."""
+    values = ["sem data", "2025-12-13T10:00:00+00:00", "2025-12-13T10:00:00-03:00"]
+
+    parsed = parse_timestamp_column(values, FormatCache())
+
+    expected = pandas_parse(values)
+    assert list(parsed.values) == list(expected)
+
+
+def test_first_value_rule_matches_pandas():
+    """Test that the values skipped when inferring the format match pandas."""
+    for value in [*NOT_INFERRED, " ", "x", None, float("nan")]:
+        column = np.array([value, "13/12/2025"], dtype=object)
+        skipped = tslib.first_non_null(column) == 1
+        assert skipped == (pd.isna(value) or value in NOT_INFERRED)
+
+
+def test_column_format_is_silent():
+    """Test that pandas' dayfirst warnings do not leak into the run output."""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        for value in ["2025-12-14 10:00:00", "12/31/2025 10:00"]:
+            assert timestamps.column_format(np.array([value], dtype=object))
+
+    assert caught == []
+
+
+class TestFormatCache:
+    """Tests for the learned-format cache file."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that learned formats persist between runs."""
+        path = tmp_path / "cache" / "formats.json"
+        with use_format_cache(str(path)) as cache:
+            parse_timestamp_column(["sem data", "2025-12-13 10:00:00"])
+            assert cache.formats() == ["%Y-%m-%d %H:%M:%S"]
+
+        assert json.loads(path.read_text()) == {"formats": {"%Y-%m-%d %H:%M:%S": 1}}
+        assert FormatCache.load(str(path)).formats() == ["%Y-%m-%d %H:%M:%S"]
+
+    def test_invalid_file_is_ignored(self, tmp_path):
+        """Test that a corrupt or tampered cache starts empty."""
+        path = tmp_path / "formats.json"
+        path.write_text("{não é json")
+        assert FormatCache.load(str(path)).formats() == []
+
+        path.write_text(json.dumps({"formats": {"%m/%d/%Y": 9, "%d.%m.%Y": 2}}))
+        assert FormatCache.load(str(path)).formats() == ["%d.%m.%Y"]
@@ -0,0 +1,166 @@
+"""
+Unit tests for weighting.py module.
+Tests the word-cloud weight tiers, their configuration and the top-M cap.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from donor_payload import build_donor_payload, format_donor_lists
+from weighting import (
+    Weighting,
+    get_weighting,
+    load_weighting,
+    tier_weights,
+    use_weighting,
+)
+
+
+def legacy_weights(count):
+    """The hardcoded tiers the word cloud always used."""
+    weights = []
+    for idx in range(count):
+        if idx == 0:
+            weights.append(5)
+        elif idx < 4:
+            weights.append(4)
+        elif idx < 10:
+            weights.append(3)
+        elif idx < 20:
+            weights.append(2)
+        else:
+            weights.append(1)
+    return weights
+
+
+class TestTierWeights:
+    """Tests for the vectorized weight schemes."""
+
+    @pytest.mark.parametrize("count", [0, 1, 4, 5, 20, 21, 500])
+    def test_default_matches_legacy_tiers(self, count):
+        """Test that the default rank breakpoints keep the old weights."""
+        assert tier_weights(count, Weighting()) == legacy_weights(count)
+
+    def test_custom_rank_breakpoints(self):
+        weighting = Weighting(breakpoints=(2, 3))
+
+        assert tier_weights(5, weighting) == [3, 3, 2, 1, 1]
+
+    def test_percentile_tiers_scale_with_donor_count(self):
+        """Test that the top tiers grow with the donor base."""
+        weighting = Weighting(scheme="percentile", percentiles=(1, 10, 50))
+
+        weights = tier_weights(1_000, weighting)
+
+        assert weights.count(4) == 10
+        assert weights.count(3) == 90
+        assert weights.count(2) == 400
+        assert weights.count(1) == 500
+        assert weights == sorted(weights, reverse=True)
+
+    def test_percentile_always_has_a_top_donor(self):
+        weighting = Weighting(scheme="percentile", percentiles=(1, 5))
+
+        assert tier_weights(3, weighting) == [3, 1, 1]
+
+    def test_log_levels_follow_amounts(self):
+        """Test log-scaled weights: 10x the amount, one level up."""
+        weighting = Weighting(scheme="log", levels=4)
+
+        weights = tier_weights(5, weighting, [100_000, 10_000, 10_000, 1_000, 100])
+
+        assert weights == [4, 3, 3, 2, 1]
+
+    def test_log_with_equal_amounts(self):
+        weighting = Weighting(scheme="log", levels=3)
+
+        assert tier_weights(2, weighting, [500, 500]) == [3, 3]
+
+    def test_log_needs_amounts(self):
+        with pytest.raises(ValueError, match="log"):
+            tier_weights(2, Weighting(scheme="log"))
+
+
+class TestMaxWords:
+    """Tests for capping the emitted cloud."""
+
+    def test_cap_adds_others_summary(self):
+        """Test that only the top M words are emitted, with the rest summarized."""
+        names = [f"Doador {i}" for i in range(25)]
+
+        with use_weighting(Weighting(max_words=20)):
+            payload = format_donor_lists(names, names[:10], names[:10])
+
+        assert [word["text"] for word in payload["wordCloud"]] == names[:20]
+        assert [word["value"] for word in payload["wordCloud"]] == legacy_weights(20)
+        assert payload["wordCloudOthers"] == {"count": 5, "text": "e mais 5 doadores"}
+        assert len(payload["topDonors"]) == 10
+
+    def test_no_summary_when_everything_fits(self):
+        names = ["Ana", "Bia"]
+
+        with use_weighting(Weighting(max_words=2)):
+            payload = format_donor_lists(names, names, names)
+
+        assert "wordCloudOthers" not in payload
+
+    @pytest.mark.parametrize("engine", ["pandas", "lean"])
+    def test_engines_pass_amounts_for_log_scale(self, engine):
+        """Test that both engines weight by the donor totals."""
+        rows = [
+            {"Carimbo de data/hora": "01/11/2025 10:00:00", "Nome": n, "Valor": v}
+            for n, v in [("Ana", "1000"), ("Bia", "100"), ("Caio", "10")]
+        ]
+
+        with use_weighting(Weighting(scheme="log", levels=3, max_words=2)):
+            payload = build_donor_payload(rows, engine)
+
+        assert payload["wordCloud"] == [
+            {"text": "Ana", "value": 3},
+            {"text": "Bia", "value": 2},
+        ]
+        assert payload["wordCloudOthers"]["count"] == 1
+
+    def test_use_weighting_restores_default(self):
+        with use_weighting(Weighting(max_words=1)):
+            pass
+
+        assert get_weighting() == Weighting()
+
+
+class TestLoadWeighting:
+    """Tests for the JSON configuration file."""
+
+    def test_missing_fields_use_defaults(self, tmp_path):
+        path = tmp_path / "weighting.json"
+        path.write_text(json.dumps({"scheme": "percentile", "max_words": 300}))
+
+        weighting = load_weighting(str(path))
+
+        assert weighting == Weighting(scheme="percentile", max_words=300)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"scheme": "quadratic"},
+            {"breakpoints": [4, 1]},
+            {"percentiles": []},
+            {"breakpoints": [1, "5"]},
+            {"percentiles": 5},
+            {"breakpoints": [None]},
+            {"levels": 0},
+            {"max_words": 0},
+        ],
+    )
+    def test_invalid_config(self, tmp_path, data):
+        path = tmp_path / "weighting.json"
+        path.write_text(json.dumps(data))
+
+        with pytest.raises(ValueError):
+            load_weighting(str(path))
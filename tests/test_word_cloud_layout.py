@@ -0,0 +1,193 @@
+"""
+Unit tests for word_cloud_layout.py module.
+Tests the precomputed word-cloud positions: no overlaps, bounds and rotations.
+"""
+
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "services"))
+
+from instrumentation import Metrics, collect
+from word_cloud_layout import (
+    BREAKPOINTS,
+    FONT_SIZE_RANGE,
+    LAYOUT_VERSION,
+    LAYOUT_WORDS,
+    Breakpoint,
+    build_word_cloud_layout,
+    font_sizes,
+    layout_source,
+    rotation_for,
+    text_width,
+    word_boxes,
+    write_word_cloud_layout,
+)
+
+
+def random_cloud(seed, count=90):
+    """A ranked word cloud like `format_donor_lists` produces."""
+    rng = random.Random(seed)
+    first = ["Ana", "José", "Maria Eduarda", "Lúcia", "Pedro", "Bia", "Carlos"]
+    last = ["Silva", "Albuquerque", "Souza", "de Oliveira Lima", "Nóbrega"]
+    words = [
+        {
+            "text": f"{rng.choice(first)} {rng.choice(last)} {i}",
+            "value": rng.randint(1, 50),
+        }
+        for i in range(count)
+    ]
+    return sorted(words, key=lambda word: -word["value"])
+
+
+def placed_boxes(words, placed):
+    """Collision boxes of the placed words, in container coordinates."""
+    boxes = []
+    for index, x, y, size, rotation in placed:
+        width = text_width(words[index]["text"], size)
+        for x0, y0, x1, y1 in word_boxes(width, size, rotation):
+            boxes.append((index, x + x0, y + y0, x + x1, y + y1))
+    return boxes
+
+
+class TestRotation:
+    """Tests for the rotation shared with WordCloud.vue."""
+
+    @pytest.mark.parametrize(
+        ("text", "rotation"),
+        [
+            ("Ana", 90),
+            ("Bia", 270),
+            ("Pedro Henrique", 45),
+            ("Turma 110", 0),
+            ("João da Silva", 90),
+            ("Ação 💛", 270),
+        ],
+    )
+    def test_matches_rotation_fn(self, text, rotation):
+        """Test the values the component's JS hash gives (UTF-16, int32)."""
+        assert rotation_for(text) == rotation
+
+
+class TestFontSizes:
+    """Tests for mapping weights to font sizes."""
+
+    def test_linear_between_min_and_max(self):
+        assert font_sizes([1, 3, 5], 32) == [FONT_SIZE_RANGE[0], 22.0, 32.0]
+
+    def test_equal_weights_use_the_largest_size(self):
+        assert font_sizes([4, 4], 48) == [48.0, 48.0]
+
+
+class TestBuildLayout:
+    """Tests for the positions precomputed per breakpoint."""
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_no_overlaps_and_inside_container(self, seed):
+        """Test that no two placed words collide and none leaves the container."""
+        words = random_cloud(seed)
+
+        layout = build_word_cloud_layout(words)
+
+        assert [item["name"] for item in layout["breakpoints"]] == [
+            breakpoint.name for breakpoint in BREAKPOINTS
+        ]
+        for item in layout["breakpoints"]:
+            boxes = placed_boxes(words, item["words"])
+            for _, x0, y0, x1, y1 in boxes:
+                assert 0 <= x0 and x1 <= item["width"]
+                assert 0 <= y0 and y1 <= item["height"]
+            for a in boxes:
+                for b in boxes:
+                    if a[0] < b[0]:
+                        overlap = a[1] < b[3] and b[1] < a[3] and a[2] < b[4]
+                        assert not (overlap and b[2] < a[4])
+
+    def test_largest_words_are_placed_first_at_full_size(self):
+        """Test that the top word sits at the center with the breakpoint's max font."""
+        words = [{"text": "Ana", "value": 10}, {"text": "Bia", "value": 1}]
+
+        layout = build_word_cloud_layout(words, breakpoints=[BREAKPOINTS[-1]])
+
+        index, x, y, size, rotation = layout["breakpoints"][0]["words"][0]
+        assert (index, size, rotation) == (0, BREAKPOINTS[-1].max_font, 90)
+        assert (x, y) == (BREAKPOINTS[-1].width // 2, BREAKPOINTS[-1].height // 2)
+
+    def test_crowded_container_shrinks_then_drops(self):
+        """Test that words shrink to fit and the ones that never fit are left out."""
+        words = random_cloud(0, count=60)
+        tiny = Breakpoint("xs", 160, 120, 32)
+
+        placed = build_word_cloud_layout(words, breakpoints=[tiny])["breakpoints"][0]
+
+        sizes = font_sizes([word["value"] for word in words], tiny.max_font)
+        assert 0 < len(placed["words"]) < len(words)
+        assert any(size < sizes[index] for index, _, _, size, _ in placed["words"])
+        assert all(size >= FONT_SIZE_RANGE[0] * 0.7 for *_, size, _ in placed["words"])
+
+    def test_limit_and_determinism(self):
+        """Test that only the first `limit` words are placed, always the same way."""
+        words = random_cloud(1)
+
+        layout = build_word_cloud_layout(words, limit=20)
+
+        assert layout["version"] == LAYOUT_VERSION
+        assert layout == build_word_cloud_layout(words, limit=20)
+        for item in layout["breakpoints"]:
+            assert all(index < 20 for index, *_ in item["words"])
+
+
+class TestWriteWordCloudLayout:
+    """Tests for the layout artifact written next to donors.json."""
+
+    def write(self, tmp_path, words):
+        path = str(tmp_path / "donors.json")
+        with collect(Metrics()) as metrics:
+            changed = write_word_cloud_layout({"wordCloud": words}, path)
+        return changed, metrics.stages[0] if metrics.stages else None
+
+    def test_compact_artifact(self, tmp_path):
+        """Test that the layout goes to its own minified file."""
+        words = random_cloud(0, count=20)
+
+        changed, stage = self.write(tmp_path, words)
+
+        content = (tmp_path / "donors.layout.json").read_bytes()
+        assert changed
+        assert b"\n" not in content and b", " not in content
+        layout = json.loads(content)
+        assert layout["source"] == layout_source(words)
+        assert {key: layout[key] for key in ("version", "breakpoints")} == (
+            build_word_cloud_layout(words)
+        )
+        assert (tmp_path / "donors.layout.json.gz").exists()
+        assert stage.name == "layout" and stage.rows_out > 0
+
+    def test_unchanged_words_reuse_the_layout(self, tmp_path):
+        """Test that only the top LAYOUT_WORDS words and weights trigger a rebuild."""
+        words = random_cloud(1, count=LAYOUT_WORDS + 10)
+        self.write(tmp_path, words)
+        before = os.stat(tmp_path / "donors.layout.json").st_mtime_ns
+
+        tail_changed = [*words[:LAYOUT_WORDS], {"text": "Novo doador", "value": 1}]
+        changed, stage = self.write(tmp_path, tail_changed)
+
+        assert not changed
+        assert stage.counts == {"reused": 1}
+        assert os.stat(tmp_path / "donors.layout.json").st_mtime_ns == before
+
+        reweighted = [{**words[0], "value": words[0]["value"] + 1}, *words[1:]]
+        assert self.write(tmp_path, reweighted)[0]
+
+    def test_empty_cloud_removes_the_artifact(self, tmp_path):
+        self.write(tmp_path, random_cloud(2, count=5))
+
+        changed, _stage = self.write(tmp_path, [])
+
+        assert changed
+        assert not [name for name in os.listdir(tmp_path) if "layout" in name]